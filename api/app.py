@@ -1,12 +1,27 @@
+import asyncio
+import os
+import threading
 import time
-from fastapi import FastAPI, HTTPException, Query
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 from src.trie import Trie
-from src.fuzzy_search import fuzzy_search
-from src.init_data import load_demo_data, populate_trie
-import uvicorn
-from fastapi.responses import HTMLResponse
+from src.fuzzy_search import fold, fuzzy_search, trie_fuzzy_search
+from src.cache import LRUCache
+from src.init_data import iter_corpus, load_corpus, build_symspell_index, normalize_term
+from src.live_index import LiveIndex, IndexGeneration
+from src.token_index import TokenIndex
+from src.terms import TermDictionary
+from src.popularity import Popularity
+from src.sharding import ShardedIndex, ShardTimeout
+from src.offload import BoundedPool, Overloaded, SingleFlight, init_snapshot_worker, snapshot_fuzzy
+from src.metrics import MetricsMiddleware, Registry, SearchMetrics
+from src.profiling import SamplingProfiler, SlowQueryLog, server_timing
+from src.encoding import FragmentCache, encode_batch, encode_matches, encode_response, encode_terms
+from src.startup import IndexLoader
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 
 app = FastAPI(
     title="In-Memory Search Engine API",
@@ -19,11 +34,19 @@ app = FastAPI(
 )
 
 # Response Models with extended metadata
+AUTOCOMPLETE_ALGORITHM = "Trie Search"
+# Algorithm label per autocomplete `mode`, reported like the fuzzy engine labels
+AUTOCOMPLETE_ALGORITHMS = {
+    "prefix": AUTOCOMPLETE_ALGORITHM,
+    "token": "Token Prefix Index",
+    "infix": "N-gram Infix Index",
+}
+
 class AutocompleteResponse(BaseModel):
     query: str
     results: List[str]
     execution_time_ms: float = Field(..., description="Execution time in milliseconds")
-    algorithm: str = Field("Trie Search", description="Search algorithm used")
+    algorithm: str = Field(AUTOCOMPLETE_ALGORITHM, description="Search algorithm used")
     cache_used: bool = Field(False, description="Was the result served from cache?")
 
 class FuzzyMatch(BaseModel):
@@ -35,33 +58,532 @@ class FuzzyResponse(BaseModel):
     results: List[FuzzyMatch]
     execution_time_ms: float = Field(..., description="Execution time in milliseconds")
     algorithm: str = Field("Levenshtein Distance", description="Search algorithm used")
+    cache_used: bool = Field(False, description="Was the result served from cache?")
+
+def drop_deleted(index, matches, position=0):
+    # Secondary indexes of a stale generation can still return deleted terms; the trie
+    # decides membership. position is where the term sits in each match.
+    if not index.stale:
+        return matches
+    return [match for match in matches if match[position] in index.trie]
+
+# Fuzzy engines selectable through the `engine` parameter: (algorithm label, search function).
+# Each search runs against one IndexGeneration, fetched once per request, and times its
+# stages into trace if one is given.
+FUZZY_ENGINES = {
+    "trie": ("Levenshtein Automaton (Trie)", lambda index, query, max_distance, trace=None: trie_fuzzy_search(
+        query, max_distance, index.trie, trace)),
+    "scan": ("Levenshtein Distance", lambda index, query, max_distance, trace=None: drop_deleted(index, fuzzy_search(
+        query, max_distance, index.words if index.words is not None else index.trie, trace))),
+    "symspell": ("Symmetric Delete", lambda index, query, max_distance, trace=None: drop_deleted(index, index.symspell.search(
+        query, max_distance, trace))),
+    "bitparallel": ("Bit-Parallel Levenshtein", lambda index, query, max_distance, trace=None: drop_deleted(
+        index, index.bitparallel.search(query, max_distance, trace))),
+    # Only used on a sharded index, where index.trie is the ShardedIndex coordinator
+    "sharded": ("Scatter-Gather (Sharded)", lambda index, query, max_distance, trace=None: index.trie.fuzzy(
+        query, max_distance, trace=trace)),
+}
+
+# Serve from a prebuilt binary snapshot if SEARCH_SNAPSHOT is set; startup then only maps
+# the file. Otherwise stream the corpus at SEARCH_DATA (.json, .jsonl/.ndjson or .txt,
+# optionally gzipped) into the trie.
+SNAPSHOT_PATH = os.environ.get("SEARCH_SNAPSHOT")
+DATA_PATH = os.environ.get("SEARCH_DATA", "./data/demo_data.json")
+# SEARCH_SHARDS=N splits the corpus at SEARCH_DATA across N local shard processes and
+# answers every query by scatter-gather. Like snapshot mode, the index is read-only.
+SHARD_COUNT = int(os.environ.get("SEARCH_SHARDS", "0"))
+# A query that has not heard from every shard within SHARD_TIMEOUT seconds answers 504
+# instead of holding its worker thread; 0 waits forever.
+SHARD_TIMEOUT = float(os.environ.get("SHARD_TIMEOUT", "10")) or None
+
+# Optional symmetric delete index for low max_distance queries; disabled with
+# SYMSPELL_MAX_DISTANCE=0 and skipped if it would not fit SYMSPELL_MEMORY_BUDGET_MB.
+# Snapshot mode skips it by default, since building it would scan the whole corpus at startup.
+SYMSPELL_MAX_DISTANCE = int(os.environ.get("SYMSPELL_MAX_DISTANCE", "0" if SNAPSHOT_PATH else "2"))
+SYMSPELL_MEMORY_BUDGET_MB = float(os.environ.get("SYMSPELL_MEMORY_BUDGET_MB", "256"))
+# Vectorized engine for the distances the deletion index does not cover; needs numpy.
+# Snapshot mode never packs the corpus itself: it maps the arrays stored in the snapshot,
+# if the snapshot was written with them.
+BITPARALLEL_ENABLED = not SNAPSHOT_PATH and not SHARD_COUNT
+
+def build_fuzzy_indexes(words):
+    # Returns (symspell, bitparallel); either is None when disabled or unavailable
+    symspell = None
+    if SYMSPELL_MAX_DISTANCE > 0:
+        symspell = build_symspell_index(
+            words,
+            max_distance=SYMSPELL_MAX_DISTANCE,
+            memory_budget_mb=SYMSPELL_MEMORY_BUDGET_MB,
+        )
+    bitparallel = None
+    if BITPARALLEL_ENABLED:
+        try:
+            # Imported here, on the loader thread, to keep NumPy off the import path
+            from src.bitparallel import BitParallelMatcher
+            bitparallel = BitParallelMatcher(words)
+        except ImportError:
+            pass
+    return symspell, bitparallel
+
+# Token and infix index behind /autocomplete?mode=token|infix. TOKEN_INDEX=0 disables it;
+# snapshot mode leaves it out unless TOKEN_INDEX=1, since it is built from every term at
+# startup. TOKEN_INDEX_NGRAM sets the n-gram length of the infix index.
+TOKEN_INDEX_ENABLED = os.environ.get("TOKEN_INDEX", "0" if SNAPSHOT_PATH else "1") == "1" and not SHARD_COUNT
+TOKEN_INDEX_NGRAM = int(os.environ.get("TOKEN_INDEX_NGRAM", "3"))
+
+def build_token_index(items):
+    return TokenIndex(items, ngram=TOKEN_INDEX_NGRAM)
+
+# Published by load_index (live_index, or static_index when read-only) and by
+# load_warm_index (static_index, until the full index replaces it)
+live_index = None
+static_index = None
+
+def load_index():
+    global live_index, static_index
+    if SNAPSHOT_PATH:
+        # Snapshots are read-only: a single generation that never changes. Worker processes
+        # mapping the same file share its pages, packed bit-parallel arrays included.
+        from src.snapshot import load_snapshot
+        mapped_trie = load_snapshot(SNAPSHOT_PATH)
+        symspell_index, _ = build_fuzzy_indexes(mapped_trie.terms)
+        token_index = build_token_index(mapped_trie.items()) if TOKEN_INDEX_ENABLED else None
+        static_index = IndexGeneration(0, mapped_trie, mapped_trie.terms, symspell_index, mapped_trie.bitparallel, token_index)
+    elif SHARD_COUNT:
+        # Each shard builds its own fuzzy indexes over its hash bucket
+        sharded_index = ShardedIndex(iter_corpus(DATA_PATH), SHARD_COUNT, SYMSPELL_MAX_DISTANCE, SHARD_TIMEOUT)
+        static_index = IndexGeneration(0, sharded_index, None, None, None)
+    else:
+        # Writes through /terms publish new generations; the deletion, bit-parallel and token
+        # indexes are rebuilt INDEX_REBUILD_DELAY seconds after a write. Until then the
+        # previous ones keep serving, and results no longer in the trie are dropped.
+        corpus_trie = load_corpus(Trie(), DATA_PATH)
+        live_index = LiveIndex(
+            corpus_trie,
+            corpus_trie,
+            build_secondary=build_fuzzy_indexes,
+            rebuild_delay=float(os.environ.get("INDEX_REBUILD_DELAY", "1.0")),
+            build_tokens=build_token_index if TOKEN_INDEX_ENABLED else None,
+            # Word lists are interned once and shared by every fuzzy engine
+            build_words=TermDictionary,
+        )
+
+# The index is loaded on a background thread (src/startup.py), so the server accepts
+# connections at once: /healthz answers while it loads and /readyz once it serves.
+# Searches answer 503 until then. SEARCH_WARM_DATA names a small corpus file, such as the
+# most popular terms, that is loaded first and served read-only, with the trie walk and
+# scan fuzzy engines, until the full index is published. INDEX_BACKGROUND=0 loads the full
+# index during import instead.
+WARM_DATA_PATH = os.environ.get("SEARCH_WARM_DATA")
+INDEX_BACKGROUND = os.environ.get("INDEX_BACKGROUND", "1") == "1"
+# Version of the warm generation; cache keys include it, so warm results never outlive it
+WARM_VERSION = -1
+
+def load_warm_index():
+    global static_index
+    warm_trie = load_corpus(Trie(), WARM_DATA_PATH)
+    static_index = IndexGeneration(WARM_VERSION, warm_trie, TermDictionary(warm_trie), None, None)
+    return True
+
+index_loader = IndexLoader(load_index, load_warm_index if WARM_DATA_PATH else None)
+index_loader.start(INDEX_BACKGROUND)
+
+def serving_index():
+    # The full index, the warm subset while it loads, or None before either is ready
+    return live_index.generation if live_index is not None else static_index
+
+def current_index() -> IndexGeneration:
+    index = serving_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Index is loading", headers={"Retry-After": "1"})
+    return index
+
+def symspell_supports(index: IndexGeneration, max_distance: int) -> bool:
+    return index.symspell is not None and max_distance <= index.symspell.max_distance
+
+# Shared result cache for both endpoints. QUERY_CACHE_SIZE=0 disables it; entries expire
+# after QUERY_CACHE_TTL seconds if set. Keys include the index version, so results from
+# before a write are never served after it; writes also clear the cache to free memory.
+query_cache = LRUCache(
+    maxsize=int(os.environ.get("QUERY_CACHE_SIZE", "1024")),
+    ttl=float(os.environ["QUERY_CACHE_TTL"]) if os.environ.get("QUERY_CACHE_TTL") else None,
+)
+
+# /autocomplete, /fuzzy and their batch versions write JSON bytes directly instead of
+# building response models (src/encoding.py); the documented schema stays the same.
+# Encoded results arrays are cached under the query cache key, up to FRAGMENT_CACHE_SIZE
+# of them (0 disables it). FAST_JSON=0 returns pydantic models instead.
+FAST_JSON = os.environ.get("FAST_JSON", "1") == "1"
+fragment_cache = FragmentCache(int(os.environ.get("FRAGMENT_CACHE_SIZE", "1024")))
+
+# Cache misses of /autocomplete and /fuzzy run in bounded pools instead of on the event
+# loop. Each pool admits OFFLOAD_MAX_PENDING queued or running searches and answers 503
+# beyond that. In snapshot mode, fuzzy engines that only need the mapped file run in
+# FUZZY_PROCESSES worker processes that map the same snapshot (default: one per CPU;
+# src.serve splits the CPUs between its workers); everything else runs in
+# OFFLOAD_THREADS threads per pool.
+OFFLOAD_THREADS = int(os.environ.get("OFFLOAD_THREADS", "4"))
+OFFLOAD_MAX_PENDING = int(os.environ.get("OFFLOAD_MAX_PENDING", "64"))
+FUZZY_PROCESSES = int(os.environ.get("FUZZY_PROCESSES", str(os.cpu_count() or 1))) if SNAPSHOT_PATH else 0
+PROCESS_ENGINES = {"trie", "scan", "bitparallel"}
+autocomplete_pool = BoundedPool(ThreadPoolExecutor(OFFLOAD_THREADS, thread_name_prefix="autocomplete"), OFFLOAD_MAX_PENDING)
+fuzzy_pool = BoundedPool(ThreadPoolExecutor(OFFLOAD_THREADS, thread_name_prefix="fuzzy"), OFFLOAD_MAX_PENDING)
+fuzzy_process_pool = None
+if FUZZY_PROCESSES > 0:
+    # Workers start on first use; spawn keeps them clear of the parent's threads
+    fuzzy_process_pool = BoundedPool(ProcessPoolExecutor(
+        FUZZY_PROCESSES,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_snapshot_worker,
+        initargs=(SNAPSHOT_PATH,),
+    ), OFFLOAD_MAX_PENDING)
+# Identical queries in flight at the same time are searched once
+single_flight = SingleFlight()
+
+# Popularity from served queries and POST /select, blended into both endpoints' ranking.
+# POPULARITY=0 disables it; sharded mode has no weight lookup for it and leaves it out.
+# Counts decay with POPULARITY_HALF_LIFE seconds and are applied every
+# POPULARITY_FLUSH_INTERVAL seconds. A selection counts POPULARITY_SELECTION_WEIGHT queries.
+POPULARITY_ENABLED = os.environ.get("POPULARITY", "1") == "1" and not SHARD_COUNT
+POPULARITY_SELECTION_WEIGHT = float(os.environ.get("POPULARITY_SELECTION_WEIGHT", "5"))
+# Token and infix candidates considered for popularity reordering
+POPULARITY_POOL = int(os.environ.get("POPULARITY_POOL", "100"))
+popularity = Popularity(
+    boost=float(os.environ.get("POPULARITY_BOOST", "1.0")) if POPULARITY_ENABLED else 0.0,
+    fuzzy_boost=float(os.environ.get("POPULARITY_FUZZY_BOOST", "0.02")) if POPULARITY_ENABLED else 0.0,
+    half_life=float(os.environ.get("POPULARITY_HALF_LIFE", "3600")),
+)
+
+def indexed_weight(term: str):
+    index = serving_index()
+    return index.trie.weight(term) if index is not None else None
+
+if POPULARITY_ENABLED:
+    popularity.start(indexed_weight, float(os.environ.get("POPULARITY_FLUSH_INTERVAL", "1.0")))
+
+# Prometheus metrics at /metrics: request counts and latency per route, search latency per
+# endpoint and algorithm, per-stage timings, result and candidate counts, and index gauges.
+# METRICS=0 removes the middleware and the per-stage timing. Index sizes walk the whole
+# trie, so they are recomputed at most every INDEX_BYTES_REFRESH seconds after a write.
+METRICS_ENABLED = os.environ.get("METRICS", "1") == "1"
+INDEX_BYTES_REFRESH = float(os.environ.get("INDEX_BYTES_REFRESH", "60"))
+metrics_registry = Registry()
+search_metrics = SearchMetrics(metrics_registry)
+
+# Opt-in profiling, all off by default. SLOW_QUERY_MS logs every request slower than that
+# many milliseconds to the "search.slow" logger with its parameters, candidate counts and
+# stage timings; SLOW_QUERY_SAMPLE keeps only that fraction of them and the newest
+# SLOW_QUERY_LOG_SIZE are listed at /debug/slow-queries. DEBUG_TRACE=1 answers requests
+# sent with an X-Search-Trace header with a Server-Timing header holding their trace, and
+# enables the sampling profiler at /debug/profile. Either keeps the tracing middleware
+# when METRICS=0; with all three off there is no middleware and no per-stage timing.
+SLOW_QUERY_MS = os.environ.get("SLOW_QUERY_MS")
+slow_query_log = SlowQueryLog(
+    float(SLOW_QUERY_MS),
+    int(os.environ.get("SLOW_QUERY_LOG_SIZE", "100")),
+    float(os.environ.get("SLOW_QUERY_SAMPLE", "1.0")),
+) if SLOW_QUERY_MS else None
+DEBUG_TRACE = os.environ.get("DEBUG_TRACE", "0") == "1"
+PROFILE_MAX_SECONDS = 60
+profile_lock = threading.Lock()
+TRACING_ENABLED = METRICS_ENABLED or slow_query_log is not None or DEBUG_TRACE
+if TRACING_ENABLED:
+    app.add_middleware(
+        MetricsMiddleware,
+        metrics=search_metrics if METRICS_ENABLED else None,
+        slow_log=slow_query_log,
+        trace_header=server_timing if DEBUG_TRACE else None,
+    )
+
+_index_bytes = {"version": None, "at": 0.0, "values": {}}
+
+def index_bytes():
+    # {(structure,): bytes} for the current generation, cached per version
+    index = serving_index()
+    if index is None:
+        return {}
+    now = time.monotonic()
+    if _index_bytes["version"] != index.version and (
+            _index_bytes["version"] is None or now - _index_bytes["at"] >= INDEX_BYTES_REFRESH):
+        values = {("trie",): index.trie.memory_usage()}
+        if hasattr(index.words, "memory_usage"):
+            values[("terms",)] = index.words.memory_usage()
+        if index.symspell is not None:
+            values[("symspell",)] = index.symspell.size_bytes
+        if index.bitparallel is not None:
+            matcher = index.bitparallel
+            values[("bitparallel",)] = matcher.order.nbytes + matcher.column_offsets.nbytes + matcher.codes.nbytes
+        if index.tokens is not None:
+            values[("tokens",)] = index.tokens.memory_usage()
+        _index_bytes.update(version=index.version, at=now, values=values)
+    return _index_bytes["values"]
+
+def _pools():
+    pools = {"autocomplete": autocomplete_pool, "fuzzy": fuzzy_pool}
+    if fuzzy_process_pool is not None:
+        pools["fuzzy_processes"] = fuzzy_process_pool
+    return pools
+
+metrics_registry.gauge("search_index_terms", "Terms in the index.",
+                       collect=lambda: {(): len(index.trie)} if (index := serving_index()) else {})
+metrics_registry.gauge("search_index_version", "Index generation; grows with every write.",
+                       collect=lambda: {(): index.version} if (index := serving_index()) else {})
+metrics_registry.gauge("search_index_bytes", "Approximate bytes held by each index structure.",
+                       ("structure",), collect=index_bytes)
+metrics_registry.gauge("search_cache_entries", "Entries in the query cache.",
+                       collect=lambda: {(): query_cache.stats()["size"]})
+metrics_registry.counter("search_cache_lookups_total", "Query cache lookups by result.", ("result",),
+                         collect=lambda: {("hit",): query_cache.hits, ("miss",): query_cache.misses})
+metrics_registry.gauge("search_offload_pending", "Searches queued or running in each pool.", ("pool",),
+                       collect=lambda: {(name,): pool.pending for name, pool in _pools().items()})
+metrics_registry.counter("search_offload_shed_total", "Searches rejected with 503 by each pool.", ("pool",),
+                         collect=lambda: {(name,): pool.shed for name, pool in _pools().items()})
+metrics_registry.counter("search_coalesced_total", "Searches answered by an identical one in flight.",
+                         collect=lambda: {(): single_flight.coalesced})
+
+def request_trace(request: Request):
+    # The middleware's Trace for this request, or None with metrics and profiling off
+    return getattr(request.state, "trace", None) if TRACING_ENABLED else None
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=503, content={"detail": f"Server busy: {exc}"}, headers={"Retry-After": "1"})
+
+@app.exception_handler(ShardTimeout)
+async def shard_timeout_handler(request: Request, exc: ShardTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+# Upper bound on queries per batch request
+MAX_BATCH_SIZE = 100
+
+class AutocompleteQuery(BaseModel):
+    prefix: str
+    limit: Optional[int] = Field(None, ge=1, le=1000, description="Maximum number of completions")
+    mode: str = Field("prefix", pattern="^(prefix|token|infix)$", description="Matching mode, as for /autocomplete")
+
+class AutocompleteBatchRequest(BaseModel):
+    queries: List[AutocompleteQuery] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class AutocompleteBatchResponse(BaseModel):
+    results: List[AutocompleteResponse]
+    execution_time_ms: float = Field(..., description="Execution time of the whole batch in milliseconds")
+
+class FuzzyQuery(BaseModel):
+    query: str
+    max_distance: int = Field(2, ge=1, le=5, description="Maximum allowed edit distance")
+    engine: str = Field("auto", pattern="^(auto|trie|scan|symspell|bitparallel)$", description="Fuzzy engine")
+
+class FuzzyBatchRequest(BaseModel):
+    queries: List[FuzzyQuery] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class FuzzyBatchResponse(BaseModel):
+    results: List[FuzzyResponse]
+    execution_time_ms: float = Field(..., description="Execution time of the whole batch in milliseconds")
+
+def autocomplete_searcher(index: IndexGeneration, mode: str):
+    # Returns ranked(prefix, limit) for the mode, or raises like resolve_engine. Token
+    # and infix candidates are widened to POPULARITY_POOL so popularity can reorder them.
+    if mode == "prefix":
+        return index.trie.ranked
+    if index.tokens is None:
+        if index.version == WARM_VERSION and TOKEN_INDEX_ENABLED:
+            # The full index will have one
+            raise HTTPException(status_code=503, detail=f"Mode '{mode}' is unavailable while the index loads",
+                                headers={"Retry-After": "1"})
+        raise HTTPException(status_code=400, detail=f"Token index unavailable for mode '{mode}'")
+    def ranked(prefix, limit, trace=None):
+        pool = max(limit, POPULARITY_POOL) if limit is not None and POPULARITY_ENABLED else limit
+        return drop_deleted(index, index.tokens.ranked(prefix, pool, mode, trace), 1)
+    return ranked
+
+def rank_autocomplete(entries, prefix: str, limit: Optional[int], mode: str):
+    # Cached (-weight, word) entries become the response, with popularity blended in
+    if POPULARITY_ENABLED:
+        popularity.record(prefix)
+    return popularity.rank(entries, limit, prefix if mode == "prefix" else None)
+
+def autocomplete_cache_key(index: IndexGeneration, prefix: str, limit: Optional[int], mode: str):
+    # Trie lookups are case-sensitive, so the prefix is used as-is
+    return ("autocomplete", index.version, prefix, limit, mode)
+
+async def run_autocomplete(index: IndexGeneration, prefix: str, limit: Optional[int], mode: str = "prefix"):
+    # Returns (entries, cache_used), searching in the pool like /autocomplete
+    searcher = autocomplete_searcher(index, mode)
+    cache_key = autocomplete_cache_key(index, prefix, limit, mode)
+    cache_used, entries = query_cache.get(cache_key)
+    if cache_used:
+        return entries, True
+    if mode == "prefix" and limit is not None and limit <= getattr(index.trie, "top_k", 0):
+        entries = index.trie.ranked(prefix, limit)
+        query_cache.put(cache_key, entries)
+        return entries, False
+    async def search():
+        found = await autocomplete_pool.run(searcher, prefix, limit)
+        query_cache.put(cache_key, found)
+        return found
+    entries, _ = await single_flight.do(cache_key, search)
+    return entries, False
+
+async def run_batch(calls):
+    # Awaits every call, at most OFFLOAD_THREADS at a time, so one batch cannot fill a
+    # pool's pending slots by itself; Overloaded from any call fails the batch with 503
+    slots = asyncio.Semaphore(OFFLOAD_THREADS)
+    async def bounded(call):
+        async with slots:
+            return await call()
+    return await asyncio.gather(*(bounded(call) for call in calls))
+
+def resolve_engine(index: IndexGeneration, engine: str, max_distance: int) -> str:
+    if SHARD_COUNT and index.version != WARM_VERSION:
+        # Shards pick their own engine per query
+        if engine != "auto":
+            raise HTTPException(status_code=400, detail="Only the 'auto' engine is available on a sharded index")
+        return "sharded"
+    if engine == "auto":
+        if symspell_supports(index, max_distance):
+            return "symspell"
+        return "bitparallel" if index.bitparallel is not None else "trie"
+    if index.version == WARM_VERSION and engine in ("symspell", "bitparallel"):
+        raise HTTPException(status_code=503, detail="Only the trie and scan engines are available while the index loads",
+                            headers={"Retry-After": "1"})
+    # A stale generation keeps its last built indexes, so these are never missing because
+    # of a pending rebuild
+    if engine == "symspell" and not symspell_supports(index, max_distance):
+        raise HTTPException(status_code=400, detail="Symmetric delete index unavailable for this max_distance")
+    if engine == "bitparallel" and index.bitparallel is None:
+        detail = "Snapshot has no bit-parallel arrays" if SNAPSHOT_PATH else "Bit-parallel engine requires numpy"
+        raise HTTPException(status_code=400, detail=detail)
+    return engine
+
+async def offload(trace, pool, fn, *args):
+    # Runs fn in the pool; the wait for a worker is traced as the "queue" stage
+    if trace is None:
+        return await pool.run(fn, *args)
+    start = time.perf_counter()
+    traced = sum(trace.stages.values())
+    result = await pool.run(fn, *args, trace)
+    trace.add("queue", time.perf_counter() - start - (sum(trace.stages.values()) - traced))
+    return result
+
+async def run_fuzzy(index: IndexGeneration, query: str, max_distance: int, engine: str, cache_key, trace=None):
+    # Engines return a list of tuples: (word, score)
+    if fuzzy_process_pool is not None and engine in PROCESS_ENGINES:
+        # Stages inside worker processes are not traced; their whole round trip is
+        start = time.perf_counter()
+        fuzzy_results = await fuzzy_process_pool.run(snapshot_fuzzy, engine, query, max_distance)
+        if trace is not None:
+            trace.add("search", time.perf_counter() - start)
+    else:
+        fuzzy_results = await offload(trace, fuzzy_pool, FUZZY_ENGINES[engine][1], index, query, max_distance)
+    query_cache.put(cache_key, fuzzy_results)
+    return fuzzy_results
 
-# Initialize trie with demo data
-trie = Trie()
-demo_words = load_demo_data("./data/demo_data.json")
-populate_trie(trie, demo_words)
+def fuzzy_cache_key(index: IndexGeneration, query: str, max_distance: int, engine: str):
+    # Engines match and score the folded query, so queries differing only in case share an entry
+    return ("fuzzy", index.version, fold(query), max_distance, engine)
+
+def rank_fuzzy(query, fuzzy_results, trace=None):
+    # Results are cached by similarity alone; popularity reorders them per response
+    start = time.perf_counter()
+    if POPULARITY_ENABLED:
+        popularity.record(query)
+    fuzzy_results = popularity.rank_fuzzy(fuzzy_results)
+    if trace is not None:
+        trace.add("rank", time.perf_counter() - start)
+        trace.finish(len(fuzzy_results))
+    return fuzzy_results
+
+def json_response(body: bytes):
+    return Response(content=body, media_type="application/json")
+
+def encode_fuzzy_response(query, fuzzy_results, execution_time, engine, cache_used, cache_key, trace=None):
+    # The same body as to_fuzzy_response, written directly
+    fuzzy_results = rank_fuzzy(query, fuzzy_results, trace)
+    fragment = fragment_cache.encode(cache_key, fuzzy_results, encode_matches)
+    return encode_response(query, fragment, round(execution_time, 2), FUZZY_ENGINES[engine][0], cache_used)
+
+def to_fuzzy_response(query, fuzzy_results, execution_time, engine, cache_used, trace=None):
+    fuzzy_results = rank_fuzzy(query, fuzzy_results, trace)
+    matches = [FuzzyMatch(term=term, score=round(score, 2)) for term, score in fuzzy_results]
+    return FuzzyResponse(
+        query=query,
+        results=matches,
+        execution_time_ms=round(execution_time, 2),
+        algorithm=FUZZY_ENGINES[engine][0],
+        cache_used=cache_used
+    )
 
 @app.get("/autocomplete", response_model=AutocompleteResponse, summary="Advanced Autocomplete Search")
-def autocomplete(
+async def autocomplete(
+    request: Request,
     prefix: str = Query(
         ...,
         example="co",
         description="A realistic prefix, e.g., 'co' might match 'commit', 'code review', etc."
+    ),
+    limit: Optional[int] = Query(
+        None,
+        example=5,
+        ge=1,
+        le=1000,
+        description="Maximum number of completions, best-weighted first. Omit to return all."
+    ),
+    mode: str = Query(
+        "prefix",
+        pattern="^(prefix|token|infix)$",
+        description=(
+            "'prefix' matches the start of the whole term (case-sensitive), 'token' the start "
+            "of any word in it, so 'rev' finds 'code review', and 'infix' any substring. "
+            "Token and infix matching ignore case."
+        )
     )
 ):
-    start_time = time.time()
-    results = trie.search(prefix)
+    start_time = time.perf_counter()
+    trace = request_trace(request)
+    index = current_index()
+    searcher = autocomplete_searcher(index, mode)
+    cache_key = autocomplete_cache_key(index, prefix, limit, mode)
+    cache_used, entries = query_cache.get(cache_key)
+    if trace is not None:
+        trace.endpoint = "autocomplete"
+        trace.algorithm = mode if mode != "prefix" else "sharded" if SHARD_COUNT else "trie"
+        trace.cache_used = cache_used
+        trace.add("cache", time.perf_counter() - start_time)
+    if not cache_used:
+        if mode == "prefix" and limit is not None and limit <= getattr(index.trie, "top_k", 0):
+            # A slice of a cached top list; cheaper than a trip to the pool
+            entries = index.trie.ranked(prefix, limit, trace)
+            query_cache.put(cache_key, entries)
+        else:
+            async def search():
+                found = await offload(trace, autocomplete_pool, searcher, prefix, limit)
+                query_cache.put(cache_key, found)
+                return found
+            entries, shared = await single_flight.do(cache_key, search)
+            if shared and trace is not None:
+                trace.count("coalesced", 1)
+    ranked_at = time.perf_counter()
+    results = rank_autocomplete(entries, prefix, limit, mode)
+    if trace is not None:
+        trace.add("rank", time.perf_counter() - ranked_at)
+        trace.finish(len(results))
     if not results:
         raise HTTPException(status_code=404, detail="No matches found")
-    execution_time = (time.time() - start_time) * 1000  # Convert to ms
+    execution_time = (time.perf_counter() - start_time) * 1000  # Convert to ms
+    if FAST_JSON:
+        fragment = fragment_cache.encode(cache_key, results, encode_terms)
+        return json_response(encode_response(prefix, fragment, round(execution_time, 2), AUTOCOMPLETE_ALGORITHMS[mode], cache_used))
     return AutocompleteResponse(
         query=prefix,
         results=results,
-        execution_time_ms=round(execution_time, 2)
+        execution_time_ms=round(execution_time, 2),
+        algorithm=AUTOCOMPLETE_ALGORITHMS[mode],
+        cache_used=cache_used
     )
 
 @app.get("/fuzzy", response_model=FuzzyResponse, summary="Advanced Fuzzy Search")
-def fuzzy(
+async def fuzzy(
+    request: Request,
     query: str = Query(
         ...,
         example="cod revie",
@@ -73,20 +595,307 @@ def fuzzy(
         ge=1,
         le=5,
         description="Maximum allowed edit distance for fuzzy matching."
+    ),
+    engine: str = Query(
+        "auto",
+        pattern="^(auto|trie|scan|symspell|bitparallel)$",
+        description=(
+            "Fuzzy engine: 'trie' walks the trie with pruning, 'scan' compares every term, "
+            "'symspell' uses the precomputed deletion index, 'bitparallel' compares all terms "
+            "at once with NumPy, 'auto' picks for you."
+        )
     )
 ):
-    start_time = time.time()
-    # Assume fuzzy_search returns a list of tuples: (word, score)
-    fuzzy_results = fuzzy_search(query, max_distance, demo_words)
+    start_time = time.perf_counter()
+    trace = request_trace(request)
+    index = current_index()
+    engine = resolve_engine(index, engine, max_distance)
+    cache_key = fuzzy_cache_key(index, query, max_distance, engine)
+    cache_used, fuzzy_results = query_cache.get(cache_key)
+    if trace is not None:
+        trace.endpoint = "fuzzy"
+        trace.algorithm = engine
+        trace.cache_used = cache_used
+        trace.add("cache", time.perf_counter() - start_time)
+    if not cache_used:
+        fuzzy_results, shared = await single_flight.do(
+            cache_key, lambda: run_fuzzy(index, query, max_distance, engine, cache_key, trace))
+        if shared and trace is not None:
+            trace.count("coalesced", 1)
     if not fuzzy_results:
+        if trace is not None:
+            trace.finish(0)
         raise HTTPException(status_code=404, detail="No near matches found")
-    execution_time = (time.time() - start_time) * 1000
-    matches = [FuzzyMatch(term=term, score=round(score, 2)) for term, score in fuzzy_results]
-    return FuzzyResponse(
-        query=query,
-        results=matches,
-        execution_time_ms=round(execution_time, 2)
-    )
+    execution_time = (time.perf_counter() - start_time) * 1000
+    if FAST_JSON:
+        return json_response(encode_fuzzy_response(query, fuzzy_results, execution_time, engine, cache_used, cache_key, trace))
+    return to_fuzzy_response(query, fuzzy_results, execution_time, engine, cache_used, trace)
+
+@app.post("/autocomplete/batch", response_model=AutocompleteBatchResponse, summary="Batch Autocomplete Search")
+async def autocomplete_batch(request: Request, batch: AutocompleteBatchRequest):
+    """
+    Run many autocomplete queries in one request. Results come back in request order with
+    the same metadata as /autocomplete; a query without matches gets an empty result list
+    instead of a 404. Repeated queries are answered once, and searches go through the same
+    pool as /autocomplete, so a busy server answers the batch with 503.
+    """
+    batch_start = time.perf_counter()
+    trace = request_trace(request)
+    index = current_index()
+    keys = list(dict.fromkeys((item.prefix, item.limit, item.mode) for item in batch.queries))
+    for _, _, mode in keys:
+        # Reject an unavailable mode before any search starts
+        autocomplete_searcher(index, mode)
+    answered = {}
+
+    async def answer(key):
+        start_time = time.perf_counter()
+        entries, cache_used = await run_autocomplete(index, *key)
+        answered[key] = (entries, cache_used, (time.perf_counter() - start_time) * 1000)
+
+    searched_at = time.perf_counter()
+    await run_batch([lambda key=key: answer(key) for key in keys])
+    if trace is not None:
+        trace.endpoint = "autocomplete_batch"
+        trace.algorithm = "batch"
+        trace.cache_used = all(cache_used for _, cache_used, _ in answered.values())
+        trace.add("search", time.perf_counter() - searched_at)
+        trace.count("queries", len(keys))
+    ranked_at = time.perf_counter()
+    responses = []
+    total = 0
+    for item in batch.queries:
+        key = (item.prefix, item.limit, item.mode)
+        entries, cache_used, execution_time = answered[key]
+        results = rank_autocomplete(entries, item.prefix, item.limit, item.mode)
+        total += len(results)
+        if FAST_JSON:
+            fragment = fragment_cache.encode(autocomplete_cache_key(index, *key), results, encode_terms)
+            responses.append(encode_response(item.prefix, fragment, round(execution_time, 2),
+                                             AUTOCOMPLETE_ALGORITHMS[item.mode], cache_used))
+            continue
+        responses.append(AutocompleteResponse(
+            query=item.prefix,
+            results=results,
+            execution_time_ms=round(execution_time, 2),
+            algorithm=AUTOCOMPLETE_ALGORITHMS[item.mode],
+            cache_used=cache_used
+        ))
+    if trace is not None:
+        trace.add("rank", time.perf_counter() - ranked_at)
+        trace.finish(total)
+    execution_time = round((time.perf_counter() - batch_start) * 1000, 2)
+    if FAST_JSON:
+        return json_response(encode_batch(responses, execution_time))
+    return AutocompleteBatchResponse(results=responses, execution_time_ms=execution_time)
+
+@app.post("/fuzzy/batch", response_model=FuzzyBatchResponse, summary="Batch Fuzzy Search")
+async def fuzzy_batch(request: Request, batch: FuzzyBatchRequest):
+    """
+    Run many fuzzy queries in one request. Results come back in request order with the same
+    metadata as /fuzzy; a query without matches gets an empty result list instead of a 404.
+    Repeated queries are answered once, and bit-parallel queries that miss the cache share
+    one pass over the corpus per query length. Searches go through the same pools as /fuzzy,
+    so a busy server answers the batch with 503.
+    """
+    batch_start = time.perf_counter()
+    trace = request_trace(request)
+    index = current_index()
+    engines = [resolve_engine(index, item.engine, item.max_distance) for item in batch.queries]
+    answered = {}
+    pending = {}
+    misses = {}
+    for item, engine in zip(batch.queries, engines):
+        key = fuzzy_cache_key(index, item.query, item.max_distance, engine)
+        if key in answered or key in pending or key in misses:
+            continue
+        start_time = time.perf_counter()
+        cache_used, fuzzy_results = query_cache.get(key)
+        if cache_used:
+            answered[key] = (fuzzy_results, True, (time.perf_counter() - start_time) * 1000)
+        elif engine == "bitparallel":
+            pending[key] = item
+        else:
+            misses[key] = (item, engine)
+    if trace is not None:
+        trace.endpoint = "fuzzy_batch"
+        trace.algorithm = "batch"
+        trace.cache_used = not pending and not misses
+        trace.add("cache", time.perf_counter() - batch_start)
+        trace.count("queries", len(answered) + len(pending) + len(misses))
+
+    async def answer(key, item, engine):
+        start_time = time.perf_counter()
+        fuzzy_results, _ = await single_flight.do(
+            key, lambda: run_fuzzy(index, item.query, item.max_distance, engine, key))
+        answered[key] = (fuzzy_results, False, (time.perf_counter() - start_time) * 1000)
+
+    async def answer_grouped():
+        # Each grouped query reports the time of the shared pass that answered it
+        start_time = time.perf_counter()
+        grouped = await fuzzy_pool.run(index.bitparallel.search_many,
+                                       [(item.query, item.max_distance) for item in pending.values()])
+        execution_time = (time.perf_counter() - start_time) * 1000
+        for key, fuzzy_results in zip(pending, grouped):
+            fuzzy_results = drop_deleted(index, fuzzy_results)
+            query_cache.put(key, fuzzy_results)
+            answered[key] = (fuzzy_results, False, execution_time)
+
+    calls = [lambda key=key, item=item, engine=engine: answer(key, item, engine)
+             for key, (item, engine) in misses.items()]
+    if pending:
+        calls.append(answer_grouped)
+    searched_at = time.perf_counter()
+    await run_batch(calls)
+    if trace is not None:
+        trace.add("search", time.perf_counter() - searched_at)
+    ranked_at = time.perf_counter()
+    responses = []
+    total = 0
+    for item, engine in zip(batch.queries, engines):
+        key = fuzzy_cache_key(index, item.query, item.max_distance, engine)
+        fuzzy_results, cache_used, execution_time = answered[key]
+        total += len(fuzzy_results)
+        if FAST_JSON:
+            responses.append(encode_fuzzy_response(item.query, fuzzy_results, execution_time, engine, cache_used, key))
+        else:
+            responses.append(to_fuzzy_response(item.query, fuzzy_results, execution_time, engine, cache_used))
+    if trace is not None:
+        trace.add("rank", time.perf_counter() - ranked_at)
+        trace.finish(total)
+    execution_time = round((time.perf_counter() - batch_start) * 1000, 2)
+    if FAST_JSON:
+        return json_response(encode_batch(responses, execution_time))
+    return FuzzyBatchResponse(results=responses, execution_time_ms=execution_time)
+
+class TermRequest(BaseModel):
+    term: str = Field(..., min_length=1, description="Term to add; normalized like corpus terms")
+    weight: float = Field(0.0, description="Ranking weight for autocomplete")
+
+class TermResponse(BaseModel):
+    term: str
+    created: bool = Field(False, description="Was the term new to the index?")
+    deleted: bool = Field(False, description="Was the term removed from the index?")
+    version: int = Field(..., description="Index version after the change")
+
+def writable_index() -> LiveIndex:
+    if index_loader.state != "ready":
+        raise HTTPException(status_code=503, detail="Index is loading", headers={"Retry-After": "1"})
+    if live_index is None:
+        mode = "sharded" if SHARD_COUNT else "serving a snapshot"
+        raise HTTPException(status_code=409, detail=f"Index is read-only while {mode}")
+    return live_index
+
+@app.post("/terms", response_model=TermResponse, summary="Add or Re-weight a Term")
+def add_term(request: TermRequest):
+    index = writable_index()
+    term = normalize_term(request.term)
+    if not term:
+        raise HTTPException(status_code=422, detail="Term is empty after normalization")
+    created = index.add(term, request.weight)
+    query_cache.clear()
+    fragment_cache.clear()
+    return TermResponse(term=term, created=created, version=index.generation.version)
+
+@app.delete("/terms/{term:path}", response_model=TermResponse, summary="Delete a Term")
+def delete_term(term: str):
+    index = writable_index()
+    term = normalize_term(term)
+    if not index.remove(term):
+        raise HTTPException(status_code=404, detail="Term not found")
+    query_cache.clear()
+    fragment_cache.clear()
+    popularity.forget(term)
+    return TermResponse(term=term, deleted=True, version=index.generation.version)
+
+class SelectRequest(BaseModel):
+    term: str = Field(..., min_length=1, description="Term the user picked from the results")
+
+@app.post("/select", status_code=204, summary="Record a Selected Result")
+def select(request: SelectRequest):
+    """
+    Report that a user picked a term from autocomplete or fuzzy results. Selections count
+    more than queries towards the term's popularity; terms not in the index are ignored.
+    """
+    if POPULARITY_ENABLED:
+        popularity.record(normalize_term(request.term), POPULARITY_SELECTION_WEIGHT)
+    return Response(status_code=204)
+
+@app.get("/healthz", summary="Liveness Probe")
+def healthz():
+    """The process is up. Answers while the index loads; 500 if loading it failed."""
+    if index_loader.state == "failed":
+        return JSONResponse(status_code=500, content={"status": "failed", "error": index_loader.error})
+    return {"status": "ok"}
+
+@app.get("/readyz", summary="Readiness Probe")
+def readyz(
+    full: bool = Query(False, description="Only report ready once the full index serves, not the warm subset")
+):
+    """
+    Whether searches can be served: 200 once the full index or the warm subset serves,
+    503 while nothing is loaded yet or loading failed. The body reports the loader state.
+    """
+    ready = index_loader.state == "ready" or (index_loader.serving and not full)
+    index = serving_index()
+    content = {**index_loader.stats(), "terms": len(index.trie) if index is not None else 0}
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
+@app.get("/metrics", response_class=PlainTextResponse, summary="Prometheus Metrics")
+def metrics():
+    """Request, search and index metrics in the Prometheus text exposition format."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/debug/slow-queries", include_in_schema=False)
+def slow_queries():
+    """The most recent slow requests, oldest first, with their traces."""
+    if slow_query_log is None:
+        raise HTTPException(status_code=404, detail="The slow-query log is disabled")
+    return {**slow_query_log.stats(), "entries": slow_query_log.entries()}
+
+@app.get("/debug/profile", include_in_schema=False)
+async def profile(
+    seconds: float = Query(5.0, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+):
+    """
+    Sample the stacks of all server threads for `seconds` while requests keep being served,
+    and return where search code spent its time (collapsed stacks and per-function counts).
+    """
+    if not DEBUG_TRACE:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        return await asyncio.to_thread(SamplingProfiler(interval_ms / 1000).run, seconds)
+    finally:
+        profile_lock.release()
+
+@app.get("/stats", summary="Index Statistics")
+def stats():
+    index = current_index()
+    return {
+        "terms": len(index.trie),
+        "version": index.version,
+        "stale": index.stale,
+        "writes": live_index.writes if live_index is not None else 0,
+        "startup": index_loader.stats(),
+        "trie_bytes_per_term": round(index.trie.bytes_per_term(), 1),
+        "symspell": index.symspell.stats() if index.symspell is not None else None,
+        "token_index": index.tokens.stats() if index.tokens is not None else None,
+        "popularity": popularity.stats() if POPULARITY_ENABLED else None,
+        "slow_queries": slow_query_log.stats() if slow_query_log is not None else None,
+        "cache": query_cache.stats(),
+        "fragments": fragment_cache.stats() if FAST_JSON else None,
+        "offload": {
+            "autocomplete": autocomplete_pool.stats(),
+            "fuzzy": fuzzy_pool.stats(),
+            "fuzzy_processes": fuzzy_process_pool.stats() if fuzzy_process_pool is not None else None,
+            "coalesced": single_flight.coalesced,
+        },
+    }
 
 # Professional, modern landing page using semantic HTML and lightweight design.
 @app.get("/", response_class=HTMLResponse)
@@ -317,4 +1126,6 @@ def root():
     """
 
 if __name__ == "__main__":
+    # Imported here to keep it off the import path
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
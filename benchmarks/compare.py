@@ -0,0 +1,69 @@
+"""
+Benchmark Comparison
+
+This module compares two result files written by benchmarks.run. Results are matched by
+benchmark, corpus size and parameters, and the headline values (lower is better) are
+compared as a ratio. Any result that got slower or bigger by more than the threshold is
+a regression, and the exit status is 1 if there is one, so the comparison can gate CI.
+Results present in only one file are listed but never fail the comparison.
+
+Functions:
+    compare(baseline, current, threshold): Returns one row per matched result.
+
+Usage:
+    python -m benchmarks.compare baseline.json current.json --threshold 0.2
+"""
+
+import argparse
+import json
+import sys
+
+
+def _key(result):
+    return result["benchmark"], result["size"], tuple(sorted(result["params"].items()))
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Return (key, baseline value, current value, ratio, regressed) rows for the results
+    in both reports, plus the keys found in only one of them.
+    """
+    before = {_key(result): result["value"] for result in baseline["results"]}
+    after = {_key(result): result["value"] for result in current["results"]}
+    rows = []
+    for key, value in after.items():
+        if key in before:
+            old = before[key]
+            ratio = value / old if old else (1.0 if not value else float("inf"))
+            rows.append((key, old, value, ratio, ratio > 1 + threshold))
+    unmatched = sorted((set(before) ^ set(after)), key=str)
+    return rows, unmatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline", help="Results of the reference run")
+    parser.add_argument("current", help="Results of the run to check")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative increase before a result counts as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows, unmatched = compare(baseline, current, args.threshold)
+    for (benchmark, size, params), old, new, ratio, regressed in rows:
+        label = " ".join(f"{key}={value}" for key, value in params)
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{benchmark:<14} {size:>9} {label:<28} {old:>12.2f} -> {new:>12.2f}  {ratio:6.2f}x{flag}")
+    for benchmark, size, params in unmatched:
+        label = " ".join(f"{key}={value}" for key, value in params)
+        print(f"{benchmark:<14} {size:>9} {label:<28} only in one file")
+    regressions = sum(1 for row in rows if row[4])
+    print(f"{regressions} regression(s) over {args.threshold:.0%} in {len(rows)} compared results")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Synthetic Corpus Generator
+
+This module generates corpora shaped like data/demo_data.json: short terms of one to three
+words ("code review", "CI/CD", "test-driven development"), with a few capitalized words
+and acronyms, weighted by a heavy-tailed popularity. Words are drawn from a pronounceable
+vocabulary with Zipf-distributed frequencies, so common words start many terms and
+prefixes have realistic fan-out. The vocabulary grows with the square root of the corpus,
+which keeps duplicates rare from 10^3 up to 10^7 terms; on large corpora one-word terms
+are capped by the vocabulary, so most terms have two or three words.
+
+Everything comes from one seeded random.Random, so a size and a seed always give the
+same terms in the same order, on any machine.
+
+Functions:
+    generate_corpus(size, seed): Returns size distinct (term, weight) pairs.
+    write_corpus(path, size, seed, sort): Writes a corpus as tab-separated text lines.
+
+Usage:
+    python -m benchmarks.corpus 100000 /tmp/corpus.txt
+"""
+
+import argparse
+import bisect
+import itertools
+import math
+import random
+
+_ONSETS = ["", "b", "c", "d", "f", "g", "h", "k", "l", "m", "n", "p", "r", "s", "t", "v", "w",
+           "br", "cl", "cr", "dr", "fl", "gr", "pl", "pr", "sc", "sh", "sp", "st", "str", "th", "tr"]
+_VOWELS = ["a", "e", "i", "o", "u", "ai", "ea", "io", "ou"]
+_CODAS = ["", "", "", "n", "r", "s", "t", "l", "m", "ck", "nd", "nt", "st", "x"]
+_SEPARATORS = " " * 16 + "-/"
+# Cumulative share of one-, two- and three-word terms
+_SHAPES = (0.25, 0.8, 1.0)
+
+
+def _vocabulary(rng, count):
+    words = set()
+    vocabulary = []
+    while len(vocabulary) < count:
+        syllables = rng.choice((1, 2, 2, 2, 3))
+        word = "".join(rng.choice(_ONSETS) + rng.choice(_VOWELS) for _ in range(syllables))
+        word += rng.choice(_CODAS)
+        if len(word) > 1 and word not in words:
+            words.add(word)
+            vocabulary.append(word)
+    return vocabulary
+
+
+def generate_corpus(size, seed=0):
+    """
+    Return `size` distinct (term, weight) pairs in generation order. Weights are Pareto
+    distributed, rounded to two decimals, so a few terms are far more popular than most.
+    """
+    rng = random.Random(seed)
+    random_ = rng.random
+    vocabulary = _vocabulary(rng, max(500, int(16 * math.sqrt(size))))
+    # Zipf-like: the i-th word is drawn with probability proportional to 1 / (i + 1) ** 0.8
+    cum_weights = list(itertools.accumulate(1.0 / (i + 1) ** 0.8 for i in range(len(vocabulary))))
+    total = cum_weights[-1]
+    seen = set()
+    corpus = []
+    while len(corpus) < size:
+        roll = random_()
+        count = 1 if roll < _SHAPES[0] else 2 if roll < _SHAPES[1] else 3
+        term = ""
+        for i in range(count):
+            word = vocabulary[bisect.bisect(cum_weights, random_() * total)]
+            # Mostly lowercase, with the odd Capitalized word or short ACRONYM
+            style = random_()
+            if style < 0.08:
+                word = word.upper() if style < 0.03 and len(word) <= 4 else word.capitalize()
+            term = word if i == 0 else term + _SEPARATORS[int(random_() * len(_SEPARATORS))] + word
+        if term in seen:
+            continue
+        seen.add(term)
+        corpus.append((term, round(rng.paretovariate(1.2), 2)))
+    return corpus
+
+
+def write_corpus(path, size, seed=0, sort=True):
+    # Tab-separated term and weight per line, the .txt format src.init_data.iter_corpus reads.
+    # Sorted output lets load_corpus bulk-build the trie.
+    corpus = generate_corpus(size, seed)
+    if sort:
+        corpus.sort()
+    with open(path, "w", encoding="utf-8") as f:
+        for term, weight in corpus:
+            f.write(f"{term}\t{weight}\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic corpus.")
+    parser.add_argument("size", type=lambda value: int(float(value)), help="Number of terms, e.g. 1e6")
+    parser.add_argument("output", help="Text file to write (term<TAB>weight per line)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--unsorted", action="store_true", help="Keep generation order")
+    args = parser.parse_args()
+    write_corpus(args.output, args.size, args.seed, sort=not args.unsorted)
+    print(f"Wrote {args.size} terms to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
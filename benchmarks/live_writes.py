@@ -0,0 +1,159 @@
+"""
+Mixed Read/Write Benchmark for the Live Index
+
+This module measures what writes through LiveIndex cost and what they do to readers. On a
+synthetic corpus it times:
+    write.add       mean microseconds per LiveIndex.add of a new term, one writer alone
+    write.remove    mean microseconds per LiveIndex.remove of those terms, one writer alone
+    read.idle       median microseconds per top-k lookup, reader threads with no writer
+    read.mixed      the same while one writer adds and removes terms
+    write.mixed     mean microseconds per write while the readers run
+
+Reader records carry p99 and p999 latencies next to the median; write records carry the
+write rate. Readers fetch the current generation and run trie.search(prefix, limit) with
+prefixes cut from corpus terms, the way /autocomplete answers a limited query. Secondary
+indexes are rebuilt in the background as in the API, every rebuild_delay seconds during
+writes, with the default word tuple only, so the numbers isolate the trie and the
+generation swaps. Records use the format of benchmarks.run, so benchmarks.compare reads
+these reports too.
+
+Usage:
+    python -m benchmarks.live_writes --size 100000 --writes 20000 --readers 4
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import threading
+import time
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.run import _git_commit, _record
+from src.live_index import LiveIndex
+from src.trie import Trie
+
+
+def _latencies(samples):
+    samples.sort()
+    last = len(samples) - 1
+    return {
+        "value": statistics.median(samples),
+        "p99": samples[min(last, int(len(samples) * 0.99))],
+        "p999": samples[min(last, int(len(samples) * 0.999))],
+        "calls": len(samples),
+    }
+
+
+def _write_record(benchmark, size, elapsed, count, params):
+    return _record(benchmark, size, "us", elapsed / count * 1e6, params, calls=count,
+                   writes_per_second=count / elapsed)
+
+
+def _read_while(index, prefixes, limit, readers, busy):
+    # Runs reader threads until busy() returns; returns every lookup latency in microseconds
+    samples = [[] for _ in range(readers)]
+    stop = threading.Event()
+
+    def reader(timings, offset):
+        # At least one lookup per reader, even if busy() finishes first
+        position = offset
+        while True:
+            prefix = prefixes[position % len(prefixes)]
+            position += 1
+            start = time.perf_counter()
+            index.generation.trie.search(prefix, limit)
+            timings.append((time.perf_counter() - start) * 1e6)
+            if stop.is_set():
+                return
+
+    threads = [threading.Thread(target=reader, args=(timings, offset * 97)) for offset, timings in enumerate(samples)]
+    for thread in threads:
+        thread.start()
+    try:
+        busy()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return [sample for timings in samples for sample in timings]
+
+
+def run(size=100_000, writes=20_000, readers=4, limit=10, read_seconds=1.0, rebuild_delay=1.0, seed=0):
+    corpus = generate_corpus(size, seed)
+    trie = Trie()
+    for term, weight in corpus:
+        trie.insert(term, weight)
+    index = LiveIndex(trie, [term for term, _ in corpus], rebuild_delay=rebuild_delay)
+    rng = random.Random(seed)
+    prefixes = [term[:rng.randint(1, 4)] for term, _ in rng.sample(corpus, min(1000, size))]
+    new_terms = [f"{term} ~{i}" for i, (term, _) in enumerate(rng.choices(corpus, k=writes))]
+    params = {"readers": readers, "limit": limit}
+    results = []
+
+    start = time.perf_counter()
+    for term in new_terms:
+        index.add(term, 1.0)
+    results.append(_write_record("write.add", size, time.perf_counter() - start, writes, {}))
+    start = time.perf_counter()
+    for term in new_terms:
+        index.remove(term)
+    results.append(_write_record("write.remove", size, time.perf_counter() - start, writes, {}))
+
+    idle = _read_while(index, prefixes, limit, readers, lambda: time.sleep(read_seconds))
+    results.append(_record("read.idle", size, "us", params=params, **_latencies(idle)))
+
+    elapsed = []
+
+    def write_mix():
+        # Alternate adds and removes so the corpus size stays put
+        start = time.perf_counter()
+        for term in new_terms:
+            index.add(term, 1.0)
+            index.remove(term)
+        elapsed.append(time.perf_counter() - start)
+
+    mixed = _read_while(index, prefixes, limit, readers, write_mix)
+    results.append(_record("read.mixed", size, "us", params=params, **_latencies(mixed)))
+    results.append(_write_record("write.mixed", size, elapsed[0], 2 * writes, params))
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "writes": writes,
+            "rebuild_delay": rebuild_delay,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time live index writes and reader latency under writes.")
+    parser.add_argument("--size", type=int, default=100_000, help="Corpus size")
+    parser.add_argument("--writes", type=int, default=20_000, help="Terms added and removed per scenario")
+    parser.add_argument("--readers", type=int, default=4, help="Reader threads")
+    parser.add_argument("--limit", type=int, default=10, help="Autocomplete result limit")
+    parser.add_argument("--read-seconds", type=float, default=1.0, help="Length of the reads-only scenario")
+    parser.add_argument("--rebuild-delay", type=float, default=1.0, help="Seconds between secondary index rebuilds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmarks/live_writes.json", help="JSON file to write")
+    args = parser.parse_args()
+
+    report = run(args.size, args.writes, args.readers, args.limit, args.read_seconds, args.rebuild_delay, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for result in report["results"]:
+        if "writes_per_second" in result:
+            detail = f"{result['writes_per_second']:>10.0f} writes/s"
+        else:
+            detail = f"p99 {result['p99']:.1f} us  p99.9 {result['p999']:.1f} us"
+        print(f"{result['benchmark']:<13} {result['value']:>10.2f} us  {detail}")
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Traffic Replay Load Tool
+
+This module replays a query log against the API and reports throughput, latency
+percentiles and error rates per endpoint. The log is JSON lines, one request per line:
+
+    {"path": "/autocomplete", "params": {"prefix": "co", "limit": 5}}
+    {"path": "/fuzzy", "params": {"query": "comit", "max_distance": 1}, "t": 0.25}
+    {"method": "POST", "path": "/autocomplete/batch", "json": {"queries": [...]}}
+    {"url": "/fuzzy?query=dockr&max_distance=2"}
+
+"method" defaults to GET. "t" is the recorded send time in seconds, used by --recorded.
+
+Requests go to the ASGI app in-process (the default, through httpx.ASGITransport, so no
+sockets are involved), to a running server with --url, or to a local uvicorn that --serve
+starts on a free port and stops afterwards. Three load models are available:
+
+    closed loop  --concurrency N clients each send their next request when the previous
+                 one returns; throughput is whatever the server sustains.
+    open loop    --rate R starts requests on a fixed schedule (or --poisson arrivals)
+                 whether or not earlier ones have finished; --concurrency caps the
+                 requests in flight.
+    recorded     --recorded replays at the log's own "t" offsets, scaled by --speed.
+
+In the open-loop models latency runs from the scheduled send time, not the actual one,
+so time spent waiting behind a saturated server is counted instead of hidden.
+
+Functions:
+    load_log(path): Reads a JSON-lines log into request dicts.
+    synthetic_log(terms, count, seed, fuzzy_share): Builds a log from a list of terms.
+    replay(requests, ...): Sends the requests and returns a report dict.
+    percentile(sorted_values, fraction): Nearest-rank percentile.
+
+Usage:
+    python -m benchmarks.replay queries.jsonl --concurrency 32
+    python -m benchmarks.replay queries.jsonl --rate 500 --duration 30 --serve --workers 4
+    python -m benchmarks.replay --synthetic 10000 --url http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+PERCENTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("p999", 0.999))
+
+
+def load_log(path):
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if "url" in entry:
+                    path_part, _, query = entry["url"].partition("?")
+                    entry = {**entry, "path": path_part, "query": query}
+                requests.append(entry)
+    return requests
+
+
+def synthetic_log(terms, count, seed=0, fuzzy_share=0.2):
+    """
+    Build `count` requests over terms: popular terms (a Zipf-like draw over the list
+    order) are typed as 1-6 character prefixes for /autocomplete, and a fuzzy_share of
+    requests send them with one typo to /fuzzy.
+    """
+    rng = random.Random(seed)
+    weights = [1.0 / (i + 1) for i in range(len(terms))]
+    requests = []
+    for term in rng.choices(terms, weights, k=count):
+        if rng.random() < fuzzy_share and len(term) > 2:
+            i = rng.randrange(len(term))
+            typo = term[:i] + rng.choice("aeiorst") + term[i + 1:]
+            requests.append({"path": "/fuzzy", "params": {"query": typo, "max_distance": 1}})
+        else:
+            prefix = term[:rng.randint(1, min(6, len(term)))]
+            requests.append({"path": "/autocomplete", "params": {"prefix": prefix, "limit": 10}})
+    return requests
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+class _Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+
+    def add(self, endpoint, latency, status):
+        self.latencies.setdefault(endpoint, []).append(latency)
+        counts = self.statuses.setdefault(endpoint, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    def report(self, elapsed):
+        def summarize(latencies, statuses):
+            latencies = sorted(latencies)
+            errors = sum(count for status, count in statuses.items() if not str(status).startswith("2"))
+            summary = {
+                "requests": len(latencies),
+                "errors": errors,
+                "error_rate": errors / len(latencies) if latencies else 0.0,
+                "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+                "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else None,
+                "max_ms": latencies[-1] * 1000 if latencies else None,
+                "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+            }
+            for name, fraction in PERCENTILES:
+                value = percentile(latencies, fraction)
+                summary[f"{name}_ms"] = value * 1000 if value is not None else None
+            return summary
+
+        endpoints = {
+            endpoint: summarize(self.latencies[endpoint], self.statuses[endpoint])
+            for endpoint in sorted(self.latencies)
+        }
+        everything = [latency for latencies in self.latencies.values() for latency in latencies]
+        statuses = {}
+        for counts in self.statuses.values():
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+        return {"elapsed_s": elapsed, "total": summarize(everything, statuses), "endpoints": endpoints}
+
+
+async def _send(client, request, recorder, scheduled=None):
+    # Latency runs from the scheduled time in the open-loop models
+    start = scheduled if scheduled is not None else time.perf_counter()
+    endpoint = request["path"]
+    try:
+        if "query" in request:
+            url = f"{endpoint}?{request['query']}" if request["query"] else endpoint
+            response = await client.request(request.get("method", "GET"), url, json=request.get("json"))
+        else:
+            response = await client.request(request.get("method", "GET"), endpoint,
+                                            params=request.get("params"), json=request.get("json"))
+        status = response.status_code
+    except httpx.HTTPError as exc:
+        status = type(exc).__name__
+    recorder.add(endpoint, time.perf_counter() - start, status)
+
+
+async def _closed_loop(client, requests, recorder, concurrency, deadline):
+    iterator = iter(requests)
+
+    async def worker():
+        for request in iterator:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            await _send(client, request, recorder)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def _open_loop(client, schedule, recorder, concurrency, deadline):
+    # schedule yields (request, send offset in seconds from the start) pairs
+    slots = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    tasks = set()
+
+    async def fire(request, scheduled):
+        async with slots:
+            await _send(client, request, recorder, scheduled)
+
+    for request, offset in schedule:
+        scheduled = start + offset
+        if deadline is not None and scheduled >= deadline:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(fire(request, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def _arrivals(rate, poisson, seed):
+    rng = random.Random(seed)
+    offset = 0.0
+    while True:
+        yield offset
+        offset += rng.expovariate(rate) if poisson else 1.0 / rate
+
+
+async def _replay(requests, base_url, app, concurrency, rate, poisson, recorded, speed, duration, seed, first):
+    if app is not None:
+        transport = httpx.ASGITransport(app=app)
+    else:
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=concurrency))
+    recorder = _Recorder()
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=30.0) as client:
+        start = time.perf_counter()
+        deadline = start + duration if duration else None
+        if recorded:
+            # first is the log's first "t"; requests may be a cycling generator
+            schedule = ((request, (request.get("t", first) - first) / speed) for request in requests)
+            await _open_loop(client, schedule, recorder, concurrency, deadline)
+        elif rate:
+            await _open_loop(client, zip(requests, _arrivals(rate, poisson, seed)), recorder, concurrency, deadline)
+        else:
+            await _closed_loop(client, requests, recorder, concurrency, deadline)
+        elapsed = time.perf_counter() - start
+    return recorder.report(elapsed)
+
+
+def replay(requests, base_url=None, app=None, concurrency=16, rate=None, poisson=False,
+           recorded=False, speed=1.0, duration=None, seed=0):
+    """
+    Send requests and return the report. With base_url unset they go to app in-process
+    (api.app's app by default). With duration set, sending stops after that many seconds
+    and requests are cycled if the log runs out.
+    """
+    if base_url is None and app is None:
+        from api.app import app, index_loader
+        index_loader.wait()
+    first = requests[0].get("t", 0.0) if requests else 0.0
+    if duration:
+        requests = _cycle(requests)
+    report = asyncio.run(_replay(requests, base_url or "http://replay", app if base_url is None else None,
+                                 concurrency, rate, poisson, recorded, speed, duration, seed, first))
+    mode = "recorded" if recorded else "open" if rate else "closed"
+    report["config"] = {"mode": mode, "concurrency": concurrency, "rate": rate, "poisson": poisson,
+                        "speed": speed, "duration": duration, "target": base_url or "in-process"}
+    return report
+
+
+def _cycle(requests):
+    # Repeats the log; recorded offsets are shifted by one log span per pass
+    span = (requests[-1].get("t", 0.0) - requests[0].get("t", 0.0)) if requests else 0.0
+    passes = 0
+    while requests:
+        for request in requests:
+            yield {**request, "t": request["t"] + passes * span} if "t" in request else request
+        passes += 1
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(workers):
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(f"{url}/readyz", params={"full": "true"}, timeout=1.0).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 60 seconds")
+
+
+def _print_report(report):
+    columns = ("requests", "throughput_rps", "error_rate", "p50_ms", "p95_ms", "p99_ms", "p999_ms", "max_ms")
+    print(f"{'endpoint':<22}" + "".join(f"{column:>15}" for column in columns))
+    rows = list(report["endpoints"].items()) + [("total", report["total"])]
+    for endpoint, summary in rows:
+        cells = []
+        for column in columns:
+            value = summary[column]
+            cells.append(f"{'-':>15}" if value is None else f"{value:>15.3f}" if isinstance(value, float) else f"{value:>15}")
+        print(f"{endpoint:<22}" + "".join(cells))
+    print(f"elapsed {report['elapsed_s']:.2f}s, statuses {report['total']['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a query log against the search API.")
+    parser.add_argument("log", nargs="?", help="JSON-lines query log")
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="Replay N generated queries over data/demo_data.json instead of a log")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of a running server; default is the app in-process")
+    target.add_argument("--serve", action="store_true", help="Start a local uvicorn for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --serve")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="Clients in the closed loop; cap on requests in flight otherwise")
+    parser.add_argument("--rate", type=float, help="Open loop: requests per second")
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times with --rate")
+    parser.add_argument("--recorded", action="store_true", help="Open loop at the log's own 't' offsets")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression for --recorded")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds, cycling the log")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from src.init_data import load_demo_data
+
+        requests = synthetic_log(load_demo_data(), args.synthetic, args.seed)
+    elif args.log:
+        requests = load_log(args.log)
+    else:
+        parser.error("give a log file or --synthetic N")
+
+    server = None
+    base_url = args.url
+    if args.serve:
+        server, base_url = _start_server(args.workers)
+    try:
+        report = replay(requests, base_url, concurrency=args.concurrency, rate=args.rate,
+                        poisson=args.poisson, recorded=args.recorded, speed=args.speed,
+                        duration=args.duration, seed=args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Response Serialization Benchmark
+
+This module times how /autocomplete and /fuzzy turn finished results into a response body,
+for several result counts:
+    pydantic    builds the response model (and a FuzzyMatch per match), then validates and
+                serializes it the way FastAPI does for a route's response_model
+    encoded     writes the same bytes with src.encoding
+    cached      the same, with the results array already in a FragmentCache
+
+Results are terms from benchmarks.corpus, and every encoded body is checked against the
+pydantic one before timing. Records use the format of benchmarks.run, with the result count
+as the size, so benchmarks.compare reads these reports too.
+
+Usage:
+    python -m benchmarks.responses --counts 10,100,1000 --output benchmarks/responses.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import time
+
+from api.app import app, AUTOCOMPLETE_ALGORITHM, AutocompleteResponse, FuzzyMatch, FuzzyResponse
+from benchmarks.corpus import generate_corpus
+from benchmarks.run import _git_commit, _record, _timed_calls
+from src.encoding import FragmentCache, encode_matches, encode_response, encode_terms
+
+FUZZY_ALGORITHM = "Levenshtein Distance"
+
+
+def _pydantic_body(path, model):
+    # FastAPI's serialize_response for a route with a response_model and no response_class
+    route = next(route for route in app.routes if getattr(route, "path", None) == path)
+    value, errors = route.response_field.validate(model, {}, loc=("response",))
+    if errors:
+        raise ValueError(errors)
+    return route.response_field.serialize_json(value)
+
+
+def _calls(query, terms, matches):
+    # {(endpoint, path): call} for one result count
+    autocomplete_cache = FragmentCache()
+    fuzzy_cache = FragmentCache()
+    return {
+        ("autocomplete", "pydantic"): lambda: _pydantic_body("/autocomplete", AutocompleteResponse(
+            query=query, results=terms, execution_time_ms=1.23, cache_used=False)),
+        ("autocomplete", "encoded"): lambda: encode_response(
+            query, encode_terms(terms), 1.23, AUTOCOMPLETE_ALGORITHM, False),
+        ("autocomplete", "cached"): lambda: encode_response(
+            query, autocomplete_cache.encode(query, terms, encode_terms), 1.23, AUTOCOMPLETE_ALGORITHM, False),
+        ("fuzzy", "pydantic"): lambda: _pydantic_body("/fuzzy", FuzzyResponse(
+            query=query, results=[FuzzyMatch(term=term, score=round(score, 2)) for term, score in matches],
+            execution_time_ms=1.23, algorithm=FUZZY_ALGORITHM, cache_used=False)),
+        ("fuzzy", "encoded"): lambda: encode_response(
+            query, encode_matches(matches), 1.23, FUZZY_ALGORITHM, False),
+        ("fuzzy", "cached"): lambda: encode_response(
+            query, fuzzy_cache.encode(query, matches, encode_matches), 1.23, FUZZY_ALGORITHM, False),
+    }
+
+
+def run(counts=(10, 100, 1000), repeat=200, seed=0):
+    rng = random.Random(seed)
+    corpus = [term for term, _ in generate_corpus(max(counts), seed)]
+    results = []
+    for count in counts:
+        terms = corpus[:count]
+        matches = sorted(((term, rng.random()) for term in terms), key=lambda match: -match[1])
+        calls = _calls(terms[0][:3], terms, matches)
+        for endpoint in ("autocomplete", "fuzzy"):
+            expected = calls[(endpoint, "pydantic")]()
+            for path in ("encoded", "cached"):
+                if calls[(endpoint, path)]() != expected:
+                    raise AssertionError(f"{endpoint} {path} body differs from the pydantic route")
+        for (endpoint, path), call in calls.items():
+            timing = _timed_calls(call, [()], repeat)
+            results.append(_record("response", count, "us", timing.pop("value"),
+                                   {"endpoint": endpoint, "path": path}, **timing))
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time response serialization against the pydantic route.")
+    parser.add_argument("--counts", default="10,100,1000", help="Comma-separated result counts")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmarks/responses.json", help="JSON file to write")
+    args = parser.parse_args()
+
+    report = run([int(count) for count in args.counts.split(",")], args.repeat, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    baseline = {}
+    for result in report["results"]:
+        endpoint, path = result["params"]["endpoint"], result["params"]["path"]
+        if path == "pydantic":
+            baseline[(endpoint, result["size"])] = result["value"]
+        speedup = baseline[(endpoint, result["size"])] / result["value"]
+        print(f"{endpoint:<13} {result['size']:>6} {path:<9} {result['value']:>10.2f} us  {speedup:>6.1f}x")
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
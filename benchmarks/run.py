@@ -0,0 +1,195 @@
+"""
+Microbenchmark Runner
+
+This module times the core index operations on synthetic corpora of several sizes and
+writes the results as JSON, so two runs (two commits, two machines, two settings) can be
+compared with benchmarks.compare.
+
+For each corpus size it measures:
+    trie.insert         mean microseconds per Trie.insert, in generation (unsorted) order
+    trie.search         median microseconds per Trie.search, for each prefix length
+    fuzzy_search        median microseconds per fuzzy_search scan, for each max_distance
+    load.corpus         milliseconds to stream a sorted corpus file into a trie (load_corpus)
+    load.snapshot       milliseconds to map a binary snapshot and answer a first query
+    memory.trie         Trie.bytes_per_term() of the loaded trie
+    memory.terms        TermDictionary.memory_usage() per term
+
+Queries are corpus terms picked with the corpus seed, cut to the prefix length for
+autocomplete and given one random edit for fuzzy search, so every run times the same
+calls. Each result carries one headline `value` where lower is better, plus its unit
+and, for per-call timings, the mean, p95 and number of calls.
+
+The fuzzy scan is linear in the corpus, so it runs fewer queries on large corpora; at
+10^7 terms expect minutes per distance and several GB of memory for the trie.
+
+Usage:
+    python -m benchmarks.run --sizes 1e3,1e4,1e5 --output benchmarks/results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus, write_corpus
+from src.fuzzy_search import fuzzy_search
+from src.init_data import load_corpus
+from src.snapshot import load_snapshot, write_snapshot
+from src.terms import TermDictionary
+from src.trie import Trie
+
+PREFIX_LENGTHS = (1, 2, 3, 4, 6, 8)
+MAX_DISTANCES = (0, 1, 2)
+# Fuzzy scans over the corpus are capped at about this many term comparisons per distance
+FUZZY_BUDGET = 2_000_000
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+
+def _record(benchmark, size, unit, value, params=None, **extra):
+    return {"benchmark": benchmark, "size": size, "params": params or {}, "unit": unit,
+            "value": value, **extra}
+
+
+def _timed_calls(call, arguments, repeat):
+    # Median, mean and p95 microseconds over every call; one untimed warm-up pass first
+    for args in arguments:
+        call(*args)
+    timings = []
+    for _ in range(repeat):
+        for args in arguments:
+            start = time.perf_counter()
+            call(*args)
+            timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return {
+        "value": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "calls": len(timings),
+    }
+
+
+def _typo(rng, term):
+    # One random substitution, insertion or deletion
+    i = rng.randrange(len(term))
+    kind = rng.randrange(3)
+    if kind == 0:
+        return term[:i] + rng.choice(_ALPHABET) + term[i + 1:]
+    if kind == 1:
+        return term[:i] + rng.choice(_ALPHABET) + term[i:]
+    return term[:i] + term[i + 1:] if len(term) > 1 else term
+
+
+def run_size(size, seed=0, queries=200, repeat=3, top_k=10, limit=10, workdir=None):
+    corpus = generate_corpus(size, seed)
+    words = [term for term, _ in corpus]
+    rng = random.Random(seed)
+    sample = rng.sample(words, min(queries, len(words)))
+    results = []
+
+    trie = Trie(top_k=top_k)
+    insert = trie.insert
+    start = time.perf_counter()
+    for term, weight in corpus:
+        insert(term, weight)
+    elapsed = time.perf_counter() - start
+    results.append(_record("trie.insert", size, "us", elapsed / size * 1e6, calls=size))
+
+    for length in PREFIX_LENGTHS:
+        prefixes = [(term[:length], limit) for term in sample if len(term) >= length]
+        if prefixes:
+            stats = _timed_calls(trie.search, prefixes, repeat)
+            results.append(_record("trie.search", size, "us", params={"prefix_length": length, "limit": limit}, **stats))
+    del trie
+
+    fuzzy_count = max(3, min(queries, FUZZY_BUDGET // size))
+    sorted_words = sorted(words)
+    for max_distance in MAX_DISTANCES:
+        fuzzy_queries = [(_typo(rng, term) if max_distance else term, max_distance, sorted_words)
+                         for term in sample[:fuzzy_count]]
+        stats = _timed_calls(fuzzy_search, fuzzy_queries, 1)
+        results.append(_record("fuzzy_search", size, "us", params={"max_distance": max_distance}, **stats))
+
+    with tempfile.TemporaryDirectory(dir=workdir) as directory:
+        corpus_path = write_corpus(os.path.join(directory, "corpus.txt"), size, seed)
+        start = time.perf_counter()
+        trie = load_corpus(Trie(top_k=top_k), corpus_path)
+        results.append(_record("load.corpus", size, "ms", (time.perf_counter() - start) * 1000))
+        results.append(_record("memory.trie", size, "bytes/term", trie.bytes_per_term()))
+
+        snapshot_path = os.path.join(directory, "index.snap")
+        write_snapshot(trie, snapshot_path)
+        del trie
+        start = time.perf_counter()
+        mapped = load_snapshot(snapshot_path)
+        mapped.search(sample[0][:2], limit)
+        results.append(_record("load.snapshot", size, "ms", (time.perf_counter() - start) * 1000))
+        mapped.close()
+
+    terms = TermDictionary(words)
+    results.append(_record("memory.terms", size, "bytes/term", terms.memory_usage() / size))
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, seed=0, queries=200, repeat=3, top_k=10, limit=10, workdir=None, log=None):
+    results = []
+    for size in sizes:
+        started = time.perf_counter()
+        results.extend(run_size(size, seed, queries, repeat, top_k, limit, workdir))
+        if log:
+            log(f"{size} terms: {time.perf_counter() - started:.1f}s")
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "queries": queries,
+            "repeat": repeat,
+            "top_k": top_k,
+            "limit": limit,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the index on synthetic corpora.")
+    parser.add_argument("--sizes", default="1e3,1e4,1e5",
+                        help="Comma-separated corpus sizes, from 1e3 up to 1e7")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200, help="Sampled queries per benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the search queries")
+    parser.add_argument("--top-k", type=int, default=10, help="Cached completions per trie node")
+    parser.add_argument("--limit", type=int, default=10, help="Autocomplete result limit")
+    parser.add_argument("--output", default="benchmarks/results.json", help="JSON file to write")
+    args = parser.parse_args()
+
+    sizes = [int(float(size)) for size in args.sizes.split(",")]
+    report = run(sizes, args.seed, args.queries, args.repeat, args.top_k, args.limit,
+                 log=lambda line: print(line, file=sys.stderr))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for result in report["results"]:
+        params = " ".join(f"{key}={value}" for key, value in result["params"].items())
+        print(f"{result['benchmark']:<14} {result['size']:>9} {params:<28} {result['value']:>12.2f} {result['unit']}")
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Bit-Parallel Fuzzy Search over a Packed Corpus
+
+This module implements a vectorized fuzzy search engine. The folded corpus is packed
+once into contiguous NumPy arrays, and Myers' bit-parallel edit distance algorithm is run
+for every term at the same time: the query becomes per-character bitmasks, and each text
+column is one round of integer operations over all terms still long enough to have it.
+
+Terms are ordered by descending length, so the terms active in column j are always a
+leading slice of the state arrays and the character codes of each column are stored
+back to back. Only terms whose length is within max_distance of the query's can match,
+and they form one contiguous slice of that order, so the rest are never touched. The
+pruning indexes help little for large max_distance or short queries; this engine does
+not depend on them.
+
+Functions:
+    BitParallelMatcher(words): Packs the corpus. Requires NumPy.
+    BitParallelMatcher.from_arrays(...): Wraps arrays packed earlier, without copying.
+    BitParallelMatcher.search(query, max_distance): Returns the same (word, similarity_score)
+        tuples as fuzzy_search, in the same order.
+    BitParallelMatcher.search_many(queries): Answers a batch of (query, max_distance) pairs,
+        sharing one pass over the corpus per query length.
+"""
+
+import time
+
+from src.fuzzy_search import fold, fuzzy_search
+
+# NumPy is optional; without it this engine is simply unavailable.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Queries longer than one machine word fall back to the scalar scan
+MAX_QUERY_LENGTH = 64
+# (term, query) cells processed per block; keeps the working arrays cache-sized
+BLOCK_CELLS = 1 << 15
+
+
+class BitParallelMatcher:
+    def __init__(self, words):
+        if np is None:
+            raise ImportError("BitParallelMatcher requires numpy")
+        # A TermDictionary is kept as is and its folded forms reused
+        folded = getattr(words, "folded", None)
+        self.words = words if folded is not None else list(words)
+        lowered = [folded(i) for i in range(len(words))] if folded is not None else [fold(word) for word in self.words]
+        lengths = np.array([len(word) for word in lowered], dtype=np.int64)
+        # Stable, so equal-length terms keep their corpus order
+        self.order = np.argsort(-lengths, kind="stable")
+        self.alphabet = {}
+        for word in lowered:
+            for char in word:
+                if char not in self.alphabet:
+                    self.alphabet[char] = len(self.alphabet)
+
+        sorted_lengths = lengths[self.order]
+        max_length = int(sorted_lengths[0]) if len(sorted_lengths) else 0
+        # active[j] is the number of terms with more than j characters
+        self.active = [int(np.count_nonzero(sorted_lengths > j)) for j in range(max_length)]
+        self.column_offsets = np.zeros(max_length + 1, dtype=np.int64)
+        self.column_offsets[1:] = np.cumsum(self.active)
+        codes = np.empty(int(self.column_offsets[-1]), dtype=np.int32)
+        for j, count in enumerate(self.active):
+            start = self.column_offsets[j]
+            codes[start:start + count] = [
+                self.alphabet[lowered[term_id][j]] for term_id in self.order[:count]
+            ]
+        self.codes = codes
+
+    @classmethod
+    def from_arrays(cls, words, order, column_offsets, codes, alphabet):
+        """
+        Wrap already packed arrays, e.g. read-only views into a shared snapshot, without
+        copying them. alphabet is a string holding each symbol at its code position.
+        """
+        if np is None:
+            raise ImportError("BitParallelMatcher requires numpy")
+        matcher = cls.__new__(cls)
+        matcher.words = words
+        matcher.order = order
+        matcher.column_offsets = column_offsets
+        matcher.codes = codes
+        matcher.alphabet = {char: code for code, char in enumerate(alphabet)}
+        matcher.active = np.diff(column_offsets).tolist()
+        return matcher
+
+    def _count_longer(self, length):
+        # Number of terms with more than `length` characters
+        if length < 0:
+            return len(self.words)
+        return self.active[length] if length < len(self.active) else 0
+
+    def distances(self, queries_lower, max_distance: int):
+        """
+        Edit distances from each of queries_lower (all of the same length m) to the terms
+        whose length is within max_distance of m (no other term can match). These form one
+        contiguous slice of the length-sorted order, so the queries share a single pass
+        over it. Returns the slice start and a (terms, queries) distance array.
+        """
+        m = len(queries_lower[0])
+        lo = self._count_longer(m + max_distance)
+        hi = self._count_longer(m - max_distance - 1)
+        # Terms are rows, so the state of one term for every query is contiguous
+        score = np.full((hi - lo, len(queries_lower)), m, dtype=np.int64)
+        if m == 0:
+            # Distance to the empty query is the term length
+            for j in range(max_distance):
+                score[:max(self._count_longer(j) - lo, 0)] += 1
+            return lo, score
+        # One bitmask per alphabet symbol and query
+        peq = np.zeros((len(self.alphabet), len(queries_lower)), dtype=np.uint64)
+        for column, query_lower in enumerate(queries_lower):
+            for i, char in enumerate(query_lower):
+                symbol = self.alphabet.get(char)
+                if symbol is not None:
+                    peq[symbol, column] |= np.uint64(1 << i)
+
+        one = np.uint64(1)
+        high = np.uint64(1 << (m - 1))
+        # Work through the slice in blocks of terms small enough to stay in cache
+        block = max(1, BLOCK_CELLS // len(queries_lower))
+        for block_start in range(lo, hi, block):
+            block_end = min(block_start + block, hi)
+            pv = np.full((block_end - block_start, len(queries_lower)), (1 << m) - 1, dtype=np.uint64)
+            mv = np.zeros_like(pv)
+            block_score = score[block_start - lo:block_end - lo]
+            for j, count in enumerate(self.active):
+                k = min(count, block_end) - block_start
+                if k <= 0:
+                    break
+                start = self.column_offsets[j] + block_start
+                eq = peq[self.codes[start:start + k]]
+                p = pv[:k]
+                q = mv[:k]
+                xv = eq | q
+                xh = eq & p
+                xh += p
+                xh ^= p
+                xh |= eq
+                ph = xh | p
+                np.invert(ph, out=ph)
+                ph |= q
+                mh = p & xh
+                block_score[:k] += (ph & high).astype(bool)
+                block_score[:k] -= (mh & high).astype(bool)
+                # Row zero grows by one per column in a global alignment
+                ph <<= one
+                ph |= one
+                mh <<= one
+                np.bitwise_or(xv, ph, out=p)
+                np.invert(p, out=p)
+                p |= mh
+                np.bitwise_and(ph, xv, out=q)
+        return lo, score
+
+    def _matches(self, width, max_distance, lo, dist):
+        hits = np.nonzero(dist <= max_distance)[0]
+        term_ids = self.order[hits + lo]
+        # Folded length at a sorted position: the number of columns whose active terms
+        # include it
+        lengths = np.searchsorted(-np.asarray(self.active), -(hits + lo), side="left")
+        # Visit hits in corpus order so ties sort exactly like fuzzy_search
+        by_id = np.argsort(term_ids, kind="stable")
+        matches = []
+        for term_id, dist_value, length in zip(
+            term_ids[by_id].tolist(), dist[hits[by_id]].tolist(), lengths[by_id].tolist()
+        ):
+            max_len = max(width, length)
+            matches.append((self.words[term_id], 1 - (dist_value / max_len)))
+
+        matches.sort(key=lambda x: x[1], reverse=True)
+        return matches
+
+    def search(self, query: str, max_distance: int, trace=None) -> list:
+        if trace is None:
+            return self.search_many([(query, max_distance)])[0]
+        # The length slice is the candidate set; one vectorized pass verifies all of it
+        width = len(fold(query))
+        if width > MAX_QUERY_LENGTH:
+            return fuzzy_search(query, max_distance, self.words, trace)
+        start = time.perf_counter()
+        matches = self.search_many([(query, max_distance)])[0]
+        trace.add("verify", time.perf_counter() - start)
+        trace.count("candidates", self._count_longer(width - max_distance - 1) - self._count_longer(width + max_distance))
+        return matches
+
+    def search_many(self, queries) -> list:
+        """
+        Answer several (query, max_distance) pairs. Queries are bucketed by length and
+        each bucket is answered with one pass over the corpus. Returns one match list
+        per query, in input order.
+        """
+        results = [None] * len(queries)
+        buckets = {}
+        for position, (query, max_distance) in enumerate(queries):
+            query_lower = fold(query)
+            if len(query_lower) > MAX_QUERY_LENGTH:
+                results[position] = fuzzy_search(query, max_distance, self.words)
+            else:
+                buckets.setdefault(len(query_lower), []).append((position, query_lower))
+        for width, members in buckets.items():
+            widest = max(queries[position][1] for position, _ in members)
+            lo, dist = self.distances([query_lower for _, query_lower in members], widest)
+            for column, (position, _) in enumerate(members):
+                max_distance = queries[position][1]
+                results[position] = self._matches(width, max_distance, lo, dist[:, column])
+        return results
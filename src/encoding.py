@@ -0,0 +1,84 @@
+"""
+Pre-Encoded JSON Responses
+
+This module writes /autocomplete and /fuzzy response bodies straight to JSON bytes. The
+pydantic route builds a FuzzyMatch per match and a response model per request, then
+FastAPI validates the model again before serializing it. Engine results already have the
+declared types, so here plain lists and dicts go through pydantic_core.to_json, the
+serializer pydantic itself uses. The bytes are identical to the pydantic route's: same
+field order, same string escaping and float formatting.
+
+The results array is most of a response, and it is the only part that repeats across
+requests for a hot query. FragmentCache keeps the encoded array per query cache key, next
+to the cached results. Keys include the index version, so a write makes old fragments
+unreachable. A fragment is reused only while the results are equal to the ones it was
+encoded from; popularity can reorder results between requests.
+
+Functions:
+    encode_terms(terms): Returns a JSON array of strings.
+    encode_matches(matches): Returns a JSON array of {"term", "score"} objects for
+        (term, score) pairs, with scores rounded to 2 decimals like the pydantic route.
+    encode_response(query, results, execution_time_ms, algorithm, cache_used): Returns a
+        response body around an encoded results array.
+    encode_batch(responses, execution_time_ms): Returns a batch response body around
+        encoded responses.
+    FragmentCache(maxsize).encode(key, results, encoder): Returns encoder(results), reusing
+        the bytes cached under key when the results are unchanged.
+"""
+
+from pydantic_core import to_json
+
+from src.cache import LRUCache
+
+
+def encode_terms(terms):
+    return to_json(terms)
+
+
+def encode_matches(matches):
+    # Engines compute scores by true division, so they are floats (or NumPy float64, a
+    # float subclass) and serialize like the model's float field
+    return to_json([{"term": term, "score": round(score, 2)} for term, score in matches])
+
+
+def encode_response(query, results, execution_time_ms, algorithm, cache_used):
+    # Field order follows AutocompleteResponse and FuzzyResponse
+    return b"".join((
+        b'{"query":', to_json(query),
+        b',"results":', results,
+        b',"execution_time_ms":', to_json(float(execution_time_ms)),
+        b',"algorithm":', to_json(algorithm),
+        b',"cache_used":', b"true" if cache_used else b"false",
+        b"}",
+    ))
+
+
+def encode_batch(responses, execution_time_ms):
+    # Field order follows AutocompleteBatchResponse and FuzzyBatchResponse
+    return b"".join((
+        b'{"results":[', b",".join(responses),
+        b'],"execution_time_ms":', to_json(float(execution_time_ms)),
+        b"}",
+    ))
+
+
+class FragmentCache:
+    def __init__(self, maxsize=1024):
+        self._cache = LRUCache(maxsize)
+        self.reused = 0
+
+    def encode(self, key, results, encoder):
+        hit, cached = self._cache.get(key)
+        # Usually the same string objects, so the comparison stops at identity checks
+        if hit and cached[0] == results:
+            self.reused += 1
+            return cached[1]
+        fragment = encoder(results)
+        self._cache.put(key, (results, fragment))
+        return fragment
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "reused": self.reused}
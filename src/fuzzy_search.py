@@ -4,11 +4,20 @@ Fuzzy Search Module
 This module implements fuzzy search capabilities to handle misspelled queries.
 It uses the Levenshtein distance algorithm to suggest corrections and retrieve close matches.
 
+Matching ignores case: queries and terms are compared in their folded form (casefolded,
+then Unicode NFC-normalized).
+
 Functions:
+    fold(text): Returns the folded form of text.
+    distance_function(): Returns the edit distance function, importing python-Levenshtein
+        on first use if it is installed.
     fuzzy_search(query, max_distance): Returns words that are within max_distance from the query.
+    trie_fuzzy_search(query, max_distance, trie): Same results, found by walking the trie with
+        incremental DP rows and pruning subtrees that cannot stay within max_distance.
 """
 
-from Levenshtein import distance
+import time
+import unicodedata
 
 def levenshtein(s1, s2):
     # Compute Levenshtein distance using dynamic programming
@@ -28,28 +37,111 @@ def levenshtein(s1, s2):
                                    dp[i-1][j-1])  # Substitution
     return dp[m][n]
 
-# Try to import the fast python-Levenshtein module.
-try:
-    import Levenshtein
-    calc_distance = Levenshtein.distance
-except ImportError:
-    calc_distance = levenshtein
+# The fast python-Levenshtein module is optional. It is imported on first use rather than
+# with this module, which keeps it off the API's import path.
+_distance = None
+
+def distance_function():
+    # Returns python-Levenshtein's distance if installed, else the pure-Python one
+    global _distance
+    if _distance is None:
+        try:
+            from Levenshtein import distance
+        except ImportError:
+            distance = levenshtein
+        _distance = distance
+    return _distance
+
+def calc_distance(s1, s2):
+    return distance_function()(s1, s2)
+
+def fold(text: str) -> str:
+    return unicodedata.normalize("NFC", text.casefold())
 
-def fuzzy_search(query: str, max_distance: int, words: list) -> list:
+def fuzzy_search(query: str, max_distance: int, words: list, trace=None) -> list:
     """
     Perform fuzzy search using Levenshtein distance.
     Returns a list of tuples (word, similarity_score).
-    Score is calculated as 1 - (distance / max(len(query), len(word))).
+    Score is calculated as 1 - (distance / max(len(query), len(word))), with the lengths
+    of the folded forms the distance is computed on, so it stays between 0 and 1.
+    If trace is given, the scan is timed into it as verification of every word.
     """
+    # A TermDictionary has every term folded already
+    scan = getattr(words, "fuzzy_scan", None)
+    if scan is not None:
+        return scan(query, max_distance, trace)
+    start = time.perf_counter() if trace is not None else None
+    query_folded = fold(query)
+    distance = distance_function()
     matches = []
+    compared = 0
     for word in words:
-        dist = distance(query.lower(), word.lower())
+        compared += 1
+        word_folded = fold(word)
+        dist = distance(query_folded, word_folded)
         if dist <= max_distance:
             # Calculate similarity score (1 is perfect match, 0 is completely different)
-            max_len = max(len(query), len(word))
+            max_len = max(len(query_folded), len(word_folded))
             similarity = 1 - (dist / max_len)
             matches.append((word, similarity))
     
     # Sort by similarity score (highest first)
     matches.sort(key=lambda x: x[1], reverse=True)
-    return matches
\ No newline at end of file
+    if trace is not None:
+        trace.add("verify", time.perf_counter() - start)
+        trace.count("candidates", compared)
+    return matches
+
+def trie_fuzzy_search(query: str, max_distance: int, trie, trace=None) -> list:
+    """
+    Perform fuzzy search by walking a Trie with one Levenshtein DP row per character.
+    Shared prefixes are computed once, and a subtree is skipped as soon as the
+    smallest value in its row exceeds max_distance (the distance can only grow).
+    Returns the same (word, similarity_score) tuples as fuzzy_search. If trace is
+    given, the walk is timed into it, with the number of nodes expanded as candidates.
+    """
+    start = time.perf_counter() if trace is not None else None
+    query_lower = fold(query)
+    width = len(query_lower)
+    matches = []
+
+    def collect(word, row):
+        dist = row[-1]
+        if dist <= max_distance:
+            max_len = max(width, len(fold(word)))
+            matches.append((word, 1 - (dist / max_len)))
+
+    first_row = list(range(width + 1))
+    root = trie.root
+    if root.is_end_of_word:
+        collect("", first_row)
+    stack = [(root, "", first_row)]
+    expanded = 0
+    while stack:
+        node, path, row = stack.pop()
+        expanded += 1
+        if not node.children:
+            continue
+        for child in reversed(list(node.children.values())):
+            current = row
+            for char in fold(child.label):
+                above = current
+                current = [above[0] + 1]
+                for i in range(1, width + 1):
+                    cost = 0 if query_lower[i - 1] == char else 1
+                    current.append(min(current[i - 1] + 1,     # Insertion
+                                       above[i] + 1,           # Deletion
+                                       above[i - 1] + cost))   # Substitution
+                if min(current) > max_distance:
+                    break
+            else:
+                word = path + child.label
+                if child.is_end_of_word:
+                    collect(word, current)
+                stack.append((child, word, current))
+
+    matches.sort(key=lambda x: x[1], reverse=True)
+    if trace is not None:
+        trace.add("walk", time.perf_counter() - start)
+        trace.count("candidates", expanded)
+    return matches
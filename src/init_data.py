@@ -1,10 +1,124 @@
+import gzip
 import json
-from src.trie import Trie
+import re
+import unicodedata
+from src.trie import Trie, TrieBuilder
+from src.symspell import SymSpellIndex
+from src.token_index import TokenIndex
 
 def load_demo_data(filepath: str = "./data/demo_data.json"):
     with open(filepath, "r") as f:
         return json.load(f)
 
-def populate_trie(trie: Trie, words):
+def populate_trie(trie: Trie, words, token_index: TokenIndex = None):
+    # Items are plain terms or (term, weight) pairs; token_index, if given, is filled
+    # in the same pass
     for word in words:
-        trie.insert(word)
+        if isinstance(word, str):
+            word = (word,)
+        trie.insert(*word)
+        if token_index is not None:
+            token_index.add(*word)
+
+def build_symspell_index(words, max_distance=2, prefix_length=7, memory_budget_mb=None):
+    # Returns None when the index would not fit the memory budget, so callers
+    # can fall back to the other fuzzy engines.
+    try:
+        return SymSpellIndex(words, max_distance, prefix_length, memory_budget_mb)
+    except MemoryError:
+        return None
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_term(term: str) -> str:
+    # Unicode NFC with trimmed, single-spaced whitespace; case is kept for the trie
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", term)).strip()
+
+def _parse_item(item):
+    # A corpus item is a term, a {"term": ..., "weight": ...} object or a [term, weight] pair
+    if isinstance(item, str):
+        return item, 0.0
+    if isinstance(item, dict):
+        return item["term"], float(item.get("weight", 0.0))
+    return item[0], float(item[1])
+
+def _iter_json_array(f, chunk_size):
+    # Decode one array element at a time from fixed-size reads
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    while True:
+        chunk = f.read(chunk_size)
+        buffer += chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array of terms")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, pos_after = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break  # Element continues in the next chunk
+            if pos_after == len(buffer) and chunk:
+                break  # A bare number could continue in the next chunk
+            yield item
+            pos = pos_after
+        buffer = buffer[pos:]
+        if not chunk:
+            raise ValueError("Unterminated JSON array")
+
+def iter_corpus(filepath: str, chunk_size: int = 1 << 16):
+    """
+    Stream (term, weight) pairs from a corpus file without loading it whole. Supports a
+    JSON array (.json), JSON lines (.jsonl/.ndjson), plain text with one term per line and
+    an optional tab-separated weight (.txt), each optionally gzip-compressed (.gz). Terms
+    are normalized and empty ones skipped; duplicates are left to the trie.
+    """
+    name = filepath[:-3] if filepath.endswith(".gz") else filepath
+    opener = gzip.open if filepath.endswith(".gz") else open
+    with opener(filepath, "rt", encoding="utf-8") as f:
+        if name.endswith(".json"):
+            items = (_parse_item(item) for item in _iter_json_array(f, chunk_size))
+        elif name.endswith((".jsonl", ".ndjson")):
+            items = (_parse_item(json.loads(line)) for line in f if line.strip())
+        else:
+            items = (
+                (term, float(weight[0]) if weight else 0.0)
+                for term, *weight in (line.rstrip("\n").split("\t", 1) for line in f)
+            )
+        for term, weight in items:
+            term = normalize_term(term)
+            if term:
+                yield term, weight
+
+def load_corpus(trie: Trie, filepath: str, chunk_size: int = 1 << 16, token_index: TokenIndex = None) -> Trie:
+    """
+    Stream a corpus file into an empty trie. Sorted input is bulk-built with TrieBuilder;
+    from the first out-of-order term on, the remaining terms are inserted one by one.
+    Only the trie and one read buffer are held in memory, plus token_index if given,
+    which is filled in the same pass.
+    """
+    builder = TrieBuilder(trie)
+    for term, weight in iter_corpus(filepath, chunk_size):
+        if token_index is not None:
+            token_index.add(term, weight)
+        if builder is not None:
+            if builder.add(term, weight):
+                continue
+            builder.finish()
+            builder = None
+        trie.insert(term, weight)
+    if builder is not None:
+        builder.finish()
+    return trie
@@ -0,0 +1,122 @@
+"""
+Live Index with Generation-Swapped Snapshots
+
+This module lets the search index change while it is being queried. Readers fetch the
+current IndexGeneration with one attribute read and use it for the whole request; they
+never take a lock. Writers are serialized by a lock, update the copy-on-write Trie, and
+publish a new generation with a single assignment.
+
+Only the trie is updated in place (copy-on-write, so a write costs one root-to-leaf path).
+The word list, the deletion index, the bit-parallel matcher and the token index are
+rebuilt from scratch by a background rebuild, debounced by rebuild_delay seconds. Until it
+lands, a write publishes a generation that keeps the previous secondary indexes and is
+marked stale: they may still hold deleted terms and miss new ones. The trie decides
+membership, so callers should drop results that are no longer in it.
+
+A rebuild is installed when it completes, even if writes landed while it ran; the
+generation then stays stale and the rebuild those writes scheduled catches up. Under a
+steady stream of writes the secondary indexes therefore lag by about one rebuild instead
+of disappearing.
+
+Functions:
+    LiveIndex(trie, words, build_secondary, rebuild_delay, build_tokens, build_words): Wraps
+        a populated trie.
+    LiveIndex.add(term, weight): Inserts or re-weights a term; returns True if it is new.
+    LiveIndex.remove(term): Deletes a term; returns False if it was not indexed.
+    LiveIndex.rebuild(): Rebuilds stale secondary indexes now and publishes them.
+"""
+
+import threading
+from collections import namedtuple
+
+# version increases on every write; stale is True while words, symspell, bitparallel and
+# tokens were built from an older version of the trie
+IndexGeneration = namedtuple(
+    "IndexGeneration", ["version", "trie", "words", "symspell", "bitparallel", "tokens", "stale"],
+    defaults=[None, False]
+)
+
+
+class LiveIndex:
+    def __init__(self, trie, words, build_secondary=None, rebuild_delay=1.0, build_tokens=None,
+                 build_words=tuple):
+        """
+        build_secondary(words) returns a (symspell, bitparallel) pair, either of which may
+        be None. build_tokens(items), if given, builds the token index from the trie's
+        (word, weight) pairs. build_words(words) makes the published word sequence, e.g.
+        a TermDictionary. rebuild_delay=None rebuilds synchronously after every write.
+        """
+        trie.copy_on_write = True
+        self.build_secondary = build_secondary or (lambda words: (None, None))
+        self.build_tokens = build_tokens
+        self.build_words = build_words
+        self.rebuild_delay = rebuild_delay
+        self._write_lock = threading.Lock()
+        self._rebuild_timer = None
+        self.writes = 0
+        # Version of the trie the installed secondary indexes were built from
+        self.secondary_version = 0
+        words = build_words(words)
+        symspell, bitparallel = self.build_secondary(words)
+        tokens = build_tokens(trie.items()) if build_tokens is not None else None
+        self.generation = IndexGeneration(0, trie, words, symspell, bitparallel, tokens)
+
+    def add(self, term, weight=0.0):
+        with self._write_lock:
+            current = self.generation
+            created = term not in current.trie
+            current.trie.insert(term, weight)
+            self._publish(current)
+        return created
+
+    def remove(self, term):
+        with self._write_lock:
+            current = self.generation
+            if not current.trie.delete(term):
+                return False
+            self._publish(current)
+        return True
+
+    def _publish(self, current):
+        # Called with the write lock held
+        self.writes += 1
+        self.generation = current._replace(version=current.version + 1, stale=True)
+        if self.rebuild_delay is None:
+            self._install(self.generation, *self._build(current.trie))
+        elif self._rebuild_timer is None:
+            self._rebuild_timer = threading.Timer(self.rebuild_delay, self.rebuild)
+            self._rebuild_timer.daemon = True
+            self._rebuild_timer.start()
+
+    def _build(self, trie):
+        # The trie iterator captures the current root, so this sees one consistent version
+        if self.build_tokens is None:
+            words = self.build_words(trie)
+            tokens = None
+        else:
+            items = tuple(trie.items())
+            words = self.build_words(word for word, _ in items)
+            tokens = self.build_tokens(items)
+        return (words,) + tuple(self.build_secondary(words)) + (tokens,)
+
+    def _install(self, built_from, words, symspell, bitparallel, tokens):
+        # Called with the write lock held. Overlapping rebuilds can finish out of order;
+        # never replace newer secondary indexes with older ones.
+        if built_from.version < self.secondary_version:
+            return
+        self.secondary_version = built_from.version
+        latest = self.generation
+        self.generation = latest._replace(words=words, symspell=symspell, bitparallel=bitparallel, tokens=tokens,
+                                          stale=latest.version != built_from.version)
+
+    def rebuild(self):
+        with self._write_lock:
+            self._rebuild_timer = None
+            current = self.generation
+            if not current.stale:
+                return
+        # Build outside the lock so writes keep flowing
+        built = self._build(current.trie)
+        with self._write_lock:
+            # Installed even if writes landed meanwhile; they have scheduled another rebuild
+            self._install(current, *built)
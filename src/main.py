@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-from src.trie import Trie
+from src.trie import Trie, CharTrie
 from src.init_data import load_demo_data, populate_trie
 
 def main():
@@ -9,5 +9,11 @@ def main():
     print("Autocomplete results for 'co':", trie.search("co"))
     print("Autocomplete results for 'de':", trie.search("de"))
 
+    # Compare memory against the uncompressed per-character trie
+    baseline = CharTrie()
+    populate_trie(baseline, words)
+    print(f"Radix trie: {trie.bytes_per_term():.1f} bytes/term")
+    print(f"Char trie:  {baseline.bytes_per_term():.1f} bytes/term")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,274 @@
+"""
+Request Metrics in the Prometheus Text Format
+
+This module keeps counters, gauges and histograms in process memory and renders them in
+the Prometheus text exposition format (version 0.0.4) for a /metrics endpoint. Recording
+is a dict lookup and a few additions under a lock held for nanoseconds; histograms find
+their bucket by binary search. Nothing is formatted until a scrape.
+
+A Trace travels with one request. MetricsMiddleware creates it and leaves it in the ASGI
+scope's state, where handlers find it as request.state.trace and fill in the endpoint,
+the algorithm, the result count and the time of each stage. Search engines accept it as
+an optional `trace` argument and add their own stages (prefix walk, subtree collection,
+candidate generation, verification) and candidate counts; with trace=None they skip the
+extra perf_counter() calls entirely. When the response starts, the middleware adds the
+serialization stage (handler return to first byte) and records everything at once.
+
+All timings use time.perf_counter(), so they are monotonic and immune to clock changes.
+
+Functions:
+    Registry.counter(name, help, labels, collect): Registers a Counter.
+    Registry.gauge(name, help, labels, collect): Registers a Gauge. With collect set, either
+        is read from collect() at scrape time instead of being recorded.
+    Registry.histogram(name, help, labels, buckets): Registers a Histogram.
+    Registry.render(): Returns the text exposition of every metric.
+    Trace.add(stage, seconds), Trace.count(name, amount): Records one request's stages.
+    SearchMetrics(registry): The request, query, stage, result and candidate metrics.
+    MetricsMiddleware(app, metrics, slow_log, trace_header): ASGI middleware that times
+        requests, records traces and optionally passes them to a slow-query log and adds
+        them to responses as a header (see src.profiling).
+"""
+
+import bisect
+import math
+import threading
+import time
+
+# Seconds; from 10 microseconds (one cached lookup) up to a slow full scan
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                   0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RESULT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+CANDIDATE_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _Scalar(_Metric):
+    # One number per label set, either recorded or read from collect() at every scrape
+    def __init__(self, name, help, labels=(), collect=None):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        values = self.collect() if self.collect is not None else dict(self._values)
+        lines = self._header()
+        for labels, value in sorted(values.items()):
+            if value is not None:
+                lines.append(f"{self.name}{_labels(self.labels, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Scalar):
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Scalar):
+    kind = "gauge"
+
+    def set(self, value, labels=()):
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=()):
+        # Bucket i counts values <= buckets[i]; the last slot is +Inf
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    def count(self, labels=()):
+        series = self._values.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._values.items())
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=(), collect=None):
+        return self._register(Counter(name, help, labels, collect))
+
+    def gauge(self, name, help, labels=(), collect=None):
+        return self._register(Gauge(name, help, labels, collect))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class Trace:
+    __slots__ = ("start", "endpoint", "algorithm", "cache_used", "results", "stages", "counts", "handler_end")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.endpoint = None
+        self.algorithm = None
+        self.cache_used = False
+        self.results = None
+        # Seconds per stage and per-request counts, in the order they were recorded
+        self.stages = {}
+        self.counts = {}
+        self.handler_end = None
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def count(self, name, amount):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def finish(self, results):
+        # Called by a handler once its response is ready to serialize
+        self.results = results
+        self.handler_end = time.perf_counter()
+
+
+class SearchMetrics:
+    def __init__(self, registry):
+        self.registry = registry
+        self.requests = registry.counter(
+            "search_http_requests_total", "HTTP requests by route, method and status code.",
+            ("handler", "method", "code"))
+        self.request_duration = registry.histogram(
+            "search_http_request_duration_seconds", "Time from request to first response byte.",
+            ("handler",))
+        self.query_duration = registry.histogram(
+            "search_query_duration_seconds", "Time until a search response is ready to serialize, by endpoint, algorithm and cache use.",
+            ("endpoint", "algorithm", "cache"))
+        self.stage_duration = registry.histogram(
+            "search_stage_duration_seconds", "Time spent in each stage of a search.",
+            ("endpoint", "stage"))
+        self.results = registry.histogram(
+            "search_results", "Results returned per search.", ("endpoint",), RESULT_BUCKETS)
+        self.candidates = registry.histogram(
+            "search_candidates", "Candidates examined per uncached search.",
+            ("endpoint", "algorithm"), CANDIDATE_BUCKETS)
+
+    def record(self, handler, method, status, seconds, trace):
+        self.requests.inc((handler, method, str(status)))
+        self.request_duration.observe(seconds, (handler,))
+        if trace is None or trace.endpoint is None or trace.handler_end is None:
+            return
+        endpoint = trace.endpoint
+        self.query_duration.observe(trace.handler_end - trace.start, (endpoint, trace.algorithm, "hit" if trace.cache_used else "miss"))
+        for stage, stage_seconds in trace.stages.items():
+            self.stage_duration.observe(stage_seconds, (endpoint, stage))
+        if trace.results is not None:
+            self.results.observe(trace.results, (endpoint,))
+        candidates = trace.counts.get("candidates")
+        if candidates is not None:
+            self.candidates.observe(candidates, (endpoint, trace.algorithm))
+
+
+class MetricsMiddleware:
+    # metrics may be None when only the slow-query log or trace headers are enabled
+    def __init__(self, app, metrics, slow_log=None, trace_header=None):
+        self.app = app
+        self.metrics = metrics
+        self.slow_log = slow_log
+        self.trace_header = trace_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = Trace()
+        start = trace.start
+        scope.setdefault("state", {})["trace"] = trace
+        status = 500
+        first_byte = None
+        # Trace headers only for requests that ask for one with an X-Search-Trace header
+        traced = self.trace_header is not None and any(name == b"x-search-trace" for name, _ in scope["headers"])
+
+        async def send_timed(message):
+            nonlocal status, first_byte
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                first_byte = time.perf_counter()
+                if trace.handler_end is not None:
+                    trace.add("serialize", first_byte - trace.handler_end)
+                if traced:
+                    value = self.trace_header(trace, first_byte - start)
+                    message["headers"] = list(message.get("headers", ())) + [(b"server-timing", value.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            seconds = (first_byte or time.perf_counter()) - start
+            route = scope.get("route")
+            handler = getattr(route, "path", None) or "unmatched"
+            if self.metrics is not None:
+                self.metrics.record(handler, scope["method"], status, seconds, trace)
+            if self.slow_log is not None:
+                self.slow_log.observe(scope, status, seconds, trace)
@@ -0,0 +1,97 @@
+"""
+Bounded Offloading and Single-Flight Coalescing
+
+This module keeps slow searches off the event loop without letting them pile up. A
+BoundedPool runs blocking calls in an executor (threads, or processes for CPU-bound fuzzy
+search) and refuses new work once max_pending calls are queued or running, so an overload
+is answered at once with an error instead of growing an unbounded backlog. SingleFlight
+runs identical concurrent requests once: callers that arrive while a call with the same
+key is in flight wait for its result instead of starting their own.
+
+Both are meant to be used from one event loop; their counters need no locking.
+
+Process pool workers cannot see the parent's index, so they attach to a snapshot file:
+init_snapshot_worker maps it once per worker, and the pages are shared with every other
+process that maps the same file.
+
+Functions:
+    Overloaded: Raised by BoundedPool.run when the pool is full.
+    BoundedPool(executor, max_pending).run(fn, *args): Awaits fn(*args) in the executor.
+    SingleFlight().do(key, make_call): Awaits make_call() unless the key is in flight;
+        returns (result, shared).
+    init_snapshot_worker(path): Process pool initializer that maps the snapshot.
+    snapshot_fuzzy(engine, query, max_distance): Runs a fuzzy engine in a pool worker.
+"""
+
+import asyncio
+
+from src.fuzzy_search import fuzzy_search, trie_fuzzy_search
+
+
+class Overloaded(Exception):
+    pass
+
+
+class BoundedPool:
+    def __init__(self, executor, max_pending=64):
+        self.executor = executor
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.shed = 0
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.shed += 1
+            raise Overloaded(f"{self.pending} searches already queued")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "shed": self.shed,
+        }
+
+
+class SingleFlight:
+    def __init__(self):
+        self.flights = {}
+        self.coalesced = 0
+
+    async def do(self, key, make_call):
+        flight = self.flights.get(key)
+        shared = flight is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            flight = asyncio.ensure_future(make_call())
+            self.flights[key] = flight
+            flight.add_done_callback(lambda _: self.flights.pop(key, None))
+        # A cancelled caller must not cancel the call the others are waiting for
+        return await asyncio.shield(flight), shared
+
+
+# Set in process pool workers by init_snapshot_worker
+_snapshot = None
+
+
+def init_snapshot_worker(path):
+    global _snapshot
+    # Imported in the worker: src.snapshot loads NumPy for the packed arrays
+    from src.snapshot import load_snapshot
+    _snapshot = load_snapshot(path)
+
+
+def snapshot_fuzzy(engine, query, max_distance):
+    if engine == "bitparallel":
+        return _snapshot.bitparallel.search(query, max_distance)
+    if engine == "trie":
+        return trie_fuzzy_search(query, max_distance, _snapshot)
+    return fuzzy_search(query, max_distance, _snapshot.terms)
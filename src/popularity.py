@@ -0,0 +1,177 @@
+"""
+Popularity Counters for Ranking
+
+This module tracks how often each term is searched for or picked, and blends those counts
+into ranking. Recording sits on the request path, so it is a single deque append: CPython
+makes that atomic, and no lock is taken. A background flush (every flush_interval seconds)
+drains the events into the counters and drops terms the index does not hold. Every
+decay_interval seconds it also applies exponential decay with the configured half-life.
+Only the max_terms most popular terms are kept. Each flush publishes an immutable
+PopularitySnapshot with one assignment, and readers only ever read that.
+
+Counts enter ranking through log1p, so a term a thousand times more popular gets a
+bounded, not a thousandfold, lift:
+
+    autocomplete  weight + boost * log1p(count)
+    fuzzy         similarity + fuzzy_boost * log1p(count); the reported score is unchanged
+
+A prefix query ranks exactly: terms without a count keep their order by weight, so the
+trie's best `limit` completions plus every popular term under the prefix (found by binary
+search in the snapshot's sorted term list) hold the blended top `limit`.
+
+Functions:
+    Popularity(boost, fuzzy_boost, half_life, decay_interval, max_terms): Creates empty counters.
+    Popularity.record(term, amount): Counts a served query or a selection.
+    Popularity.flush(weight_of): Applies pending events and decay; publishes a snapshot.
+    Popularity.forget(term): Drops a deleted term right away.
+    Popularity.rank(entries, limit, prefix): Blends counts into (-weight, word) entries.
+    Popularity.rank_fuzzy(matches): Reorders (word, similarity_score) matches.
+    Popularity.start(weight_of, flush_interval): Flushes periodically on a daemon thread.
+"""
+
+import bisect
+import heapq
+import math
+import threading
+import time
+from collections import deque, namedtuple
+
+# counts maps term -> decayed count; terms is sorted (term, weight) for prefix lookups
+PopularitySnapshot = namedtuple("PopularitySnapshot", ["counts", "terms", "keys"])
+
+_EMPTY = PopularitySnapshot({}, (), ())
+# Decayed counts below this are dropped
+_MIN_COUNT = 0.05
+
+
+class Popularity:
+    def __init__(self, boost=1.0, fuzzy_boost=0.02, half_life=3600.0, decay_interval=60.0,
+                 max_terms=10000, max_pending=1 << 16):
+        self.boost = boost
+        self.fuzzy_boost = fuzzy_boost
+        self.half_life = half_life
+        self.decay_interval = decay_interval
+        self.max_terms = max_terms
+        self.snapshot = _EMPTY
+        # Oldest events are dropped if flushes fall behind
+        self._events = deque(maxlen=max_pending)
+        self._counts = {}
+        self._weights = {}
+        self._flush_lock = threading.Lock()
+        self._last_decay = time.monotonic()
+        self._stop = None
+
+    def record(self, term, amount=1.0):
+        self._events.append((term, amount))
+
+    def flush(self, weight_of):
+        """
+        Apply pending events, and decay once decay_interval has passed. weight_of(term)
+        returns the term's weight in the index, or None if it is not indexed; unknown
+        terms are not counted. Only terms seen since the last flush are looked up, except
+        when decaying, which revalidates every counted term.
+        """
+        with self._flush_lock:
+            counts = self._counts
+            events = self._events
+            touched = set()
+            while True:
+                try:
+                    term, amount = events.popleft()
+                except IndexError:
+                    break
+                counts[term] = counts.get(term, 0.0) + amount
+                touched.add(term)
+            now = time.monotonic()
+            elapsed = now - self._last_decay
+            if elapsed >= self.decay_interval:
+                self._last_decay = now
+                factor = 0.5 ** (elapsed / self.half_life) if self.half_life else 1.0
+                for term in counts:
+                    counts[term] *= factor
+                touched = set(counts)
+            elif not touched:
+                return
+            for term in touched:
+                weight = weight_of(term) if counts[term] >= _MIN_COUNT else None
+                if weight is None:
+                    del counts[term]
+                    self._weights.pop(term, None)
+                else:
+                    self._weights[term] = weight
+            if len(counts) > self.max_terms:
+                kept = heapq.nlargest(self.max_terms, counts.items(), key=lambda item: item[1])
+                counts.clear()
+                counts.update(kept)
+                self._weights = {term: self._weights[term] for term in counts}
+            self._publish()
+
+    def _publish(self):
+        # Called with the flush lock held
+        terms = tuple(sorted((term, self._weights[term]) for term in self._counts))
+        self.snapshot = PopularitySnapshot(dict(self._counts), terms, tuple(term for term, _ in terms))
+
+    def forget(self, term):
+        with self._flush_lock:
+            if self._counts.pop(term, None) is not None:
+                del self._weights[term]
+                self._publish()
+
+    def rank(self, entries, limit=None, prefix=None):
+        """
+        Rank (-weight, word) entries, best first, by weight plus popularity. With prefix
+        set, popular terms under it are considered too, so entries only needs the best
+        `limit` completions by weight. Returns words.
+        """
+        snapshot = self.snapshot
+        if not snapshot.counts or not self.boost:
+            return [word for _, word in entries[:limit]]
+        candidates = {word: -negative_weight for negative_weight, word in entries}
+        if prefix is not None:
+            for i in range(bisect.bisect_left(snapshot.keys, prefix), len(snapshot.keys)):
+                term, weight = snapshot.terms[i]
+                if not term.startswith(prefix):
+                    break
+                # A weight seen in entries is fresher than the snapshot's
+                candidates.setdefault(term, weight)
+        counts = snapshot.counts
+        boost = self.boost
+        blended = [
+            (-(weight + boost * math.log1p(counts.get(word, 0.0))), word)
+            for word, weight in candidates.items()
+        ]
+        if limit is not None:
+            blended = heapq.nsmallest(limit, blended)
+        else:
+            blended.sort()
+        return [word for _, word in blended]
+
+    def rank_fuzzy(self, matches):
+        snapshot = self.snapshot
+        if not snapshot.counts or not self.fuzzy_boost:
+            return matches
+        counts = snapshot.counts
+        boost = self.fuzzy_boost
+        # Stable, so unpopular matches keep their order
+        return sorted(matches, key=lambda match: match[1] + boost * math.log1p(counts.get(match[0], 0.0)), reverse=True)
+
+    def start(self, weight_of, flush_interval=1.0):
+        # Flushes on a daemon thread until stop() is called
+        self._stop = threading.Event()
+
+        def run(stop):
+            while not stop.wait(flush_interval):
+                self.flush(weight_of)
+
+        threading.Thread(target=run, args=(self._stop,), daemon=True, name="popularity-flush").start()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    def stats(self) -> dict:
+        return {
+            "terms": len(self.snapshot.counts),
+            "pending": len(self._events),
+            "half_life_s": self.half_life,
+        }
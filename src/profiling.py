@@ -0,0 +1,156 @@
+"""
+Slow-Query Log, Request Traces and a Sampling Profiler
+
+This module turns the per-request Trace from src.metrics into debugging output. Nothing
+here runs unless it is switched on.
+
+    slow-query log   SlowQueryLog.observe is called once per finished request. Searches
+                     slower than the threshold are kept in a bounded ring buffer and logged
+                     as one JSON line each to the "search.slow" logger: path, parameters,
+                     status, algorithm, cache use, result and candidate counts and the time
+                     of every stage. sample_rate keeps only a random fraction of them, so a
+                     spike cannot flood the log.
+    request traces   server_timing(trace, seconds) renders a trace as a Server-Timing
+                     header (shown by browser developer tools), with one entry per stage,
+                     the total, and the counts as descriptions.
+    profiler         SamplingProfiler.run(seconds) snapshots the stack of every other
+                     thread every `interval` seconds with sys._current_frames() and counts
+                     the stacks. It adds no hooks to the code it observes, so it is safe to
+                     run briefly on a live server. Only stacks that pass through a file under
+                     one of the `include` directories (relative to the working directory)
+                     are kept, and stacks of blocked threads (IDLE_FRAMES) are dropped.
+
+Functions:
+    SlowQueryLog(threshold_ms, size, sample_rate): Creates an empty log.
+    SlowQueryLog.observe(scope, status, seconds, trace): Records the search if it was slow.
+    SlowQueryLog.entries(): Returns the retained entries, newest last.
+    server_timing(trace, seconds): Returns a Server-Timing header value.
+    SamplingProfiler(interval, include).run(seconds): Returns a profile report dict.
+"""
+
+import collections
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import parse_qsl
+
+logger = logging.getLogger("search.slow")
+
+# Innermost frames of threads that are blocked, not working: pool workers waiting for a
+# task, background loops sleeping between flushes, the event loop waiting for sockets
+IDLE_FRAMES = tuple(os.sep + name for name in (
+    "threading.py:wait", "queue.py:get", "selectors.py:select", "threading.py:_wait_for_tstate_lock",
+))
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms, size=100, sample_rate=1.0):
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self._entries = collections.deque(maxlen=size)
+        self.slow = 0
+
+    def observe(self, scope, status, seconds, trace):
+        # Only searches, i.e. requests whose handler filled in the trace
+        if seconds < self.threshold or trace is None or trace.endpoint is None:
+            return
+        self.slow += 1
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        entry = {
+            "time": time.time(),
+            "path": scope["path"],
+            "params": dict(parse_qsl(scope.get("query_string", b"").decode("latin-1"))),
+            "status": status,
+            "total_ms": round(seconds * 1000, 3),
+            "endpoint": trace.endpoint,
+            "algorithm": trace.algorithm,
+            "cache_used": trace.cache_used,
+            "results": trace.results,
+            "counts": dict(trace.counts),
+            "stages_ms": {stage: round(value * 1000, 3) for stage, value in trace.stages.items()},
+        }
+        self._entries.append(entry)
+        logger.warning("slow query %s", json.dumps(entry, ensure_ascii=False))
+
+    def entries(self):
+        return list(self._entries)
+
+    def stats(self) -> dict:
+        return {"threshold_ms": self.threshold * 1000, "slow": self.slow, "retained": len(self._entries)}
+
+
+def server_timing(trace, seconds):
+    # Stage names are plain identifiers, so they need no quoting
+    parts = [f"{stage};dur={value * 1000:.3f}" for stage, value in trace.stages.items()]
+    label = f"{trace.algorithm} {'hit' if trace.cache_used else 'miss'}" if trace.algorithm else "request"
+    parts.append(f'total;dur={seconds * 1000:.3f};desc="{label}"')
+    parts.extend(f'{name};desc="{value}"' for name, value in trace.counts.items())
+    if trace.results is not None:
+        parts.append(f'results;desc="{trace.results}"')
+    return ", ".join(parts)
+
+
+def _location(code):
+    # Paths relative to the working directory keep the report short
+    filename = code.co_filename
+    try:
+        filename = os.path.relpath(filename)
+    except ValueError:
+        pass
+    return f"{filename}:{code.co_name}"
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, include=("src" + os.sep, "api" + os.sep)):
+        self.interval = interval
+        self.include = include
+
+    def run(self, seconds):
+        """
+        Sample for `seconds` and return the number of sampling rounds, the kept stacks as
+        collapsed "caller;callee" lines with counts (the input format of flame graph
+        tools), and per-function inclusive and self sample counts, most expensive first.
+        """
+        own = threading.get_ident()
+        stacks = collections.Counter()
+        rounds = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_location(frame.f_code))
+                    frame = frame.f_back
+                if stack and stack[0].endswith(IDLE_FRAMES):
+                    continue
+                if any(location.startswith(self.include) for location in stack):
+                    stacks[tuple(reversed(stack))] += 1
+            rounds += 1
+            time.sleep(self.interval)
+
+        inclusive = collections.Counter()
+        exclusive = collections.Counter()
+        for stack, count in stacks.items():
+            for location in set(stack):
+                inclusive[location] += count
+            exclusive[stack[-1]] += count
+        functions = [
+            {"function": location, "inclusive": count, "self": exclusive[location]}
+            for location, count in inclusive.most_common()
+            if location.startswith(self.include)
+        ]
+        return {
+            "seconds": seconds,
+            "interval_ms": self.interval * 1000,
+            "rounds": rounds,
+            "samples": sum(stacks.values()),
+            "functions": functions,
+            "stacks": [f"{';'.join(stack)} {count}" for stack, count in stacks.most_common()],
+        }
@@ -0,0 +1,81 @@
+"""
+Multi-Worker Serving from a Shared Index
+
+This module runs the API in several uvicorn worker processes that share one read-only
+copy of the index. The corpus is loaded once, in the parent, and written as a binary
+snapshot (with the packed bit-parallel arrays) to a RAM-backed directory such as /dev/shm.
+Every worker then starts in snapshot mode and maps that file, so the trie, the term table
+and the fuzzy search arrays live once in the page cache no matter how many workers run,
+and a worker starts without parsing the corpus.
+
+Functions:
+    shared_dir(): Returns /dev/shm if it exists, else the system temp directory.
+    prepare_snapshot(source, directory, top_k): Builds the shared snapshot; returns its path.
+    fuzzy_processes_per_worker(workers): Returns each worker's share of the CPUs for its
+        fuzzy search process pool, at least 1.
+
+Usage:
+    python -m src.serve --workers 4 --data data/demo_data.json
+"""
+
+import argparse
+import os
+import tempfile
+
+
+def shared_dir():
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def prepare_snapshot(source, directory=None, top_k=10):
+    from src.init_data import load_corpus
+    from src.snapshot import write_snapshot
+    from src.trie import Trie
+
+    directory = directory or shared_dir()
+    fd, path = tempfile.mkstemp(prefix="search-index-", suffix=".snap", dir=directory)
+    os.close(fd)
+    try:
+        write_snapshot(load_corpus(Trie(top_k=top_k), source), path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def fuzzy_processes_per_worker(workers):
+    # Every worker starts its own pool, so together they get about one process per CPU
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the API from several workers sharing one index.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data", default=os.environ.get("SEARCH_DATA", "./data/demo_data.json"),
+                        help="Corpus to build the shared snapshot from")
+    parser.add_argument("--snapshot", default=os.environ.get("SEARCH_SNAPSHOT"),
+                        help="Serve an existing snapshot instead of building one")
+    parser.add_argument("--top-k", type=int, default=10, help="Cached completions per node")
+    args = parser.parse_args()
+
+    path = args.snapshot
+    built = path is None
+    if built:
+        path = prepare_snapshot(args.data, top_k=args.top_k)
+        print(f"Built shared snapshot {path}")
+    # Workers inherit the environment and attach to the snapshot on import
+    os.environ["SEARCH_SNAPSHOT"] = path
+    os.environ.setdefault("FUZZY_PROCESSES", str(fuzzy_processes_per_worker(args.workers)))
+    try:
+        uvicorn.run("api.app:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if built:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Sharded Index with Scatter-Gather Queries
+
+This module splits the corpus across local shard processes and answers queries by
+fanning them out in parallel and merging the partial results. Each shard process holds
+two partitions:
+
+    prefix range  a contiguous slice of the sorted terms, held in a Trie. All completions
+                  of a prefix are one contiguous run of the sorted order, so an autocomplete
+                  query only goes to the shards whose range can hold that run (usually one).
+    hash bucket   the terms whose CRC-32 falls into this shard, for fuzzy search. Every
+                  fuzzy query has to visit every term, so buckets keep the work balanced.
+
+Terms are numbered in sorted order. Shards return autocomplete entries as (-weight, word)
+and fuzzy matches as (score, term ID, word), both already ranked, so the coordinator only
+merges: ties between shards are broken exactly as a single index would break them, and a
+limit is applied on the shards and again after the merge.
+
+Shards are plain subprocesses (python -m src.sharding) talking over a pair of pipes.
+Requests carry an ID, and one receiver thread per shard resolves the matching futures,
+so concurrent callers share the pipes. With a timeout set, a query that has not heard
+from every shard by then raises ShardTimeout instead of blocking its caller; a reply that
+arrives later is dropped.
+
+Functions:
+    ShardTimeout: Raised when a shard does not answer within the timeout.
+    ShardedIndex(items, shard_count, symspell_max_distance, timeout): Starts the shards.
+    ShardedIndex.search(prefix, limit): Autocomplete over all shards, like Trie.search.
+    ShardedIndex.fuzzy(query, max_distance, limit): Returns the same (word, similarity_score)
+        tuples as fuzzy_search over the sorted terms, in the same order.
+    ShardedIndex.close(): Stops the shard processes.
+"""
+
+import heapq
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing.connection import Connection
+
+from src.fuzzy_search import fuzzy_search
+from src.init_data import build_symspell_index
+from src.trie import Trie, TrieBuilder
+
+
+def shard_for_term(term, shard_count):
+    # Stable across processes, unlike hash()
+    return zlib.crc32(term.encode("utf-8")) % shard_count
+
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_shard(requests, replies):
+    # The first message is the partition: sorted (term, weight) pairs, (ID, term) pairs
+    # and the deletion index distance
+    ranged, bucket, symspell_max_distance = requests.recv()
+    trie = Trie()
+    builder = TrieBuilder(trie)
+    for term, weight in ranged:
+        builder.add(term, weight)
+    builder.finish()
+
+    term_ids = [term_id for term_id, _ in bucket]
+    words = [term for _, term in bucket]
+    symspell = None
+    if symspell_max_distance > 0:
+        symspell = build_symspell_index(words, max_distance=symspell_max_distance)
+    try:
+        # Imported in the shard process, so the coordinator never loads NumPy
+        from src.bitparallel import BitParallelMatcher
+        bitparallel = BitParallelMatcher(words)
+    except ImportError:
+        bitparallel = None
+    id_of = dict(zip(words, term_ids))
+
+    def fuzzy(query, max_distance, limit):
+        if symspell is not None and max_distance <= symspell.max_distance:
+            matches = symspell.search(query, max_distance)
+        elif bitparallel is not None:
+            matches = bitparallel.search(query, max_distance)
+        else:
+            matches = fuzzy_search(query, max_distance, words)
+        return [(score, id_of[word], word) for word, score in matches[:limit]]
+
+    handlers = {
+        "ranked": trie.ranked,
+        "fuzzy": fuzzy,
+        "memory_usage": lambda: trie.memory_usage() + sum(map(len, words)),
+    }
+    while True:
+        try:
+            request = requests.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        request_id, method, args = request
+        try:
+            reply = (True, handlers[method](*args))
+        except Exception as exc:
+            reply = (False, exc)
+        replies.send((request_id, reply))
+
+
+class ShardTimeout(TimeoutError):
+    pass
+
+
+class _Shard:
+    def __init__(self, first, last):
+        # Requests go down one pipe, replies come back on the other
+        read_requests, write_requests = os.pipe()
+        read_replies, write_replies = os.pipe()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "src.sharding", str(read_requests), str(write_replies)],
+            pass_fds=(read_requests, write_replies),
+            cwd=_PROJECT_ROOT,
+        )
+        os.close(read_requests)
+        os.close(write_replies)
+        self.requests = Connection(write_requests, readable=False)
+        self.replies = Connection(read_replies, writable=False)
+        # Smallest and largest term of the prefix range, None if the range is empty
+        self.first = first
+        self.last = last
+        self.send_lock = threading.Lock()
+        self.receiver = None
+        self.exited = False
+
+    def may_hold_prefix(self, prefix):
+        # Completions of prefix sort from prefix up to the first larger string not
+        # starting with it, so the range overlaps them only under these bounds
+        if self.first is None or self.last < prefix:
+            return False
+        return self.first < prefix or self.first.startswith(prefix)
+
+
+class ShardedIndex:
+    def __init__(self, items, shard_count=2, symspell_max_distance=0, timeout=None):
+        """
+        items are plain terms or (term, weight) pairs; a repeated term keeps its last
+        weight. Shards are fresh interpreters, so they hold no copy of the parent beyond
+        their own partitions. timeout is how many seconds a query waits for all shards;
+        None waits forever.
+        """
+        if shard_count < 1:
+            raise ValueError("shard_count must be at least 1")
+        weights = {}
+        for item in items:
+            term, weight = (item, 0.0) if isinstance(item, str) else item
+            weights[term] = weight
+        terms = sorted(weights)
+        self.size = len(terms)
+        self.timeout = timeout
+        buckets = [[] for _ in range(shard_count)]
+        for term_id, term in enumerate(terms):
+            buckets[shard_for_term(term, shard_count)].append((term_id, term))
+
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self.shards = []
+        for i in range(shard_count):
+            ranged = terms[len(terms) * i // shard_count:len(terms) * (i + 1) // shard_count]
+            shard = _Shard(ranged[0] if ranged else None, ranged[-1] if ranged else None)
+            shard.requests.send(([(term, weights[term]) for term in ranged], buckets[i], symspell_max_distance))
+            shard.receiver = threading.Thread(target=self._receive, args=(shard,), daemon=True)
+            shard.receiver.start()
+            self.shards.append(shard)
+
+    def __len__(self):
+        return self.size
+
+    def _receive(self, shard):
+        while True:
+            try:
+                request_id, (ok, value) = shard.replies.recv()
+            except (EOFError, OSError):
+                break
+            with self._pending_lock:
+                pending = self._pending.pop(request_id, None)
+            if pending is None:
+                continue  # The caller timed out and stopped waiting
+            future = pending[1]
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        # The shard is gone: fail whatever was still waiting on it
+        with self._pending_lock:
+            shard.exited = True
+            lost = [request_id for request_id, (owner, _) in self._pending.items() if owner is shard]
+            futures = [self._pending.pop(request_id)[1] for request_id in lost]
+        for future in futures:
+            future.set_exception(RuntimeError("Shard process exited"))
+
+    def _scatter(self, shards, method, *args):
+        # Send the request to every shard first, then wait, so they all work in parallel
+        futures = []
+        request_ids = []
+        for shard in shards:
+            request_id = next(self._request_ids)
+            future = Future()
+            futures.append(future)
+            request_ids.append(request_id)
+            with self._pending_lock:
+                if shard.exited:
+                    future.set_exception(RuntimeError("Shard process exited"))
+                    continue
+                self._pending[request_id] = (shard, future)
+            try:
+                with shard.send_lock:
+                    shard.requests.send((request_id, method, args))
+            except OSError:
+                with self._pending_lock:
+                    self._pending.pop(request_id, None)
+                future.set_exception(RuntimeError("Shard process exited"))
+        if self.timeout is None:
+            return [future.result() for future in futures]
+        deadline = time.monotonic() + self.timeout
+        try:
+            return [future.result(timeout=max(0.0, deadline - time.monotonic())) for future in futures]
+        except FutureTimeout:
+            with self._pending_lock:
+                for request_id in request_ids:
+                    self._pending.pop(request_id, None)
+            raise ShardTimeout(f"Shards did not answer {method} within {self.timeout:g}s") from None
+
+    def ranked(self, prefix, limit=None, trace=None):
+        start = time.perf_counter() if trace is not None else None
+        shards = [shard for shard in self.shards if shard.may_hold_prefix(prefix)]
+        if not shards:
+            return []
+        # Prefix ranges are disjoint, so every entry is distinct
+        partials = self._scatter(shards, "ranked", prefix, limit)
+        if trace is not None:
+            gathered = time.perf_counter()
+            trace.add("scatter", gathered - start)
+        entries = list(itertools.islice(heapq.merge(*partials), limit))
+        if trace is not None:
+            trace.add("merge", time.perf_counter() - gathered)
+        return entries
+
+    def search(self, prefix, limit=None):
+        return [term for _, term in self.ranked(prefix, limit)]
+
+    def fuzzy(self, query, max_distance, limit=None, trace=None):
+        start = time.perf_counter() if trace is not None else None
+        partials = self._scatter(self.shards, "fuzzy", query, max_distance, limit)
+        if trace is not None:
+            gathered = time.perf_counter()
+            trace.add("scatter", gathered - start)
+        # Best score first, then corpus order, as in a stable sort over the whole corpus
+        merged = heapq.merge(*partials, key=lambda match: (-match[0], match[1]))
+        matches = [(word, score) for score, _, word in itertools.islice(merged, limit)]
+        if trace is not None:
+            trace.add("merge", time.perf_counter() - gathered)
+        return matches
+
+    def memory_usage(self):
+        # Summed over the shard processes
+        return sum(self._scatter(self.shards, "memory_usage"))
+
+    def bytes_per_term(self):
+        return self.memory_usage() / self.size if self.size else 0.0
+
+    def close(self):
+        for shard in self.shards:
+            with shard.send_lock:
+                try:
+                    shard.requests.send(None)
+                except OSError:
+                    pass
+                shard.requests.close()
+        for shard in self.shards:
+            try:
+                shard.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                shard.process.kill()
+                shard.process.wait()
+            shard.receiver.join()
+            shard.replies.close()
+
+
+def main():
+    _run_shard(Connection(int(sys.argv[1]), writable=False), Connection(int(sys.argv[2]), readable=False))
+
+
+if __name__ == "__main__":
+    main()
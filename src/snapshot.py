@@ -0,0 +1,364 @@
+"""
+Binary Index Snapshots
+
+This module serializes a finished Trie into a flat binary file and serves queries straight
+from a memory-mapped view of it, so startup only has to open and map the file instead of
+parsing the corpus and inserting every term.
+
+File layout (little-endian):
+    header   magic, version, node/term counts, top_k and section offsets
+    nodes    fixed-size records in breadth-first order; the children of a node are
+             contiguous and sorted by the first character of their label
+    terms    one record per term: string offset, byte length, weight
+    tops     the cached top_k term IDs of every node, back to back
+    strings  UTF-8 pool holding edge labels and full terms
+    packed   optional, 8-byte aligned: the BitParallelMatcher arrays over the terms
+             (length order, column offsets, character codes) and its alphabet
+
+Term IDs follow depth-first order over sorted children, so terms are stored sorted.
+Every section is read in place: several processes mapping the same file share one copy
+of the index in the page cache, including the packed fuzzy search arrays.
+
+Functions:
+    write_snapshot(trie, path, packed): Writes the trie to path, plus the bit-parallel
+        arrays if packed is True and NumPy is available.
+    load_snapshot(path): Returns a MappedTrie with the same search(prefix, limit) API.
+        Its bitparallel attribute is a matcher over the mapped arrays, or None.
+
+Usage:
+    python -m src.snapshot data/demo_data.json data/index.snap
+"""
+
+import argparse
+import heapq
+import mmap
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Sequence
+
+from src.bitparallel import BitParallelMatcher, np
+
+MAGIC = b"IMSE"
+VERSION = 2
+# magic, version, reserved, node/term counts, top_k, nodes/terms/tops/strings/packed offsets
+HEADER = struct.Struct("<4sHHIIIQQQQQ")
+# first char, label offset, label length, first child, child count, term ID, top start, top count
+NODE = struct.Struct("<IQIIIiII")
+# string offset, byte length, weight
+TERM = struct.Struct("<QId")
+TOP_ID = struct.Struct("<I")
+# column offset count, character code count, alphabet byte length
+PACKED = struct.Struct("<QQQ")
+
+
+def _pack_matcher(words):
+    # Returns the packed section as bytes, or None without numpy
+    if np is None:
+        return None
+    matcher = BitParallelMatcher(words)
+    alphabet = "".join(matcher.alphabet).encode("utf-8")
+    column_offsets = matcher.column_offsets.astype("<i8")
+    codes = matcher.codes.astype("<i4")
+    return b"".join([
+        PACKED.pack(len(column_offsets), len(codes), len(alphabet)),
+        matcher.order.astype("<i8").tobytes(),
+        column_offsets.tobytes(),
+        codes.tobytes(),
+        alphabet,
+    ])
+
+
+def write_snapshot(trie, path, packed=True):
+    # Pass 1: term IDs in depth-first order over sorted children
+    term_ids = {}
+    terms = []
+    stack = [(trie.root, trie.root.label)]
+    while stack:
+        node, word = stack.pop()
+        if node.is_end_of_word:
+            term_ids[word] = len(terms)
+            terms.append((word, node.weight))
+        if node.children:
+            for _, child in sorted(node.children.items(), reverse=True):
+                stack.append((child, word + child.label))
+
+    strings = bytearray()
+
+    def add_string(text):
+        offset = len(strings)
+        encoded = text.encode("utf-8")
+        strings.extend(encoded)
+        return offset, len(encoded)
+
+    term_records = [TERM.pack(*add_string(word), weight) for word, weight in terms]
+
+    # Pass 2: breadth-first node layout so siblings are contiguous
+    order = [(trie.root, trie.root.label)]
+    node_records = []
+    tops = array("I")
+    next_child = 1
+    for node, word in order:
+        children = sorted(node.children.items()) if node.children else []
+        label_offset, label_length = add_string(node.label)
+        top_start = len(tops)
+        tops.extend(term_ids[term] for _, term in node.top)
+        node_records.append(NODE.pack(
+            ord(node.label[0]) if node.label else 0,
+            label_offset, label_length,
+            next_child, len(children),
+            term_ids[word] if node.is_end_of_word else -1,
+            top_start, len(tops) - top_start,
+        ))
+        for _, child in children:
+            order.append((child, word + child.label))
+        next_child += len(children)
+
+    nodes_offset = HEADER.size
+    terms_offset = nodes_offset + len(node_records) * NODE.size
+    tops_offset = terms_offset + len(term_records) * TERM.size
+    strings_offset = tops_offset + len(tops) * TOP_ID.size
+    packed_section = _pack_matcher([word for word, _ in terms]) if packed else None
+    packed_offset = 0
+    padding = b""
+    if packed_section is not None:
+        # Align so the arrays can be viewed in place
+        end = strings_offset + len(strings)
+        padding = bytes(-end % 8)
+        packed_offset = end + len(padding)
+    # The file is little-endian like the struct records
+    if sys.byteorder == "big":
+        tops.byteswap()
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(node_records), len(terms), trie.top_k,
+                            nodes_offset, terms_offset, tops_offset, strings_offset, packed_offset))
+        f.writelines(node_records)
+        f.writelines(term_records)
+        f.write(tops.tobytes())
+        f.write(strings)
+        if packed_section is not None:
+            f.write(padding)
+            f.write(packed_section)
+
+
+class MappedTerms(Sequence):
+    """Read-only list view of the terms in a snapshot, materialized on access."""
+
+    def __init__(self, trie):
+        self._trie = trie
+
+    def __len__(self):
+        return self._trie.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("term index out of range")
+        return self._trie.term(index)[0]
+
+
+class MappedNode:
+    """TrieNode look-alike over one node record, so trie walkers work unchanged."""
+
+    __slots__ = ("_trie", "_index", "label", "is_end_of_word", "weight")
+
+    def __init__(self, trie, index):
+        self._trie = trie
+        self._index = index
+        _, label_offset, label_length, _, _, term_id, _, _ = trie._node(index)
+        self.label = trie._string(label_offset, label_length)
+        self.is_end_of_word = term_id >= 0
+        self.weight = trie.term(term_id)[1] if term_id >= 0 else 0.0
+
+    @property
+    def children(self):
+        _, _, _, first, count, _, _, _ = self._trie._node(self._index)
+        if not count:
+            return None
+        nodes = (MappedNode(self._trie, i) for i in range(first, first + count))
+        return {child.label[0]: child for child in nodes}
+
+    @property
+    def top(self):
+        return self._trie._top(self._index)
+
+
+class MappedTrie:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.node_count, self.size, self.top_k, self._nodes_offset,
+         self._terms_offset, self._tops_offset, self._strings_offset,
+         packed_offset) = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION:
+            self._buffer.close()
+            raise ValueError(f"{path} is not a version {VERSION} index snapshot")
+        self.terms = MappedTerms(self)
+        self.bitparallel = None
+        if packed_offset and np is not None:
+            self.bitparallel = self._map_matcher(packed_offset)
+
+    def _map_matcher(self, offset):
+        # Read-only views into the mapping; nothing is copied
+        columns, code_count, alphabet_length = PACKED.unpack_from(self._buffer, offset)
+        offset += PACKED.size
+        order = np.frombuffer(self._buffer, dtype="<i8", count=self.size, offset=offset)
+        offset += order.nbytes
+        column_offsets = np.frombuffer(self._buffer, dtype="<i8", count=columns, offset=offset)
+        offset += column_offsets.nbytes
+        codes = np.frombuffer(self._buffer, dtype="<i4", count=code_count, offset=offset)
+        offset += codes.nbytes
+        alphabet = self._buffer[offset:offset + alphabet_length].decode("utf-8")
+        return BitParallelMatcher.from_arrays(self.terms, order, column_offsets, codes, alphabet)
+
+    def __len__(self):
+        return self.size
+
+    def items(self):
+        # (word, weight) pairs in term ID order
+        for term_id in range(self.size):
+            yield self.term(term_id)
+
+    def close(self):
+        # The mapping cannot be closed while array views into it exist
+        self.bitparallel = None
+        self._buffer.close()
+
+    @property
+    def root(self):
+        return MappedNode(self, 0)
+
+    def _node(self, index):
+        return NODE.unpack_from(self._buffer, self._nodes_offset + index * NODE.size)
+
+    def _string(self, offset, length):
+        start = self._strings_offset + offset
+        return self._buffer[start:start + length].decode("utf-8")
+
+    def term(self, term_id):
+        # Returns (word, weight)
+        offset, length, weight = TERM.unpack_from(self._buffer, self._terms_offset + term_id * TERM.size)
+        return self._string(offset, length), weight
+
+    def _top(self, index):
+        _, _, _, _, _, _, top_start, top_count = self._node(index)
+        entries = []
+        for i in range(top_start, top_start + top_count):
+            word, weight = self.term(TOP_ID.unpack_from(self._buffer, self._tops_offset + i * TOP_ID.size)[0])
+            entries.append((-weight, word))
+        return entries
+
+    def _child(self, index, char):
+        # Binary search the sorted, contiguous children for one starting with char
+        _, _, _, first, count, _, _, _ = self._node(index)
+        target = ord(char)
+        lo, hi = first, first + count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key = self._node(mid)[0]
+            if key < target:
+                lo = mid + 1
+            elif key > target:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def _locate(self, prefix):
+        index = 0
+        rest = prefix
+        while rest:
+            child = self._child(index, rest[0])
+            if child is None:
+                return None
+            _, label_offset, label_length, _, _, _, _, _ = self._node(child)
+            label = self._string(label_offset, label_length)
+            if len(rest) <= len(label):
+                if not label.startswith(rest):
+                    return None
+            elif not rest.startswith(label):
+                return None
+            rest = rest[len(label):]
+            index = child
+        return index
+
+    def weight(self, word):
+        # The stored weight of word, or None if it is not in the snapshot
+        index = self._locate(word)
+        if index is None:
+            return None
+        term_id = self._node(index)[5]
+        if term_id < 0:
+            return None
+        term, weight = self.term(term_id)
+        return weight if term == word else None
+
+    def search(self, prefix, limit=None):
+        return [term for _, term in self.ranked(prefix, limit)]
+
+    def ranked(self, prefix, limit=None, trace=None):
+        # (-weight, word) entries, like Trie.ranked
+        if trace is None:
+            return self._collect(self._locate(prefix), limit)
+        start = time.perf_counter()
+        index = self._locate(prefix)
+        walked = time.perf_counter()
+        entries = self._collect(index, limit)
+        trace.add("prefix_walk", walked - start)
+        trace.add("collect", time.perf_counter() - walked)
+        return entries
+
+    def _collect(self, index, limit):
+        if index is None:
+            return []
+        if limit is not None and limit <= self.top_k:
+            return self._top(index)[:limit]
+        entries = []
+        stack = [index]
+        while stack:
+            _, _, _, first, count, term_id, _, _ = self._node(stack.pop())
+            if term_id >= 0:
+                word, weight = self.term(term_id)
+                entries.append((-weight, word))
+            stack.extend(range(first, first + count))
+        if limit is not None:
+            return heapq.nsmallest(limit, entries)
+        entries.sort()
+        return entries
+
+    def memory_usage(self):
+        # The whole file is mapped; pages are shared with the OS page cache
+        return len(self._buffer)
+
+    def bytes_per_term(self):
+        return self.memory_usage() / self.size if self.size else 0.0
+
+
+def load_snapshot(path):
+    return MappedTrie(path)
+
+
+def main():
+    from src.init_data import load_corpus
+    from src.trie import Trie
+
+    parser = argparse.ArgumentParser(description="Build a binary index snapshot from a corpus file.")
+    parser.add_argument("source", help="Corpus file (.json, .jsonl/.ndjson or .txt, optionally .gz)")
+    parser.add_argument("output", help="Snapshot file to write")
+    parser.add_argument("--top-k", type=int, default=10, help="Cached completions per node")
+    parser.add_argument("--no-packed", action="store_true",
+                        help="Leave out the bit-parallel fuzzy search arrays")
+    args = parser.parse_args()
+
+    trie = load_corpus(Trie(top_k=args.top_k), args.source)
+    write_snapshot(trie, args.output, packed=not args.no_packed)
+    print(f"Wrote {len(trie)} terms to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Background Index Loading
+
+Building the index from a large corpus takes from seconds to minutes, and the API used
+to do it at import time, before the server could accept a connection. IndexLoader runs
+the build on a daemon thread instead, so the process answers health checks right away,
+and reports its progress for a readiness probe.
+
+An optional warm step runs first, on the calling thread. It should be quick, like
+loading a few thousand popular terms, and it lets the server answer searches from that
+subset until the full index is published. It returns whether it published anything; a
+failing warm step is logged and skipped.
+A failing full build leaves the loader in the "failed" state with the error.
+
+States, in order: "loading" (nothing to serve yet), "warm" (serving the warm subset),
+"ready" (the full index is serving) or "failed".
+
+Functions:
+    IndexLoader(load, warm).start(background): Runs warm() and then load() in the
+        background. With background=False it only runs load(), and errors propagate.
+    IndexLoader.wait(timeout): Blocks until the full index is ready or failed.
+    IndexLoader.stats(): Returns the state, error and load timings.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger("search.startup")
+
+
+class IndexLoader:
+    def __init__(self, load, warm=None):
+        self._load = load
+        self._warm = warm
+        self.state = "loading"
+        self.error = None
+        self.started = None
+        self.warm_seconds = None
+        self.load_seconds = None
+        self._done = threading.Event()
+
+    @property
+    def serving(self):
+        return self.state in ("warm", "ready")
+
+    def start(self, background=True):
+        self.started = time.monotonic()
+        if self._warm is not None and background:
+            try:
+                if self._warm():
+                    self.state = "warm"
+                    self.warm_seconds = time.monotonic() - self.started
+            except Exception:
+                logger.exception("Loading the warm index failed; waiting for the full index")
+        if background:
+            threading.Thread(target=self._run, daemon=True, name="index-loader").start()
+        else:
+            self._run(reraise=True)
+
+    def _run(self, reraise=False):
+        try:
+            self._load()
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            self.state = "failed"
+            if reraise:
+                raise
+            logger.exception("Loading the index failed")
+        else:
+            self.load_seconds = time.monotonic() - self.started
+            self.state = "ready"
+        finally:
+            self._done.set()
+
+    def wait(self, timeout=None):
+        # True once the full index is serving
+        self._done.wait(timeout)
+        return self.state == "ready"
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "warm_seconds": self.warm_seconds,
+            "load_seconds": self.load_seconds,
+        }
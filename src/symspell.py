@@ -0,0 +1,131 @@
+"""
+Symmetric Delete Index for Fuzzy Search
+
+This module implements a SymSpell-style index. At build time every term is reduced to
+all of its variants with up to max_distance characters deleted, and each variant maps to
+the IDs of the terms that produce it. Two strings within edit distance k always share a
+variant reachable with at most k deletions from each, so a query only needs to generate
+its own deletion variants, look them up, and verify the candidates.
+
+Only the first prefix_length characters of each term are expanded. This bounds the
+number of variants for long multi-word terms like "integration test" without losing
+matches (the prefixes of two strings within distance k share a variant as well), while
+the full strings are still compared during verification.
+
+Functions:
+    deletion_variants(text, max_distance): Returns every string reachable by up to
+        max_distance deletions, including the text itself.
+    SymSpellIndex(words, max_distance, prefix_length, memory_budget_mb): Builds the index.
+    SymSpellIndex.search(query, max_distance): Returns the same (word, similarity_score)
+        tuples as fuzzy_search, in the same order.
+"""
+
+import sys
+import time
+
+from src.fuzzy_search import distance_function, fold
+
+# Approximate cost of a new posting list (empty list object plus a dict slot)
+_NEW_KEY_OVERHEAD = sys.getsizeof([]) + 3 * 8
+_POSTING_SIZE = 8
+
+
+def deletion_variants(text: str, max_distance: int) -> set:
+    variants = {text}
+    frontier = {text}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for variant in frontier:
+            for i in range(len(variant)):
+                next_frontier.add(variant[:i] + variant[i + 1:])
+        next_frontier -= variants
+        variants |= next_frontier
+        frontier = next_frontier
+    return variants
+
+
+class SymSpellIndex:
+    def __init__(self, words, max_distance=2, prefix_length=7, memory_budget_mb=None):
+        """
+        Build the index over words, a word list or a TermDictionary (whose folded forms
+        are used instead of a private copy). Raises MemoryError if the estimated index
+        size grows past memory_budget_mb; callers can retry with a shorter prefix_length.
+        """
+        start_time = time.perf_counter()
+        self.folded = getattr(words, "folded", None)
+        if self.folded is None:
+            words = list(words)
+            self.folded = [fold(word) for word in words].__getitem__
+        self.words = words
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.deletes = {}
+        budget = memory_budget_mb * 1024 * 1024 if memory_budget_mb is not None else None
+        size = 0
+        postings = 0
+        for term_id in range(len(self.words)):
+            word = self.folded(term_id)
+            for variant in deletion_variants(word[:prefix_length], max_distance):
+                ids = self.deletes.get(variant)
+                if ids is None:
+                    self.deletes[variant] = [term_id]
+                    size += sys.getsizeof(variant) + _NEW_KEY_OVERHEAD
+                else:
+                    ids.append(term_id)
+                size += _POSTING_SIZE
+                postings += 1
+            if budget is not None and size > budget:
+                raise MemoryError(
+                    f"Symmetric delete index exceeded {memory_budget_mb} MB after {term_id + 1} terms"
+                )
+        self.postings = postings
+        self.size_bytes = size + sys.getsizeof(self.deletes)
+        self.build_time_ms = (time.perf_counter() - start_time) * 1000
+
+    def stats(self) -> dict:
+        return {
+            "terms": len(self.words),
+            "keys": len(self.deletes),
+            "postings": self.postings,
+            "size_bytes": self.size_bytes,
+            "build_time_ms": round(self.build_time_ms, 2),
+            "max_distance": self.max_distance,
+            "prefix_length": self.prefix_length,
+        }
+
+    def search(self, query: str, max_distance: int, trace=None) -> list:
+        """
+        Answer a fuzzy query with hash lookups plus verification. max_distance must not
+        exceed the distance the index was built for. If trace is given, the candidate
+        lookup and the verification are timed into it, with the candidate count.
+        """
+        if max_distance > self.max_distance:
+            raise ValueError(
+                f"Index supports max_distance <= {self.max_distance}, got {max_distance}"
+            )
+        start = time.perf_counter() if trace is not None else None
+        query_lower = fold(query)
+        candidates = set()
+        for variant in deletion_variants(query_lower[:self.prefix_length], max_distance):
+            ids = self.deletes.get(variant)
+            if ids:
+                candidates.update(ids)
+        if trace is not None:
+            looked_up = time.perf_counter()
+            trace.add("candidates", looked_up - start)
+            trace.count("candidates", len(candidates))
+
+        matches = []
+        # Visit candidates in corpus order so ties sort exactly like fuzzy_search
+        calc_distance = distance_function()
+        for term_id in sorted(candidates):
+            folded = self.folded(term_id)
+            dist = calc_distance(query_lower, folded)
+            if dist <= max_distance:
+                max_len = max(len(query_lower), len(folded))
+                matches.append((self.words[term_id], 1 - (dist / max_len)))
+
+        matches.sort(key=lambda x: x[1], reverse=True)
+        if trace is not None:
+            trace.add("verify", time.perf_counter() - looked_up)
+        return matches
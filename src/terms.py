@@ -0,0 +1,162 @@
+"""
+Interned Term Dictionary
+
+This module stores a corpus once, compactly, and numbers its terms. Each term gets the
+next integer ID when it is first added, and both its original form and its folded form
+(fuzzy_search.fold: casefolded, then NFC-normalized) are appended to packed UTF-8
+buffers with their offsets and character lengths in typed arrays. The dictionary keeps
+no Python object per term: a term costs its encoded bytes plus about 30 bytes of offsets,
+lengths and hash table slots. The trie and the token index still hold their own strings.
+
+Strings are materialized only on access: dictionary[term_id] decodes the original and
+folded(term_id) the folded form. Terms are found by ID with an open-addressing hash table
+over the encoded originals.
+
+The fuzzy engines take a TermDictionary wherever they take a word list. They reuse its
+folded forms instead of lowercasing every term, and fuzzy_search only decodes the terms
+whose length is within max_distance of the query's.
+
+Functions:
+    TermDictionary(terms): Interns terms in order; it is a read-only sequence of originals.
+    TermDictionary.add(term): Returns the ID of term, interning it if it is new.
+    TermDictionary.id_of(term): Returns the ID of term, or None.
+    TermDictionary.folded(term_id): Returns the folded form of a term.
+    TermDictionary.fuzzy_scan(query, max_distance): What fuzzy_search returns for this corpus.
+"""
+
+import time
+from array import array
+from collections.abc import Sequence
+
+from src.fuzzy_search import distance_function, fold
+
+_EMPTY_SLOT = -1
+
+
+class TermDictionary(Sequence):
+    def __init__(self, terms=()):
+        self._text = bytearray()
+        self._folded = bytearray()
+        self._offsets = array("Q", [0])
+        self._folded_offsets = array("Q", [0])
+        # Character lengths of the original and folded forms
+        self.lengths = array("I")
+        self.folded_lengths = array("I")
+        self._slots = array("q", [_EMPTY_SLOT]) * 8
+        # Term IDs grouped by folded length; rebuilt on demand after additions
+        self._by_length = None
+        for term in terms:
+            self.add(term)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("term ID out of range")
+        return self._text[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def __contains__(self, term):
+        return isinstance(term, str) and self.id_of(term) is not None
+
+    def folded(self, term_id):
+        return self._folded[self._folded_offsets[term_id]:self._folded_offsets[term_id + 1]].decode("utf-8")
+
+    def _probe(self, encoded):
+        # Slot holding encoded, or the empty slot where it would go
+        mask = len(self._slots) - 1
+        slot = hash(encoded) & mask
+        while True:
+            term_id = self._slots[slot]
+            if term_id == _EMPTY_SLOT or self._text[self._offsets[term_id]:self._offsets[term_id + 1]] == encoded:
+                return slot
+            slot = (slot + 1) & mask
+
+    def id_of(self, term):
+        term_id = self._slots[self._probe(term.encode("utf-8"))]
+        return None if term_id == _EMPTY_SLOT else term_id
+
+    def add(self, term):
+        encoded = term.encode("utf-8")
+        slot = self._probe(encoded)
+        if self._slots[slot] != _EMPTY_SLOT:
+            return self._slots[slot]
+        term_id = len(self)
+        folded = fold(term)
+        self._text += encoded
+        self._offsets.append(len(self._text))
+        self._folded += folded.encode("utf-8")
+        self._folded_offsets.append(len(self._folded))
+        self.lengths.append(len(term))
+        self.folded_lengths.append(len(folded))
+        self._slots[slot] = term_id
+        self._by_length = None
+        # Keep the table at most half full
+        if 2 * len(self) > len(self._slots):
+            self._rehash()
+        return term_id
+
+    def _rehash(self):
+        self._slots = array("q", [_EMPTY_SLOT]) * (2 * len(self._slots))
+        for term_id in range(len(self)):
+            encoded = bytes(self._text[self._offsets[term_id]:self._offsets[term_id + 1]])
+            self._slots[self._probe(encoded)] = term_id
+
+    def _ids_by_length(self):
+        by_length = self._by_length
+        if by_length is None:
+            # A stable sort keeps IDs ascending within each length
+            order = sorted(range(len(self)), key=self.folded_lengths.__getitem__)
+            by_length = {}
+            start = 0
+            while start < len(order):
+                length = self.folded_lengths[order[start]]
+                end = start
+                while end < len(order) and self.folded_lengths[order[end]] == length:
+                    end += 1
+                by_length[length] = array("I", order[start:end])
+                start = end
+            self._by_length = by_length
+        return by_length
+
+    def fuzzy_scan(self, query, max_distance, trace=None):
+        """
+        Same results as fuzzy_search over this corpus. Only terms whose folded length is
+        within max_distance of the query's are decoded and compared, since every other
+        term is at least that many edits away. If trace is given, selecting those terms
+        and comparing them are timed into it, with their count.
+        """
+        start = time.perf_counter() if trace is not None else None
+        query_folded = fold(query)
+        by_length = self._ids_by_length()
+        width = len(query_folded)
+        groups = [by_length.get(length, ()) for length in range(max(0, width - max_distance), width + max_distance + 1)]
+        if trace is not None:
+            selected = time.perf_counter()
+            trace.add("candidates", selected - start)
+            trace.count("candidates", sum(len(group) for group in groups))
+        folded = self._folded
+        offsets = self._folded_offsets
+        calc_distance = distance_function()
+        matches = []
+        for group in groups:
+            for term_id in group:
+                dist = calc_distance(query_folded, folded[offsets[term_id]:offsets[term_id + 1]].decode("utf-8"))
+                if dist <= max_distance:
+                    max_len = max(width, self.folded_lengths[term_id])
+                    matches.append((term_id, 1 - (dist / max_len)))
+        # Best first; ties in corpus order, as fuzzy_search's stable sort leaves them
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        matches = [(self[term_id], similarity) for term_id, similarity in matches]
+        if trace is not None:
+            trace.add("verify", time.perf_counter() - selected)
+        return matches
+
+    def memory_usage(self):
+        # Buffers and arrays only; no per-term Python objects are kept
+        arrays = (self._offsets, self._folded_offsets, self.lengths, self.folded_lengths, self._slots)
+        return len(self._text) + len(self._folded) + sum(a.itemsize * len(a) for a in arrays)
@@ -0,0 +1,173 @@
+"""
+Token and Infix Index for Mid-Term Matches
+
+The trie only matches from the start of a whole term, so "review" never finds "code
+review". This module indexes terms two more ways, both case-insensitively:
+
+    token  every word of a term (split on anything but letters and digits) is kept in a
+           sorted token list with the IDs of the terms containing it, so "rev" finds
+           "code review" with one binary search plus a walk over the matching tokens.
+           A query of several words matches terms that have a token starting with each.
+    infix  every n-gram (trigram by default) of a term maps to the IDs of the terms that
+           contain it. A substring query intersects the posting lists of its own n-grams,
+           starting with the shortest, and verifies the few survivors. Queries shorter
+           than n merge the posting lists of every n-gram containing them.
+
+Matches are ranked like Trie.search: by descending weight, then alphabetically.
+
+Functions:
+    tokenize(text): Returns the casefolded tokens of text.
+    TokenIndex(items, ngram): Indexes plain terms or (term, weight) pairs.
+    TokenIndex.add(word, weight): Adds a term or updates its weight.
+    TokenIndex.search(query, limit, mode): Returns matching terms for mode "token" or "infix".
+    TokenIndex.ranked(query, limit, mode, trace): Like search, but returns (-weight, word) entries.
+    TokenIndex.stats(): Returns term, token and n-gram counts and the approximate size.
+"""
+
+import bisect
+import heapq
+import re
+import sys
+import time
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN.findall(text.casefold())
+
+
+class TokenIndex:
+    def __init__(self, items=(), ngram=3):
+        self.ngram = ngram
+        self.words = []
+        self.weights = []
+        self.lowered = []
+        self._ids = {}
+        self.tokens = {}
+        self.grams = {}
+        # Sorted distinct tokens; rebuilt on the first search after a new token
+        self._sorted_tokens = None
+        for item in items:
+            if isinstance(item, str):
+                self.add(item)
+            else:
+                self.add(*item)
+
+    def __len__(self):
+        return len(self.words)
+
+    def add(self, word, weight=0.0):
+        term_id = self._ids.get(word)
+        if term_id is not None:
+            self.weights[term_id] = weight
+            return
+        term_id = len(self.words)
+        self._ids[word] = term_id
+        self.words.append(word)
+        self.weights.append(weight)
+        lowered = word.casefold()
+        self.lowered.append(lowered)
+        for token in set(tokenize(word)):
+            ids = self.tokens.get(token)
+            if ids is None:
+                self.tokens[token] = [term_id]
+                self._sorted_tokens = None
+            else:
+                ids.append(term_id)
+        n = self.ngram
+        grams = {lowered[i:i + n] for i in range(len(lowered) - n + 1)} if len(lowered) >= n else {lowered}
+        for gram in grams:
+            self.grams.setdefault(gram, []).append(term_id)
+
+    def _token_matches(self, prefix):
+        # IDs of terms with a token starting with prefix
+        sorted_tokens = self._sorted_tokens
+        if sorted_tokens is None:
+            sorted_tokens = self._sorted_tokens = sorted(self.tokens)
+        ids = set()
+        for i in range(bisect.bisect_left(sorted_tokens, prefix), len(sorted_tokens)):
+            token = sorted_tokens[i]
+            if not token.startswith(prefix):
+                break
+            ids.update(self.tokens[token])
+        return ids
+
+    def _search_tokens(self, query):
+        ids = None
+        for prefix in tokenize(query):
+            matches = self._token_matches(prefix)
+            ids = matches if ids is None else ids & matches
+            if not ids:
+                break
+        return ids or set()
+
+    def _search_infix(self, query):
+        query = query.casefold()
+        if not query:
+            return set(range(len(self.words)))
+        n = self.ngram
+        if len(query) < n:
+            ids = set()
+            for gram, postings in self.grams.items():
+                if query in gram:
+                    ids.update(postings)
+            return ids
+        postings = []
+        for i in range(len(query) - n + 1):
+            ids = self.grams.get(query[i:i + n])
+            if ids is None:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                break
+        # Shared n-grams do not guarantee they appear in sequence
+        return {term_id for term_id in candidates if query in self.lowered[term_id]}
+
+    def search(self, query, limit=None, mode="token"):
+        return [word for _, word in self.ranked(query, limit, mode)]
+
+    def ranked(self, query, limit=None, mode="token", trace=None):
+        # (-weight, word) entries, like Trie.ranked; trace gets the lookup and ranking times
+        start = time.perf_counter() if trace is not None else None
+        if mode == "token":
+            ids = self._search_tokens(query)
+        elif mode == "infix":
+            ids = self._search_infix(query)
+        else:
+            raise ValueError(f"Unknown mode {mode!r}")
+        if trace is not None:
+            looked_up = time.perf_counter()
+            trace.add("candidates", looked_up - start)
+            trace.count("candidates", len(ids))
+        entries = [(-self.weights[term_id], self.words[term_id]) for term_id in ids]
+        if limit is not None:
+            entries = heapq.nsmallest(limit, entries)
+        else:
+            entries.sort()
+        if trace is not None:
+            trace.add("collect", time.perf_counter() - looked_up)
+        return entries
+
+    def stats(self) -> dict:
+        return {
+            "terms": len(self.words),
+            "tokens": len(self.tokens),
+            "ngrams": len(self.grams),
+            "ngram": self.ngram,
+            "size_bytes": self.memory_usage(),
+        }
+
+    def memory_usage(self):
+        # Approximate bytes for the term lists and both posting tables
+        total = sum(sys.getsizeof(word) for word in self.lowered)
+        total += sys.getsizeof(self.words) + sys.getsizeof(self.weights) + sys.getsizeof(self._ids)
+        for table in (self.tokens, self.grams):
+            total += sys.getsizeof(table)
+            for key, ids in table.items():
+                total += sys.getsizeof(key) + sys.getsizeof(ids)
+        return total
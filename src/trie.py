@@ -1,32 +1,392 @@
 """
 Trie Data Structure for Autocomplete and Fuzzy Search
 
-This module implements a trie data structure that supports fast insertion, deletion,
-and lookup operations. It is used for the autocomplete functionality of our search engine.
+This module implements a path-compressed (radix) trie that supports fast insertion
+and prefix lookup operations. It is used for the autocomplete functionality of our
+search engine. Each node stores a whole edge label instead of a single character and
+uses __slots__, so a chain of single-child nodes collapses into one compact object.
+
+The original dict-per-character structure is kept as CharTrie so memory usage can be
+compared on the same corpus.
+
+With copy_on_write enabled, insert and delete copy the nodes on the affected path and
+swap in a new root when done, so concurrent readers never block and never observe a
+partially updated node. Writers must still be serialized by the caller.
+
+Every word carries a weight, and every node caches its top_k best completions as
+(-weight, word) entries, so a limited search only walks the prefix and slices that
+cache instead of visiting the whole subtree.
 
 Functions:
-    insert(word): Inserts a new word into the trie.
-    search(prefix): Returns all words in the trie that start with the given prefix.
+    insert(word, weight): Inserts a new word (or updates its weight) in the trie.
+    delete(word): Removes a word, pruning and re-merging the nodes it leaves behind.
+    search(prefix, limit): Returns words that start with the given prefix, ranked by
+        descending weight and then alphabetically; at most limit of them if given.
+    ranked(prefix, limit, trace): Like search, but returns the (-weight, word) entries;
+        times the prefix walk and the collection into trace if one is given.
+    items(): Yields every stored (word, weight) pair.
+    weight(word): Returns the weight of a stored word, or None.
+    memory_usage(): Returns the approximate number of bytes held by the trie.
+    bytes_per_term(): Returns memory_usage() divided by the number of stored words.
+    TrieBuilder(trie).add(word, weight): Bulk-builds a trie from words in sorted order.
 """
 
+import bisect
+import heapq
+import sys
+import time
+
+
+def _common_prefix_length(a, b):
+    # Length of the shared leading run of two strings
+    i = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        i += 1
+    return i
+
+
 class TrieNode:
+    __slots__ = ("label", "children", "is_end_of_word", "weight", "top")
+
+    def __init__(self, label=""):
+        # Edge label leading into this node; children are keyed by the first
+        # character of their label. Leaves keep children as None to save a dict.
+        self.label = label
+        self.children = None
+        self.is_end_of_word = False
+        self.weight = 0.0
+        # Best completions in this subtree as sorted (-weight, word) entries
+        self.top = []
+
+
+class Trie:
+    def __init__(self, top_k=10, copy_on_write=False):
+        self.root = TrieNode()
+        self.size = 0
+        self.top_k = top_k
+        self.copy_on_write = copy_on_write
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, word):
+        return self.weight(word) is not None
+
+    def weight(self, word):
+        # The stored weight of word, or None if it is not in the trie
+        node, path = self._locate(word)
+        if node is None or path != word or not node.is_end_of_word:
+            return None
+        return node.weight
+
+    def __iter__(self):
+        for word, _ in self.items():
+            yield word
+
+    def items(self):
+        # Stored (word, weight) pairs in depth-first order (sorted if the trie was bulk-built)
+        stack = [(self.root, self.root.label)]
+        while stack:
+            node, word = stack.pop()
+            if node.is_end_of_word:
+                yield word, node.weight
+            if node.children:
+                for child in reversed(list(node.children.values())):
+                    stack.append((child, word + child.label))
+
+    def _writable(self, node):
+        # In copy-on-write mode, writers modify private copies of the nodes on their path
+        # and publish them with a single assignment to self.root at the end. Readers that
+        # captured the old root keep seeing a complete, unchanging tree.
+        if not self.copy_on_write:
+            return node
+        copy = TrieNode(node.label)
+        copy.children = dict(node.children) if node.children else None
+        copy.is_end_of_word = node.is_end_of_word
+        copy.weight = node.weight
+        copy.top = list(node.top)
+        return copy
+
+    def insert(self, word, weight=0.0):
+        root = node = self._writable(self.root)
+        path = [node]
+        rest = word
+        while rest:
+            child = node.children.get(rest[0]) if node.children else None
+            if child is None:
+                # No edge shares a first character: hang the remainder as a leaf
+                leaf = TrieNode(rest)
+                if node.children is None:
+                    node.children = {}
+                node.children[rest[0]] = leaf
+                node = leaf
+                path.append(node)
+                break
+            child = node.children[rest[0]] = self._writable(child)
+            common = _common_prefix_length(rest, child.label)
+            if common < len(child.label):
+                # Split the edge: a new inner node takes over the shared part
+                split = TrieNode(child.label[:common])
+                child.label = child.label[common:]
+                split.children = {child.label[0]: child}
+                split.top = list(child.top)
+                node.children[rest[0]] = split
+                child = split
+            node = child
+            path.append(node)
+            rest = rest[common:]
+        old_weight = node.weight if node.is_end_of_word else None
+        if not node.is_end_of_word:
+            node.is_end_of_word = True
+            self.size += 1
+        node.weight = weight
+        if old_weight is not None and weight < old_weight:
+            # A demoted word may have to make room for others: rebuild bottom-up
+            depth = len(word)
+            for current in reversed(path):
+                self._refresh_top(current, word[:depth])
+                depth -= len(current.label)
+        elif old_weight != weight:
+            entry = (-weight, word)
+            for current in path:
+                self._offer(current, entry, old_weight is not None)
+        self.root = root
+
+    def delete(self, word):
+        # Returns False if the word is not stored
+        node, path = self._locate(word)
+        if node is None or path != word or not node.is_end_of_word:
+            return False
+        root = node = self._writable(self.root)
+        nodes = [node]
+        rest = word
+        while rest:
+            child = node.children[rest[0]] = self._writable(node.children[rest[0]])
+            nodes.append(child)
+            rest = rest[len(child.label):]
+            node = child
+        node.is_end_of_word = False
+        node.weight = 0.0
+        self.size -= 1
+        # Bottom-up: drop nodes left empty, fold pass-through nodes into their only
+        # child, and recompute the top lists of everything else
+        depth = len(word)
+        for current, parent in zip(reversed(nodes), reversed(nodes[:-1])):
+            key = current.label[0]
+            if not current.is_end_of_word and not current.children:
+                del parent.children[key]
+                if not parent.children:
+                    parent.children = None
+            elif not current.is_end_of_word and len(current.children) == 1:
+                only = self._writable(next(iter(current.children.values())))
+                only.label = current.label + only.label
+                parent.children[key] = only
+            else:
+                self._refresh_top(current, word[:depth])
+            depth -= len(current.label)
+        self._refresh_top(root, root.label)
+        self.root = root
+        return True
+
+    def _offer(self, node, entry, replace):
+        # Merge one (-weight, word) entry into a node's sorted top list
+        top = node.top
+        if replace:
+            for i, (_, term) in enumerate(top):
+                if term == entry[1]:
+                    del top[i]
+                    break
+        if len(top) >= self.top_k and entry >= top[-1]:
+            return
+        bisect.insort(top, entry)
+        if len(top) > self.top_k:
+            top.pop()
+
+    def _refresh_top(self, node, path):
+        # Recompute a node's top list from its own word and its children's lists
+        candidates = [(-node.weight, path)] if node.is_end_of_word else []
+        if not node.children:
+            node.top = candidates
+            return
+        if not candidates and len(node.children) == 1:
+            # Pass-through node: same subtree as its only child
+            node.top = list(next(iter(node.children.values())).top)
+            return
+        for child in node.children.values():
+            candidates.extend(child.top)
+        node.top = heapq.nsmallest(self.top_k, candidates)
+
+    def _locate(self, prefix):
+        # Walk down to the node whose path covers the prefix. Returns the node and
+        # the full path string leading to it, or (None, None) if nothing matches.
+        node = self.root
+        path = ""
+        rest = prefix
+        while rest:
+            child = node.children.get(rest[0]) if node.children else None
+            if child is None:
+                return None, None
+            label = child.label
+            if len(rest) <= len(label):
+                if not label.startswith(rest):
+                    return None, None
+            elif not rest.startswith(label):
+                return None, None
+            path += label
+            rest = rest[len(label):]
+            node = child
+        return node, path
+
+    def search(self, prefix, limit=None):
+        return [term for _, term in self.ranked(prefix, limit)]
+
+    def ranked(self, prefix, limit=None, trace=None):
+        if trace is None:
+            node, path = self._locate(prefix)
+            return self._collect(node, path, limit)
+        # Same, timing the prefix walk and the collection separately
+        start = time.perf_counter()
+        node, path = self._locate(prefix)
+        walked = time.perf_counter()
+        entries = self._collect(node, path, limit)
+        trace.add("prefix_walk", walked - start)
+        trace.add("collect", time.perf_counter() - walked)
+        return entries
+
+    def _collect(self, node, path, limit):
+        if node is None:
+            return []
+        if limit is not None and limit <= self.top_k:
+            # Served straight from the cached best completions
+            return node.top[:limit]
+        entries = []
+        stack = [(node, path)]
+        while stack:
+            current, current_path = stack.pop()
+            if current.is_end_of_word:
+                entries.append((-current.weight, current_path))
+            if current.children:
+                for child in current.children.values():
+                    stack.append((child, current_path + child.label))
+        if limit is not None:
+            return heapq.nsmallest(limit, entries)
+        entries.sort()
+        return entries
+
+    def memory_usage(self):
+        # Approximate bytes for nodes, child tables and edge labels
+        total = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            total += sys.getsizeof(node) + sys.getsizeof(node.label)
+            total += sys.getsizeof(node.top)
+            if node.children:
+                total += sys.getsizeof(node.children)
+                stack.extend(node.children.values())
+        return total
+
+    def bytes_per_term(self):
+        return self.memory_usage() / self.size if self.size else 0.0
+
+
+class TrieBuilder:
+    """
+    Builds a Trie from words arriving in sorted order. Only the path of the previous word
+    is kept open; when the next word diverges, the nodes below the divergence point are
+    complete, so their top lists are computed once, bottom-up, and never revisited. This
+    avoids re-walking from the root and re-merging top lists for every word.
+    """
+
+    def __init__(self, trie):
+        if trie.size or trie.root.children:
+            raise ValueError("TrieBuilder needs an empty trie")
+        self.trie = trie
+        self.previous = None
+        # Open path of the previous word as (node, depth) pairs
+        self.stack = [(trie.root, 0)]
+
+    def add(self, word, weight=0.0):
+        """
+        Add the next word. Returns False without changing anything if word sorts before
+        the previous one; the caller should finish() and insert the rest one by one.
+        A repeated word only updates its weight.
+        """
+        previous = self.previous
+        if previous is not None and word <= previous:
+            if word != previous:
+                return False
+            self.stack[-1][0].weight = weight
+            return True
+        trie = self.trie
+        if previous is None and word == "":
+            trie.root.is_end_of_word = True
+            trie.root.weight = weight
+            trie.size += 1
+            self.previous = word
+            return True
+        common = _common_prefix_length(previous, word) if previous is not None else 0
+        last = None
+        while self.stack[-1][1] > common:
+            last, depth = self.stack.pop()
+            trie._refresh_top(last, previous[:depth])
+        parent, depth = self.stack[-1]
+        if depth < common:
+            # The new word branches off inside the edge leading to `last`
+            split = TrieNode(last.label[:common - depth])
+            last.label = last.label[common - depth:]
+            split.children = {last.label[0]: last}
+            parent.children[split.label[0]] = split
+            self.stack.append((split, common))
+            parent = split
+        leaf = TrieNode(word[common:])
+        leaf.is_end_of_word = True
+        leaf.weight = weight
+        if parent.children is None:
+            parent.children = {}
+        parent.children[leaf.label[0]] = leaf
+        self.stack.append((leaf, len(word)))
+        trie.size += 1
+        self.previous = word
+        return True
+
+    def finish(self):
+        # Close the remaining open path, root last
+        while self.stack:
+            node, depth = self.stack.pop()
+            self.trie._refresh_top(node, (self.previous or "")[:depth])
+        return self.trie
+
+
+class CharTrieNode:
     def __init__(self):
         # Each node stores children in a dictionary and a flag indicating end-of-word.
         self.children = {}
         self.is_end_of_word = False
 
-class Trie:
+
+class CharTrie:
+    """Uncompressed one-node-per-character trie, kept as a memory baseline."""
+
     def __init__(self):
-        self.root = TrieNode()
+        self.root = CharTrieNode()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
 
     def insert(self, word):
         # Insert each character; create new node if necessary
         node = self.root
         for char in word:
             if char not in node.children:
-                node.children[char] = TrieNode()
+                node.children[char] = CharTrieNode()
             node = node.children[char]
-        node.is_end_of_word = True
+        if not node.is_end_of_word:
+            node.is_end_of_word = True
+            self.size += 1
 
     def search(self, prefix):
         # Traverse to end of prefix
@@ -47,3 +407,18 @@ class Trie:
 
         dfs(node, prefix)
         return results
+
+    def memory_usage(self):
+        # Approximate bytes for nodes, their attribute dicts and child tables
+        total = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            total += sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+            total += sys.getsizeof(node.children)
+            total += sum(sys.getsizeof(ch) for ch in node.children)
+            stack.extend(node.children.values())
+        return total
+
+    def bytes_per_term(self):
+        return self.memory_usage() / self.size if self.size else 0.0
@@ -3,3 +3,8 @@ import os
 
 # Add the project root directory to the PYTHONPATH
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep rankings stable within a test run; tests flush popularity counters explicitly
+os.environ.setdefault("POPULARITY_FLUSH_INTERVAL", "3600")
+# Load the index during import, so tests never race the background loader
+os.environ.setdefault("INDEX_BACKGROUND", "0")
@@ -64,3 +64,207 @@ def test_api_performance(client):
     assert_valid_response(response)
     response_time = (end_time - start_time) * 1000  # Convert to milliseconds
     assert response_time < 100, "API response time exceeded performance threshold"
+
+def test_autocomplete_limit(client):
+    """Test autocomplete honours the limit parameter."""
+    response = client.get("/autocomplete?prefix=c&limit=1")
+    assert_valid_response(response)
+    assert len(response.json()["results"]) == 1
+
+def test_fuzzy_engines(client):
+    """Test each fuzzy engine finds the match and reports its algorithm."""
+    algorithms = set()
+    for engine in ["trie", "scan", "symspell", "bitparallel"]:
+        response = client.get(f"/fuzzy?query=comit&max_distance=1&engine={engine}")
+        assert_valid_response(response)
+        data = response.json()
+        assert "commit" in [item["term"] for item in data["results"]]
+        algorithms.add(data["algorithm"])
+    assert len(algorithms) == 4
+
+def test_fuzzy_symspell_distance_limit(client):
+    """Test the deletion index rejects distances it was not built for."""
+    response = client.get("/fuzzy?query=comit&max_distance=5&engine=symspell")
+    assert_valid_response(response, 400)
+    response = client.get("/fuzzy?query=comit&max_distance=5")
+    assert_valid_response(response)
+
+def test_stats(client):
+    """Test index statistics report the deletion index size and build time."""
+    response = client.get("/stats")
+    assert_valid_response(response)
+    data = response.json()
+    assert data["terms"] > 0
+    assert data["symspell"]["postings"] > 0
+    assert "build_time_ms" in data["symspell"]
+
+def test_cache_used(client):
+    """Test repeated queries are served from the result cache."""
+    first = client.get("/fuzzy?query=Depoymnt&max_distance=2").json()
+    second = client.get("/fuzzy?query=depoymnt&max_distance=2").json()
+    assert first["cache_used"] is False
+    assert second["cache_used"] is True
+    assert second["results"] == first["results"]
+    assert client.get("/stats").json()["cache"]["hits"] >= 1
+    # "ß" folds to "ss", so both spellings are the same query
+    first = client.get("/fuzzy?query=Deploymenß&max_distance=2").json()
+    second = client.get("/fuzzy?query=DEPLOYMENSS&max_distance=2").json()
+    assert second["cache_used"] is True
+    assert second["results"] == first["results"]
+
+def test_autocomplete_batch(client):
+    """Test batch autocomplete keeps request order and per-query metadata."""
+    response = client.post("/autocomplete/batch", json={"queries": [
+        {"prefix": "co"}, {"prefix": "xyz"}, {"prefix": "de", "limit": 1}, {"prefix": "co"}
+    ]})
+    assert_valid_response(response)
+    results = response.json()["results"]
+    assert [item["query"] for item in results] == ["co", "xyz", "de", "co"]
+    assert "commit" in results[0]["results"]
+    assert results[1]["results"] == []
+    assert len(results[2]["results"]) == 1
+    for item in results:
+        assert_valid_metadata(item)
+
+def test_fuzzy_batch(client):
+    """Test batch fuzzy search matches the single-query endpoint."""
+    queries = [
+        {"query": "comit", "max_distance": 1},
+        {"query": "integation tst", "max_distance": 3, "engine": "bitparallel"},
+        {"query": "depoymnt", "max_distance": 3, "engine": "bitparallel"},
+        {"query": "xyzabc", "max_distance": 1},
+    ]
+    response = client.post("/fuzzy/batch", json={"queries": queries})
+    assert_valid_response(response)
+    results = response.json()["results"]
+    assert len(results) == len(queries)
+    for query, item in zip(queries[:3], results):
+        single = client.get("/fuzzy", params=query).json()
+        assert item["results"] == single["results"]
+        assert item["algorithm"] == single["algorithm"]
+    assert results[3]["results"] == []
+
+def test_term_mutation(client):
+    """Test terms can be added and deleted while serving."""
+    from api.app import live_index
+    response = client.post("/terms", json={"term": "  observability ", "weight": 3})
+    assert_valid_response(response)
+    assert response.json()["term"] == "observability"
+    assert response.json()["created"] is True
+    assert "observability" in client.get("/autocomplete?prefix=obs").json()["results"]
+    response = client.delete("/terms/observability")
+    assert_valid_response(response)
+    assert response.json()["deleted"] is True
+    assert_valid_response(client.get("/autocomplete?prefix=obs"), 404)
+    assert_valid_response(client.delete("/terms/observability"), 404)
+    response = client.post("/terms", json={"term": "CI/CD"})
+    assert response.json()["created"] is False
+    live_index.rebuild()
+
+def test_stale_secondary_indexes(client):
+    """Test writes keep the secondary indexes serving and deleted terms out of results."""
+    from api.app import live_index
+    client.post("/terms", json={"term": "observability"})
+    live_index.rebuild()
+    client.delete("/terms/observability")
+    assert client.get("/stats").json()["stale"] is True
+    for engine in ["symspell", "bitparallel", "scan"]:
+        response = client.get(f"/fuzzy?query=observabilty&max_distance=2&engine={engine}")
+        assert response.status_code == 404
+    response = client.get("/autocomplete?prefix=observ&mode=token")
+    assert_valid_response(response, 404)
+    live_index.rebuild()
+    assert client.get("/stats").json()["stale"] is False
+
+def test_engines_available_after_write(client):
+    """Test explicit engines and token modes keep answering before the rebuild lands."""
+    from api.app import live_index
+    client.post("/terms", json={"term": "chaos testing"})
+    for engine in ["symspell", "bitparallel"]:
+        response = client.get(f"/fuzzy?query=comit&max_distance=1&engine={engine}")
+        assert_valid_response(response)
+        assert "commit" in [item["term"] for item in response.json()["results"]]
+    for mode in ["token", "infix"]:
+        assert_valid_response(client.get(f"/autocomplete?prefix=review&mode={mode}"))
+    client.delete("/terms/chaos testing")
+    live_index.rebuild()
+
+def test_load_shedding(client):
+    """Test searches are refused with 503 once the offload pool is full."""
+    from api.app import fuzzy_pool
+    max_pending = fuzzy_pool.max_pending
+    fuzzy_pool.max_pending = 0
+    try:
+        response = client.get("/fuzzy?query=shedding&max_distance=2&engine=scan")
+        assert_valid_response(response, 503)
+        assert response.headers["retry-after"] == "1"
+    finally:
+        fuzzy_pool.max_pending = max_pending
+    assert client.get("/stats").json()["offload"]["fuzzy"]["shed"] >= 1
+
+def test_batch_load_shedding(client):
+    """Test batch searches go through the offload pools and are refused with 503 when full."""
+    from api.app import autocomplete_pool, fuzzy_pool
+    limits = autocomplete_pool.max_pending, fuzzy_pool.max_pending
+    autocomplete_pool.max_pending = fuzzy_pool.max_pending = 0
+    try:
+        response = client.post("/fuzzy/batch", json={"queries": [{"query": "batchshed", "engine": "scan"}]})
+        assert_valid_response(response, 503)
+        assert response.headers["retry-after"] == "1"
+        response = client.post("/fuzzy/batch", json={"queries": [{"query": "batchshed", "engine": "bitparallel"}]})
+        assert_valid_response(response, 503)
+        response = client.post("/autocomplete/batch", json={"queries": [{"prefix": "batchshed", "mode": "token"}]})
+        assert_valid_response(response, 503)
+    finally:
+        autocomplete_pool.max_pending, fuzzy_pool.max_pending = limits
+    response = client.post("/fuzzy/batch", json={"queries": [{"query": "batchshed", "engine": "scan"}]})
+    assert_valid_response(response)
+
+def test_autocomplete_modes(client):
+    """Test token and infix matching through the mode parameter."""
+    response = client.get("/autocomplete?prefix=review&mode=token")
+    assert_valid_response(response)
+    assert "code review" in response.json()["results"]
+    assert response.json()["algorithm"] == "Token Prefix Index"
+    response = client.get("/autocomplete?prefix=test&mode=token")
+    assert {"unit test", "integration test"} <= set(response.json()["results"])
+    response = client.get("/autocomplete?prefix=eview&mode=infix&limit=1")
+    assert response.json()["results"] == ["code review"]
+    assert response.json()["algorithm"] == "N-gram Infix Index"
+    assert_valid_response(client.get("/autocomplete?prefix=review"), 404)
+    assert_valid_response(client.get("/autocomplete?prefix=review&mode=suffix"), 422)
+    response = client.post("/autocomplete/batch", json={"queries": [
+        {"prefix": "test", "mode": "token"}, {"prefix": "test"}]})
+    results = response.json()["results"]
+    assert results[0]["results"]
+    assert [item["algorithm"] for item in results] == ["Token Prefix Index", "Trie Search"]
+
+def test_selection_popularity(client):
+    """Test selections lift a term in autocomplete ranking."""
+    from api.app import popularity, indexed_weight
+    baseline = client.get("/autocomplete?prefix=co&limit=1").json()["results"]
+    target = client.get("/autocomplete?prefix=co").json()["results"][-1]
+    assert target != baseline[0]
+    for _ in range(200):
+        assert client.post("/select", json={"term": target}).status_code == 204
+    popularity.flush(indexed_weight)
+    try:
+        assert client.get("/autocomplete?prefix=co&limit=1").json()["results"] == [target]
+        assert client.get("/stats").json()["popularity"]["terms"] >= 1
+    finally:
+        popularity.forget(target)
+
+def test_shard_timeout_answers_504(client, monkeypatch):
+    """Test a query that times out waiting for shards answers 504 instead of hanging."""
+    import api.app as app_module
+    from src.sharding import ShardTimeout
+
+    def searcher(index, mode):
+        def ranked(prefix, limit, trace=None):
+            raise ShardTimeout("Shards did not answer ranked within 0.1s")
+        return ranked
+
+    monkeypatch.setattr(app_module, "autocomplete_searcher", searcher)
+    response = client.get("/autocomplete?prefix=timeout-test")
+    assert_valid_response(response, 504)
+    assert "did not answer" in response.json()["detail"]
@@ -0,0 +1,57 @@
+from benchmarks.compare import compare
+from benchmarks.corpus import generate_corpus, write_corpus
+from benchmarks.run import run
+from benchmarks.responses import run as run_responses
+from benchmarks.live_writes import run as run_live_writes
+from src.init_data import load_corpus
+from src.trie import Trie
+
+def test_corpus_is_deterministic():
+    """Verify a size and seed always give the same distinct terms."""
+    corpus = generate_corpus(2000, seed=7)
+    assert corpus == generate_corpus(2000, seed=7)
+    assert corpus != generate_corpus(2000, seed=8)
+    terms = [term for term, _ in corpus]
+    assert len(set(terms)) == 2000
+    assert all(term and term == term.strip() for term in terms)
+    assert any(" " in term for term in terms)
+
+def test_written_corpus_loads(tmp_path):
+    """Verify the written corpus is sorted and loads into the trie with its weights."""
+    path = write_corpus(str(tmp_path / "corpus.txt"), 1000, seed=3)
+    trie = load_corpus(Trie(), path)
+    corpus = generate_corpus(1000, seed=3)
+    assert len(trie) == 1000
+    term, weight = corpus[0]
+    assert trie.weight(term) == weight
+
+def test_run_and_compare(tmp_path):
+    """Verify a small run reports every benchmark and a slowdown is flagged."""
+    report = run([1000], queries=10, repeat=1, workdir=str(tmp_path))
+    names = {result["benchmark"] for result in report["results"]}
+    assert names == {"trie.insert", "trie.search", "fuzzy_search", "load.corpus",
+                     "load.snapshot", "memory.trie", "memory.terms"}
+    assert all(result["value"] >= 0 for result in report["results"])
+    rows, unmatched = compare(report, report)
+    assert unmatched == [] and not any(row[4] for row in rows)
+    slower = {"results": [dict(result, value=result["value"] * 2 + 1) for result in report["results"]]}
+    rows, _ = compare(report, slower, threshold=0.5)
+    assert all(row[4] for row in rows)
+
+def test_response_benchmark():
+    """Verify the serialization benchmark times every endpoint and path per result count."""
+    report = run_responses([5, 50], repeat=2)
+    keys = {(result["size"], result["params"]["endpoint"], result["params"]["path"]) for result in report["results"]}
+    assert keys == {(count, endpoint, path) for count in (5, 50) for endpoint in ("autocomplete", "fuzzy")
+                    for path in ("pydantic", "encoded", "cached")}
+    assert all(result["unit"] == "us" and result["value"] > 0 for result in report["results"])
+
+def test_live_writes_benchmark():
+    """Verify the mixed read/write benchmark reports write rates and reader latency percentiles."""
+    report = run_live_writes(size=500, writes=50, readers=2, read_seconds=0.05)
+    results = {result["benchmark"]: result for result in report["results"]}
+    assert set(results) == {"write.add", "write.remove", "read.idle", "read.mixed", "write.mixed"}
+    assert results["write.mixed"]["calls"] == 100 and results["write.add"]["writes_per_second"] > 0
+    for name in ("read.idle", "read.mixed"):
+        assert results[name]["calls"] > 0
+        assert results[name]["value"] <= results[name]["p99"] <= results[name]["p999"]
@@ -0,0 +1,24 @@
+import pytest
+from src.fuzzy_search import fuzzy_search
+
+pytest.importorskip("numpy")
+from src.bitparallel import BitParallelMatcher
+
+@pytest.fixture(scope="module")
+def test_words():
+    """Fixture to provide test data."""
+    return ["hello", "help", "world", "fuzzy", "", "Integration Test", "integration test", "a" * 70]
+
+@pytest.fixture(scope="module")
+def matcher(test_words):
+    return BitParallelMatcher(test_words)
+
+def test_matches_linear_scan(matcher, test_words):
+    """Verify results equal the linear scan, tuples and order included."""
+    for query, max_distance in [("helo", 1), ("hel", 2), ("h", 5), ("integation tst", 3), ("zzzzz", 5)]:
+        assert matcher.search(query, max_distance) == fuzzy_search(query, max_distance, test_words)
+
+def test_long_query_falls_back(matcher, test_words):
+    """Verify queries longer than 64 characters still return scan results."""
+    query = "a" * 68
+    assert matcher.search(query, 3) == fuzzy_search(query, 3, test_words)
@@ -0,0 +1,32 @@
+import time
+from src.cache import LRUCache
+
+def test_hit_and_miss():
+    """Verify lookups report hits and misses."""
+    cache = LRUCache(maxsize=2)
+    assert cache.get("a") == (False, None)
+    cache.put("a", [1])
+    assert cache.get("a") == (True, [1])
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_lru_eviction():
+    """Verify the least recently used entry is evicted first."""
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_and_clear():
+    """Verify entries expire after the TTL and clear drops everything."""
+    cache = LRUCache(maxsize=4, ttl=0.01)
+    cache.put("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") == (False, None)
+    cache.put("b", 2)
+    cache.clear()
+    assert len(cache) == 0
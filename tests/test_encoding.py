@@ -0,0 +1,77 @@
+import json
+from fastapi.testclient import TestClient
+import api.app as app_module
+from api.app import app, AutocompleteResponse, FuzzyMatch, FuzzyResponse
+from src.encoding import FragmentCache, encode_batch, encode_matches, encode_response, encode_terms
+
+def pydantic_bytes(path, model):
+    # What FastAPI writes for a response model: validate, then serialize with pydantic
+    route = next(route for route in app.routes if getattr(route, "path", None) == path)
+    value, errors = route.response_field.validate(model, {}, loc=("response",))
+    assert not errors
+    return route.response_field.serialize_json(value)
+
+def test_encoding_matches_pydantic():
+    """Encoded bodies are byte-identical to the pydantic route's."""
+    terms = ["code review", "naïve \"quoted\" term", "tab\there", "日本語", "emoji 🙂"]
+    assert encode_response("co", encode_terms(terms), 0.12, "Trie Search", True) == pydantic_bytes(
+        "/autocomplete", AutocompleteResponse(query="co", results=terms, execution_time_ms=0.12, cache_used=True))
+    matches = [(term, score) for term, score in zip(terms, (1.0, 0.8333333, 0.5, 0.25, 0.0))]
+    expected = FuzzyResponse(
+        query="cod revie",
+        results=[FuzzyMatch(term=term, score=round(score, 2)) for term, score in matches],
+        execution_time_ms=12.5,
+        algorithm="Levenshtein Distance",
+    )
+    body = encode_response("cod revie", encode_matches(matches), 12.5, "Levenshtein Distance", False)
+    assert body == pydantic_bytes("/fuzzy", expected)
+    assert json.loads(encode_batch([body, body], 3.0)) == {"results": [json.loads(body)] * 2, "execution_time_ms": 3.0}
+
+def test_fragment_cache():
+    """Fragments are reused while the results stay equal and re-encoded when they change."""
+    cache = FragmentCache(2)
+    first = cache.encode("k", ["a", "b"], encode_terms)
+    assert cache.encode("k", ["a", "b"], encode_terms) is first
+    assert cache.encode("k", ["b", "a"], encode_terms) == b'["b","a"]'
+    assert cache.stats()["reused"] == 1
+    disabled = FragmentCache(0)
+    assert disabled.encode("k", ["a"], encode_terms) == b'["a"]'
+    assert disabled.encode("k", ["a"], encode_terms) == b'["a"]' and disabled.stats()["reused"] == 0
+
+def test_fast_path_responses(monkeypatch):
+    """Every search endpoint answers the same with and without the fast path."""
+    client = TestClient(app)
+    requests = [
+        ("get", "/autocomplete", {"params": {"prefix": "co"}}),
+        ("get", "/autocomplete", {"params": {"prefix": "c", "limit": 3}}),
+        ("get", "/fuzzy", {"params": {"query": "cod revie"}}),
+        ("get", "/fuzzy", {"params": {"query": "deploymnt", "engine": "scan"}}),
+        ("post", "/autocomplete/batch", {"json": {"queries": [{"prefix": "co"}, {"prefix": "zzz"}, {"prefix": "co"}]}}),
+        ("post", "/fuzzy/batch", {"json": {"queries": [{"query": "cod revie"}, {"query": "qqqqqqq", "max_distance": 1}]}}),
+    ]
+
+    def strip_times(body):
+        body.pop("execution_time_ms")
+        for response in body.get("results", []):
+            if isinstance(response, dict) and "cache_used" in response:
+                response.pop("execution_time_ms")
+                response.pop("cache_used")
+        body.pop("cache_used", None)
+        return body
+
+    answers = {}
+    for fast in (False, True):
+        monkeypatch.setattr(app_module, "FAST_JSON", fast)
+        for method, path, kwargs in requests:
+            response = getattr(client, method)(path, **kwargs)
+            assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+            answers.setdefault((path, repr(kwargs)), []).append(strip_times(response.json()))
+    for slow, fast in answers.values():
+        assert slow == fast
+    assert client.get("/autocomplete", params={"prefix": "zzz"}).status_code == 404
+    assert client.get("/fuzzy", params={"query": "qqqqqqq", "max_distance": 1}).status_code == 404
+
+    schema = client.get("/openapi.json").json()
+    for path in ("/autocomplete", "/fuzzy"):
+        content = schema["paths"][path]["get"]["responses"]["200"]["content"]["application/json"]
+        assert content["schema"]["$ref"].endswith("Response")
@@ -1,5 +1,6 @@
 import pytest
-from src.fuzzy_search import fuzzy_search
+from src.fuzzy_search import fuzzy_search, trie_fuzzy_search
+from src.trie import Trie
 
 @pytest.fixture(scope="module")
 def test_words():
@@ -34,3 +35,12 @@ def test_fuzzy_multiple_matches(test_words):
     assert len(results) >= 2, "Expected multiple matches"
     scores = [score for _, score in results]
     assert sorted(scores, reverse=True) == scores, "Results should be sorted by descending similarity"
+
+def test_trie_fuzzy_matches_scan(test_words):
+    """Verify the trie-guided engine returns the same matches as the linear scan."""
+    trie = Trie()
+    for word in test_words:
+        trie.insert(word)
+    for query, max_distance in [("helo", 1), ("hel", 2), ("wrld", 1), ("zzzzz", 1)]:
+        expected = fuzzy_search(query, max_distance, test_words)
+        assert sorted(trie_fuzzy_search(query, max_distance, trie)) == sorted(expected)
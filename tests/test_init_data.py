@@ -0,0 +1,46 @@
+import gzip
+import json
+import pytest
+from src.trie import Trie
+from src.init_data import iter_corpus, load_corpus, normalize_term
+
+TERMS = ["commit", "pull  request", " code review", "commit", "", "Café"]
+
+@pytest.fixture(params=["terms.json", "terms.jsonl", "terms.txt", "terms.jsonl.gz"])
+def corpus_file(request, tmp_path):
+    """Fixture to provide the same terms in every supported format."""
+    name = request.param
+    if name == "terms.json":
+        content = json.dumps(TERMS)
+    elif ".jsonl" in name:
+        content = "\n".join(json.dumps(term) for term in TERMS)
+    else:
+        content = "\n".join(TERMS)
+    path = tmp_path / name
+    if name.endswith(".gz"):
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        path.write_text(content, encoding="utf-8")
+    return str(path)
+
+def test_iter_corpus_normalizes(corpus_file):
+    """Verify every format streams the same normalized, non-empty terms."""
+    terms = [term for term, _ in iter_corpus(corpus_file, chunk_size=4)]
+    assert terms == ["commit", "pull request", "code review", "commit", "Café"]
+
+def test_load_corpus_dedupes(corpus_file):
+    """Verify loading builds a trie with each term once."""
+    trie = load_corpus(Trie(), corpus_file)
+    assert sorted(trie) == ["Café", "code review", "commit", "pull request"]
+
+def test_weighted_items(tmp_path):
+    """Verify weighted objects and pairs feed ranking."""
+    path = tmp_path / "weighted.jsonl"
+    path.write_text('{"term": "code", "weight": 1}\n["commit", 5]\n')
+    trie = load_corpus(Trie(), str(path))
+    assert trie.search("co") == ["commit", "code"]
+
+def test_normalize_term():
+    """Verify Unicode and whitespace normalization."""
+    assert normalize_term("  Café \t bar ") == "Café bar"
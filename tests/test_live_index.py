@@ -0,0 +1,106 @@
+import threading
+from src.trie import Trie
+from src.live_index import LiveIndex
+
+def build_index(words, rebuild_delay=None):
+    """Helper to wrap a populated trie; secondary indexes are the word tuple itself."""
+    trie = Trie()
+    for word in words:
+        trie.insert(word)
+    return LiveIndex(trie, words, build_secondary=lambda w: (w, None), rebuild_delay=rebuild_delay)
+
+def test_add_and_remove_publish_generations():
+    """Verify writes bump the version and keep trie and word list in step."""
+    index = build_index(["commit", "code review"])
+    assert index.add("container", 2) is True
+    assert index.add("container", 3) is False
+    assert index.remove("commit") is True
+    assert index.remove("commit") is False
+    generation = index.generation
+    assert generation.version == 3
+    assert sorted(generation.words) == ["code review", "container"]
+    assert generation.trie.search("co") == ["container", "code review"]
+    assert generation.symspell is generation.words
+
+def test_old_generation_is_unchanged():
+    """Verify a reader holding an old generation keeps a consistent view."""
+    index = build_index(["commit"])
+    before = index.generation
+    root = before.trie.root
+    index.add("code")
+    assert index.generation is not before
+    assert before.words == ("commit",)
+    assert "code" not in [child.label for child in root.children.values()]
+
+def test_background_rebuild():
+    """Verify writes keep the old secondary indexes, marked stale, until the rebuild lands."""
+    index = build_index(["commit"], rebuild_delay=0.01)
+    index.add("code")
+    assert index.generation.stale
+    assert index.generation.symspell == ("commit",)
+    index._rebuild_timer.join()
+    assert not index.generation.stale
+    assert sorted(index.generation.symspell) == ["code", "commit"]
+
+def test_rebuild_installed_while_writes_continue():
+    """Verify a rebuild overtaken by writes is still installed, and the next one catches up."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_build(words):
+        if len(words) > 1:
+            started.set()
+            release.wait(5)
+        return words, None
+
+    trie = Trie()
+    trie.insert("commit")
+    index = LiveIndex(trie, ["commit"], build_secondary=slow_build, rebuild_delay=60)
+    index.add("code")
+    index._rebuild_timer.cancel()
+    rebuild = threading.Thread(target=index.rebuild)
+    rebuild.start()
+    assert started.wait(5)
+    index.add("container")
+    release.set()
+    rebuild.join()
+    generation = index.generation
+    assert generation.version == 2 and generation.stale
+    assert sorted(generation.symspell) == ["code", "commit"]
+    index._rebuild_timer.cancel()
+    index.rebuild()
+    assert not index.generation.stale
+    assert sorted(index.generation.symspell) == ["code", "commit", "container"]
+    assert index.secondary_version == 2
+
+def test_concurrent_readers_see_whole_terms():
+    """Verify readers never observe partial terms while writers run."""
+    words = ["term%03d" % i for i in range(200)]
+    index = build_index(words[:100])
+    errors = []
+
+    def reader():
+        for _ in range(200):
+            for result in index.generation.trie.search("term"):
+                if result not in words:
+                    errors.append(result)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for word in words[100:]:
+        index.add(word)
+        index.remove(word)
+    for thread in readers:
+        thread.join()
+    assert not errors
+    assert sorted(index.generation.trie) == words[:100]
+
+def test_token_index_rebuild():
+    """Verify the token index is rebuilt with weights after writes."""
+    from src.token_index import TokenIndex
+    trie = Trie()
+    trie.insert("unit test", 1)
+    index = LiveIndex(trie, ["unit test"], rebuild_delay=None, build_tokens=TokenIndex)
+    index.add("integration test", 2)
+    assert index.generation.tokens.search("test") == ["integration test", "unit test"]
@@ -0,0 +1,84 @@
+from fastapi.testclient import TestClient
+from api.app import app
+from src.metrics import Registry, Trace
+from src.trie import Trie
+from src.symspell import SymSpellIndex
+from src.fuzzy_search import fuzzy_search, trie_fuzzy_search
+from src.terms import TermDictionary
+
+def test_render_text_format():
+    """Verify counters, collected gauges and cumulative histogram buckets are rendered."""
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests.", ("path",))
+    requests.inc(("/a",))
+    requests.inc(("/a",), 2)
+    requests.inc(('say "hi"\n',))
+    registry.gauge("terms", "Terms.", collect=lambda: {(): 42})
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{path="/a"} 3' in lines
+    assert 'requests_total{path="say \\"hi\\"\\n"} 1' in lines
+    assert "terms 42" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_count 4" in lines
+    assert "latency_seconds_sum 3.65" in lines
+
+def test_engine_traces():
+    """Verify engines time their stages into a trace without changing results."""
+    words = ["commit", "code review", "container", "comet"]
+    trie = Trie()
+    for word in words:
+        trie.insert(word)
+    trace = Trace()
+    assert trie.ranked("co", 2, trace) == trie.ranked("co", 2)
+    assert set(trace.stages) == {"prefix_walk", "collect"}
+
+    trace = Trace()
+    symspell = SymSpellIndex(words, max_distance=2)
+    assert symspell.search("comit", 1, trace) == symspell.search("comit", 1)
+    assert set(trace.stages) == {"candidates", "verify"}
+    assert trace.counts["candidates"] >= 1
+
+    for corpus in (words, TermDictionary(words)):
+        trace = Trace()
+        assert fuzzy_search("comit", 1, corpus, trace) == fuzzy_search("comit", 1, corpus)
+        assert "verify" in trace.stages and trace.counts["candidates"] >= 1
+
+    trace = Trace()
+    assert trie_fuzzy_search("comit", 1, trie, trace) == trie_fuzzy_search("comit", 1, trie)
+    assert "walk" in trace.stages
+
+def metric_value(text, sample):
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_metrics_endpoint():
+    """Verify searches are counted per route, algorithm and stage."""
+    client = TestClient(app)
+    before = client.get("/metrics").text
+    assert client.get("/autocomplete?prefix=co&limit=3").status_code == 200
+    assert client.get("/fuzzy?query=dockr&max_distance=1").status_code == 200
+    assert client.get("/fuzzy?query=qqqqqqqq&max_distance=1").status_code == 404
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = response.text
+
+    def delta(sample):
+        return metric_value(after, sample) - metric_value(before, sample)
+
+    assert delta('search_http_requests_total{handler="/autocomplete",method="GET",code="200"}') == 1
+    assert delta('search_http_requests_total{handler="/fuzzy",method="GET",code="404"}') == 1
+    assert delta('search_results_count{endpoint="fuzzy"}') == 2
+    assert delta('search_stage_duration_seconds_count{endpoint="autocomplete",stage="serialize"}') == 1
+    assert delta('search_stage_duration_seconds_count{endpoint="fuzzy",stage="cache"}') == 2
+    assert 'search_query_duration_seconds_count{endpoint="autocomplete",algorithm="trie"' in after
+    assert metric_value(after, "search_index_terms") >= 20
+    assert 'search_index_bytes{structure="trie"}' in after
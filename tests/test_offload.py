@@ -0,0 +1,63 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import pytest
+from src.trie import Trie
+from src.fuzzy_search import fuzzy_search
+from src.snapshot import write_snapshot
+from src.offload import BoundedPool, Overloaded, SingleFlight, init_snapshot_worker, snapshot_fuzzy
+
+def test_single_flight_coalesces():
+    """Verify concurrent calls with one key run once and share the result."""
+    calls = []
+
+    async def main():
+        flight = SingleFlight()
+
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key.upper()
+
+        results = await asyncio.gather(*(flight.do(key, lambda key=key: work(key)) for key in "aaab"))
+        assert flight.flights == {}
+        return results, flight.coalesced
+
+    results, coalesced = asyncio.run(main())
+    assert sorted(calls) == ["a", "b"]
+    assert [result for result, _ in results] == ["A", "A", "A", "B"]
+    assert [shared for _, shared in results] == [False, True, True, False]
+    assert coalesced == 2
+
+def test_bounded_pool_sheds_load():
+    """Verify calls beyond max_pending are refused while the pool is busy."""
+    release = threading.Event()
+
+    async def main():
+        pool = BoundedPool(ThreadPoolExecutor(2), max_pending=2)
+        busy = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*busy)
+        assert await pool.run(len, "abc") == 3
+        return pool.stats()
+
+    stats = asyncio.run(main())
+    assert stats == {"pending": 0, "max_pending": 2, "completed": 3, "shed": 1}
+
+def test_snapshot_workers(tmp_path):
+    """Verify process pool workers answer fuzzy queries from the mapped snapshot."""
+    trie = Trie()
+    for word in ["code", "code review", "commit", "container"]:
+        trie.insert(word)
+    path = str(tmp_path / "index.snap")
+    write_snapshot(trie, path)
+    executor = ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=init_snapshot_worker, initargs=(path,))
+    with executor:
+        for engine in ["trie", "scan"]:
+            assert executor.submit(snapshot_fuzzy, engine, "comit", 2).result() == \
+                fuzzy_search("comit", 2, sorted(trie))
@@ -0,0 +1,59 @@
+import time
+from src.trie import Trie
+from src.popularity import Popularity
+
+def build_trie():
+    """Helper to build a small weighted trie."""
+    trie = Trie()
+    for word, weight in [("code", 1), ("code review", 4), ("commit", 5), ("container", 3), ("deploy", 2)]:
+        trie.insert(word, weight)
+    return trie
+
+def test_rank_blends_counts():
+    """Verify popular terms climb, including ones outside the fetched top entries."""
+    trie = build_trie()
+    popularity = Popularity(boost=1.0)
+    assert popularity.rank(trie.ranked("co", 2), 2, "co") == ["commit", "code review"]
+    for _ in range(100):
+        popularity.record("code")
+    popularity.record("not indexed")
+    popularity.flush(trie.weight)
+    assert set(popularity.snapshot.counts) == {"code"}
+    # log1p(100) ~ 4.6 lifts "code" from weight 1 to ~5.6
+    assert popularity.rank(trie.ranked("co", 2), 2, "co") == ["code", "commit"]
+    assert popularity.rank(trie.ranked("", None), None, "") == ["code", "commit", "code review", "container", "deploy"]
+    assert popularity.rank(trie.ranked("d", 1), 1, "d") == ["deploy"]
+
+def test_rank_fuzzy_keeps_scores():
+    """Verify fuzzy matches are reordered by popularity but keep their scores."""
+    trie = build_trie()
+    popularity = Popularity(fuzzy_boost=0.1)
+    matches = [("commit", 0.8), ("code", 0.75), ("container", 0.5)]
+    assert popularity.rank_fuzzy(matches) == matches
+    popularity.record("code", 5)
+    popularity.flush(trie.weight)
+    assert popularity.rank_fuzzy(matches) == [("code", 0.75), ("commit", 0.8), ("container", 0.5)]
+
+def test_decay_and_forget():
+    """Verify counts halve per half-life, fade out, and can be dropped."""
+    trie = build_trie()
+    popularity = Popularity(half_life=0.01, decay_interval=0.0)
+    popularity.record("commit", 1.0)
+    popularity.record("deploy", 1000.0)
+    popularity.flush(trie.weight)
+    time.sleep(0.05)
+    popularity.flush(trie.weight)
+    counts = popularity.snapshot.counts
+    assert "commit" not in counts
+    assert 0 < counts["deploy"] < 1000 / 8
+    popularity.forget("deploy")
+    assert popularity.snapshot.counts == {}
+
+def test_max_terms():
+    """Verify only the most popular terms are kept."""
+    trie = build_trie()
+    popularity = Popularity(max_terms=2)
+    for amount, term in enumerate(["code", "commit", "deploy"]):
+        popularity.record(term, amount + 1)
+    popularity.flush(trie.weight)
+    assert set(popularity.snapshot.counts) == {"commit", "deploy"}
@@ -0,0 +1,99 @@
+import os
+import threading
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from api.app import app
+from src.metrics import MetricsMiddleware, Trace
+from src.profiling import SamplingProfiler, SlowQueryLog, server_timing
+
+def traced_app(slow_log=None, trace_header=None):
+    demo = FastAPI()
+
+    @demo.get("/search")
+    def search(request: Request, q: str):
+        trace = request.state.trace
+        trace.endpoint = "fuzzy"
+        trace.algorithm = "scan"
+        trace.add("verify", 0.002)
+        trace.count("candidates", 42)
+        trace.finish(3)
+        return {"q": q}
+
+    @demo.get("/health")
+    def health():
+        return {"ok": True}
+
+    demo.add_middleware(MetricsMiddleware, metrics=None, slow_log=slow_log, trace_header=trace_header)
+    return demo
+
+def test_slow_query_log(caplog):
+    """Requests over the threshold are logged with parameters, counts and stage timings."""
+    log = SlowQueryLog(0, size=2)
+    client = TestClient(traced_app(slow_log=log))
+    with caplog.at_level("WARNING", logger="search.slow"):
+        for q in ("a", "b", "c"):
+            assert client.get("/search", params={"q": q}).status_code == 200
+    entries = log.entries()
+    assert log.stats()["slow"] == 3
+    assert [entry["params"] for entry in entries] == [{"q": "b"}, {"q": "c"}]
+    entry = entries[-1]
+    assert entry["path"] == "/search" and entry["status"] == 200
+    assert entry["algorithm"] == "scan" and entry["results"] == 3
+    assert entry["counts"] == {"candidates": 42}
+    assert entry["stages_ms"]["verify"] == 2.0
+    assert len(caplog.records) == 3 and '"candidates": 42' in caplog.records[-1].getMessage()
+    client.get("/health")
+    assert log.stats()["slow"] == 3
+
+    fast = SlowQueryLog(10_000)
+    TestClient(traced_app(slow_log=fast)).get("/search", params={"q": "a"})
+    assert fast.entries() == [] and fast.stats()["slow"] == 0
+    sampled = SlowQueryLog(0, sample_rate=0.0)
+    TestClient(traced_app(slow_log=sampled)).get("/search", params={"q": "a"})
+    assert sampled.entries() == [] and sampled.stats()["slow"] == 1
+
+def test_trace_header():
+    """Only requests that ask for a trace get a Server-Timing header."""
+    client = TestClient(traced_app(trace_header=server_timing))
+    assert "server-timing" not in client.get("/search", params={"q": "a"}).headers
+    header = client.get("/search", params={"q": "a"}, headers={"X-Search-Trace": "1"}).headers["server-timing"]
+    parts = header.split(", ")
+    assert parts[0] == "verify;dur=2.000"
+    assert parts[1].startswith("serialize;dur=")
+    assert parts[2].startswith("total;dur=") and parts[2].endswith(';desc="scan miss"')
+    assert parts[3:] == ['candidates;desc="42"', 'results;desc="3"']
+    assert "server-timing" not in TestClient(traced_app()).get(
+        "/search", params={"q": "a"}, headers={"X-Search-Trace": "1"}).headers
+
+    trace = Trace()
+    assert server_timing(trace, 0.001) == 'total;dur=1.000;desc="request"'
+
+def test_sampling_profiler():
+    """The profiler finds the function a busy thread spends its time in."""
+    stop = threading.Event()
+
+    def busy_search():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_search)
+    worker.start()
+    try:
+        report = SamplingProfiler(interval=0.001, include=("tests" + os.sep,)).run(0.2)
+    finally:
+        stop.set()
+        worker.join()
+    assert report["rounds"] > 0 and report["samples"] > 0
+    top = report["functions"][0]
+    assert top["function"].endswith(":busy_search") and top["inclusive"] == report["samples"]
+    # The innermost frame can also be threading's Event.is_set, called from busy_search
+    assert all(":busy_search" in line for line in report["stacks"])
+
+def test_debug_endpoints_disabled():
+    """Profiling is opt-in: the debug endpoints are hidden and off by default."""
+    client = TestClient(app)
+    assert client.get("/debug/profile", params={"seconds": 0.01}).status_code == 404
+    assert client.get("/debug/slow-queries").status_code == 404
+    response = client.get("/autocomplete", params={"prefix": "co"}, headers={"X-Search-Trace": "1"})
+    assert "server-timing" not in response.headers
+    assert not any(path.startswith("/debug") for path in client.get("/openapi.json").json()["paths"])
@@ -0,0 +1,57 @@
+import json
+from api.app import app
+from benchmarks.replay import load_log, percentile, replay, synthetic_log
+
+def test_load_log(tmp_path):
+    """Verify both the params and the url forms of a log line are read."""
+    log = tmp_path / "queries.jsonl"
+    log.write_text(
+        json.dumps({"path": "/autocomplete", "params": {"prefix": "co"}, "t": 0.5}) + "\n\n"
+        + json.dumps({"url": "/fuzzy?query=comit&max_distance=1"}) + "\n"
+    )
+    requests = load_log(str(log))
+    assert requests[0] == {"path": "/autocomplete", "params": {"prefix": "co"}, "t": 0.5}
+    assert requests[1]["path"] == "/fuzzy"
+    assert requests[1]["query"] == "query=comit&max_distance=1"
+
+def test_percentile():
+    """Verify nearest-rank percentiles."""
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile(values, 0.999) == 100
+    assert percentile([], 0.5) is None
+
+def test_closed_loop_report():
+    """Verify counts, percentiles and errors are reported per endpoint."""
+    requests = synthetic_log(["commit", "code review", "docker"], 40, seed=1)
+    requests.append({"path": "/fuzzy", "params": {"query": "x", "max_distance": 9}})
+    report = replay(requests, app=app, concurrency=4)
+    assert report["total"]["requests"] == 41
+    fuzzy = report["endpoints"]["/fuzzy"]
+    assert fuzzy["errors"] == 1 and fuzzy["statuses"]["422"] == 1
+    autocomplete = report["endpoints"]["/autocomplete"]
+    assert autocomplete["errors"] == 0
+    assert autocomplete["p50_ms"] <= autocomplete["p99_ms"] <= autocomplete["max_ms"]
+    assert report["config"]["mode"] == "closed"
+
+def test_open_loop_rate():
+    """Verify the open loop sends on schedule and stops at the duration."""
+    requests = [{"path": "/autocomplete", "params": {"prefix": "co"}}]
+    report = replay(requests, app=app, rate=100, duration=0.3)
+    assert 20 <= report["total"]["requests"] <= 31
+    assert report["total"]["error_rate"] == 0.0
+    assert report["config"]["mode"] == "open"
+
+def test_recorded_replay_cycles():
+    """Verify a recorded log keeps its offsets and repeats until the duration."""
+    requests = [
+        {"path": "/autocomplete", "params": {"prefix": "co"}, "t": 10.0},
+        {"path": "/fuzzy", "params": {"query": "comit", "max_distance": 1}, "t": 10.05},
+        {"path": "/autocomplete", "params": {"prefix": "do"}, "t": 10.1},
+    ]
+    report = replay(requests, app=app, recorded=True, duration=0.35)
+    # 0.1s per pass with the first and last requests of consecutive passes together
+    assert 9 <= report["total"]["requests"] <= 12
+    assert report["total"]["error_rate"] == 0.0
+    assert report["config"]["mode"] == "recorded"
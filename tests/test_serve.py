@@ -0,0 +1,31 @@
+import os
+import pytest
+from src.serve import fuzzy_processes_per_worker, prepare_snapshot
+from src.snapshot import load_snapshot
+
+def test_prepare_snapshot(tmp_path):
+    """Verify the shared snapshot holds the corpus and can be mapped by a worker."""
+    source = tmp_path / "corpus.txt"
+    source.write_text("commit\t5\ncode\t1\ncontainer\t3\n")
+    path = prepare_snapshot(str(source), str(tmp_path))
+    assert os.path.dirname(path) == str(tmp_path)
+    mapped = load_snapshot(path)
+    assert mapped.search("co") == ["commit", "container", "code"]
+    if mapped.bitparallel is not None:
+        assert mapped.bitparallel.search("comit", 1)[0][0] == "commit"
+    mapped.close()
+
+def test_prepare_snapshot_cleans_up(tmp_path):
+    """Verify a failed build leaves no file behind."""
+    with pytest.raises(OSError):
+        prepare_snapshot(str(tmp_path / "missing.json"), str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+def test_fuzzy_processes_per_worker(monkeypatch):
+    """Verify the workers' fuzzy process pools together use about one process per CPU."""
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert fuzzy_processes_per_worker(1) == 8
+    assert fuzzy_processes_per_worker(4) == 2
+    assert fuzzy_processes_per_worker(16) == 1
+    monkeypatch.setattr(os, "cpu_count", lambda: None)
+    assert fuzzy_processes_per_worker(2) == 1
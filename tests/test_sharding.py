@@ -0,0 +1,65 @@
+import signal
+import pytest
+from src.trie import Trie
+from src.fuzzy_search import fuzzy_search
+from src.init_data import load_demo_data, populate_trie
+from src.sharding import ShardedIndex, ShardTimeout
+
+WEIGHTED = [("code", 1), ("code review", 4), ("commit", 5), ("container", 3), ("deploy", 2),
+            ("debug", 2), ("docker", 6), ("merge", 1), ("commits", 5), ("coder", 0)]
+
+@pytest.fixture(scope="module")
+def corpus():
+    return WEIGHTED + [(word, 0.0) for word in load_demo_data()]
+
+@pytest.fixture(scope="module")
+def sharded(corpus):
+    """Fixture to provide a three-shard index over the demo corpus."""
+    index = ShardedIndex(corpus, shard_count=3, symspell_max_distance=1)
+    yield index
+    index.close()
+
+def test_autocomplete_matches_single_trie(corpus, sharded):
+    """Verify scatter-gather autocomplete ranks and limits like one trie."""
+    trie = Trie()
+    populate_trie(trie, corpus)
+    assert len(sharded) == len(trie)
+    for prefix in ["", "c", "co", "code", "d", "m", "zzz"]:
+        for limit in [None, 1, 3, 50]:
+            assert sharded.search(prefix, limit) == trie.search(prefix, limit)
+
+def test_fuzzy_matches_scan(corpus, sharded):
+    """Verify merged fuzzy results keep similarity order and corpus-order ties."""
+    words = sorted({term for term, _ in corpus})
+    for query in ["comit", "cod", "dbug", "contaner", "x"]:
+        for max_distance in [1, 2, 3]:
+            expected = fuzzy_search(query, max_distance, words)
+            assert sharded.fuzzy(query, max_distance) == expected
+            assert sharded.fuzzy(query, max_distance, limit=2) == expected[:2]
+
+def test_more_shards_than_terms():
+    """Verify empty shards are skipped for autocomplete and harmless for fuzzy."""
+    index = ShardedIndex(["alpha", "beta"], shard_count=4)
+    try:
+        assert index.search("") == ["alpha", "beta"]
+        assert index.fuzzy("alpa", 1) == [("alpha", 0.8)]
+    finally:
+        index.close()
+
+def test_shard_timeout():
+    """Verify a shard that does not answer raises ShardTimeout instead of blocking."""
+    index = ShardedIndex(["alpha", "beta"], shard_count=2, timeout=5)
+    try:
+        assert index.fuzzy("alpa", 1) == [("alpha", 0.8)]
+        for shard in index.shards:
+            shard.process.send_signal(signal.SIGSTOP)
+        index.timeout = 0.2
+        with pytest.raises(ShardTimeout):
+            index.fuzzy("alpa", 1)
+        assert not index._pending
+        for shard in index.shards:
+            shard.process.send_signal(signal.SIGCONT)
+        index.timeout = 5
+        assert index.fuzzy("alpa", 1) == [("alpha", 0.8)]
+    finally:
+        index.close()
@@ -0,0 +1,58 @@
+import pytest
+from src.trie import Trie
+from src.fuzzy_search import trie_fuzzy_search
+from src.snapshot import write_snapshot, load_snapshot
+
+@pytest.fixture
+def trie():
+    """Fixture to provide a small weighted trie."""
+    trie = Trie(top_k=2)
+    for word, weight in [("code", 1), ("code review", 4), ("commit", 5), ("container", 3), ("déploy", 2)]:
+        trie.insert(word, weight)
+    return trie
+
+@pytest.fixture
+def mapped(trie, tmp_path):
+    path = tmp_path / "index.snap"
+    write_snapshot(trie, path)
+    mapped = load_snapshot(path)
+    yield mapped
+    mapped.close()
+
+def test_search_matches_trie(trie, mapped):
+    """Verify the mapped snapshot answers prefix queries like the original trie."""
+    assert len(mapped) == len(trie)
+    for prefix in ["", "c", "co", "code", "code r", "dé", "x"]:
+        for limit in [None, 1, 2, 3]:
+            assert mapped.search(prefix, limit) == trie.search(prefix, limit)
+
+def test_terms_and_fuzzy(trie, mapped):
+    """Verify the lazy term list and trie-walking fuzzy search work on the mapping."""
+    assert list(mapped.terms) == sorted(trie.search(""))
+    assert trie_fuzzy_search("comit", 1, mapped) == trie_fuzzy_search("comit", 1, trie)
+
+def test_rejects_other_files(tmp_path):
+    """Verify non-snapshot files are refused."""
+    path = tmp_path / "bogus.snap"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        load_snapshot(path)
+
+def test_packed_bitparallel_matches_scan(trie, mapped):
+    """Verify the bit-parallel matcher mapped from the snapshot agrees with the scan."""
+    pytest.importorskip("numpy")
+    from src.fuzzy_search import fuzzy_search
+    assert mapped.bitparallel is not None
+    assert not mapped.bitparallel.codes.flags.writeable
+    for query in ["comit", "code", "deploy", "contaner"]:
+        for max_distance in [0, 1, 2]:
+            assert mapped.bitparallel.search(query, max_distance) == fuzzy_search(query, max_distance, mapped.terms)
+
+def test_packed_section_optional(trie, tmp_path):
+    """Verify snapshots written without the packed arrays load without a matcher."""
+    path = tmp_path / "plain.snap"
+    write_snapshot(trie, path, packed=False)
+    mapped = load_snapshot(path)
+    assert mapped.bitparallel is None
+    assert mapped.search("co", 2) == trie.search("co", 2)
+    mapped.close()
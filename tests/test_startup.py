@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from fastapi.testclient import TestClient
+import api.app as app_module
+from api.app import app
+from src.startup import IndexLoader
+
+def test_index_loader_states():
+    """Verify the loader goes from loading through warm to ready, and reports failures."""
+    release = threading.Event()
+    loader = IndexLoader(lambda: release.wait(5), warm=lambda: True)
+    assert loader.state == "loading" and not loader.serving
+    loader.start()
+    assert loader.state == "warm" and loader.serving
+    assert not loader.wait(0.01)
+    release.set()
+    assert loader.wait(5) and loader.state == "ready"
+    assert loader.stats()["load_seconds"] is not None
+
+    def broken():
+        raise OSError("corpus missing")
+
+    failed = IndexLoader(broken, warm=broken)
+    failed.start()
+    assert not failed.wait(5)
+    assert failed.state == "failed" and failed.error == "OSError: corpus missing"
+    with pytest.raises(OSError):
+        IndexLoader(broken).start(background=False)
+
+def test_probes_while_loading(monkeypatch, tmp_path):
+    """Verify the API answers probes during startup and serves the warm subset until the full index."""
+    release = threading.Event()
+    warm_path = tmp_path / "warm.txt"
+    warm_path.write_text("code review\t50\ncommit\t40\n")
+    full_index = app_module.serving_index()
+    full_live_index = app_module.live_index
+
+    def load():
+        release.wait(5)
+        app_module.live_index = full_live_index
+
+    monkeypatch.setattr(app_module, "live_index", None)
+    monkeypatch.setattr(app_module, "static_index", None)
+    monkeypatch.setattr(app_module, "WARM_DATA_PATH", str(warm_path))
+    loader = IndexLoader(load)
+    monkeypatch.setattr(app_module, "index_loader", loader)
+    client = TestClient(app)
+
+    loader.start()
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/readyz").status_code == 503
+    response = client.get("/autocomplete", params={"prefix": "co"})
+    assert response.status_code == 503 and response.headers["retry-after"] == "1"
+    assert client.post("/terms", json={"term": "cobalt"}).status_code == 503
+
+    assert app_module.load_warm_index()
+    loader.state = "warm"
+    ready = client.get("/readyz")
+    assert ready.status_code == 200 and ready.json()["terms"] == 2
+    assert client.get("/readyz", params={"full": True}).status_code == 503
+    assert client.get("/autocomplete", params={"prefix": "co"}).json()["results"] == ["code review", "commit"]
+    fuzzy = client.get("/fuzzy", params={"query": "comit"}).json()
+    assert fuzzy["results"][0]["term"] == "commit" and fuzzy["algorithm"] == "Levenshtein Automaton (Trie)"
+    assert client.get("/fuzzy", params={"query": "comit", "engine": "symspell"}).status_code == 503
+    response = client.get("/autocomplete", params={"prefix": "rev", "mode": "token"})
+    assert response.status_code == 503 and response.headers["retry-after"] == "1"
+
+    release.set()
+    assert loader.wait(5)
+    ready = client.get("/readyz", params={"full": True})
+    assert ready.status_code == 200 and ready.json()["terms"] == len(full_index.trie) > 2
+    assert app_module.serving_index() is full_index
+
+def test_failed_load_fails_liveness(monkeypatch):
+    """Verify a failed load turns /healthz red so the process gets restarted."""
+    def broken():
+        raise OSError("corpus missing")
+
+    loader = IndexLoader(broken)
+    loader.start()
+    loader.wait(5)
+    monkeypatch.setattr(app_module, "index_loader", loader)
+    response = TestClient(app).get("/healthz")
+    assert response.status_code == 500 and response.json()["error"] == "OSError: corpus missing"
+
+def test_heavy_imports_deferred(tmp_path):
+    """Verify importing the app does not import uvicorn, python-Levenshtein or NumPy."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, api.app; print(sorted(m for m in ('uvicorn', 'Levenshtein', 'numpy') if m in sys.modules))"
+    # The background load fails at once on a missing corpus, so only the import itself
+    # can have loaded them
+    env = {**os.environ, "INDEX_BACKGROUND": "1", "SEARCH_DATA": str(tmp_path / "missing.txt"), "PYTHONPATH": root}
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True,
+                            env=env, check=True).stdout
+    assert output.strip() == "[]"
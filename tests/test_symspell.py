@@ -0,0 +1,27 @@
+import pytest
+from src.fuzzy_search import fuzzy_search
+from src.symspell import SymSpellIndex, deletion_variants
+
+@pytest.fixture(scope="module")
+def test_words():
+    """Fixture to provide test data."""
+    return ["hello", "help", "world", "fuzzy", "integration test", "Integration"]
+
+def test_deletion_variants():
+    """Verify variants cover every string within the deletion budget."""
+    assert deletion_variants("abc", 1) == {"abc", "bc", "ac", "ab"}
+    assert "" in deletion_variants("ab", 2)
+
+def test_matches_linear_scan(test_words):
+    """Verify lookups return exactly the linear scan results, order included."""
+    index = SymSpellIndex(test_words, max_distance=2, prefix_length=4)
+    for query, max_distance in [("helo", 1), ("hel", 2), ("integation tst", 2), ("INTEGRATON", 1), ("zzzzz", 2)]:
+        assert index.search(query, max_distance) == fuzzy_search(query, max_distance, test_words)
+
+def test_memory_budget(test_words):
+    """Verify the build stops when the estimated size exceeds the budget."""
+    with pytest.raises(MemoryError):
+        SymSpellIndex(test_words, max_distance=2, memory_budget_mb=0.0001)
+    stats = SymSpellIndex(test_words, max_distance=1).stats()
+    assert stats["terms"] == len(test_words)
+    assert stats["size_bytes"] > 0
@@ -0,0 +1,66 @@
+import pytest
+from src.terms import TermDictionary
+from src.fuzzy_search import fuzzy_search, fold, trie_fuzzy_search
+from src.symspell import SymSpellIndex
+from src.bitparallel import BitParallelMatcher, np
+from src.init_data import load_demo_data, populate_trie
+from src.trie import Trie
+
+def test_interning():
+    """Verify terms get sequential IDs and a repeated term keeps its first ID."""
+    terms = TermDictionary(["commit", "Straße", "commit", "日本語"])
+    assert len(terms) == 3
+    assert list(terms) == ["commit", "Straße", "日本語"]
+    assert terms.add("commit") == 0
+    assert terms.add("merge") == 3
+    assert terms.id_of("Straße") == 1
+    assert terms.id_of("strasse") is None
+    assert "merge" in terms and "rebase" not in terms and 3 not in terms
+    assert terms[-1] == "merge"
+    with pytest.raises(IndexError):
+        terms[4]
+
+def test_folded_forms():
+    """Verify folded forms are casefolded and NFC-normalized."""
+    terms = TermDictionary(["Straße", "CAFÉ", "Commit"])
+    assert [terms.folded(i) for i in range(3)] == ["strasse", "café", "commit"]
+    assert terms.folded_lengths.tolist() == [7, 4, 6]
+    assert fold("CAFÉ") == terms.folded(1)
+
+def test_many_terms():
+    """Verify lookups stay correct as the hash table grows."""
+    words = [f"term{i}" for i in range(5000)]
+    terms = TermDictionary(words)
+    assert all(terms.id_of(word) == i for i, word in enumerate(words))
+    assert terms.id_of("term5000") is None
+    assert terms.memory_usage() < 5000 * 80
+
+def test_fuzzy_engines_accept_dictionary():
+    """Verify every fuzzy engine returns the same results over a dictionary as over a list."""
+    words = load_demo_data() + ["Straße", "strasse", "Code Review"]
+    terms = TermDictionary(words)
+    symspell = SymSpellIndex(terms, max_distance=2)
+    matcher = BitParallelMatcher(terms) if np is not None else None
+    for query, max_distance in [("comit", 1), ("STRASE", 2), ("code reveiw", 2), ("x", 1)]:
+        expected = fuzzy_search(query, max_distance, words)
+        assert fuzzy_search(query, max_distance, terms) == expected
+        assert symspell.search(query, max_distance) == expected
+        if matcher is not None:
+            assert matcher.search(query, max_distance) == expected
+    # New terms are found after the length groups are rebuilt
+    terms.add("comits")
+    assert ("comits", 1.0) in fuzzy_search("comits", 0, terms)
+
+def test_scores_use_folded_lengths():
+    """Verify scores stay within 0-1 when folding makes a term longer than it was."""
+    words = ["a", "ss"]
+    expected = [("ss", 0.5), ("a", 0.0)]
+    assert fuzzy_search("ßß", 4, words) == expected
+    assert fuzzy_search("ßß", 4, TermDictionary(words)) == expected
+    assert SymSpellIndex(words, max_distance=2).search("ßß", 2) == [("ss", 0.5)]
+    trie = Trie()
+    populate_trie(trie, words)
+    assert sorted(trie_fuzzy_search("ßß", 4, trie)) == sorted(expected)
+    if np is not None:
+        assert BitParallelMatcher(words).search("ßß", 4) == expected
+    assert fuzzy_search("strasse", 1, ["Straße", "Strasse"]) == [("Straße", 1.0), ("Strasse", 1.0)]
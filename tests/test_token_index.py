@@ -0,0 +1,47 @@
+import pytest
+from src.trie import Trie
+from src.init_data import populate_trie
+from src.token_index import TokenIndex, tokenize
+
+WEIGHTED = [("code review", 4), ("unit test", 2), ("integration test", 3), ("CI/CD", 1),
+            ("test-driven development", 5), ("go", 0), ("code", 1)]
+
+@pytest.fixture
+def index():
+    """Fixture to provide a weighted token index."""
+    return TokenIndex(WEIGHTED)
+
+def test_tokenize():
+    """Verify terms split on punctuation and whitespace and are casefolded."""
+    assert tokenize("CI/CD") == ["ci", "cd"]
+    assert tokenize("test-driven  Development") == ["test", "driven", "development"]
+    assert tokenize("snake_case") == ["snake", "case"]
+
+def test_token_mode(index):
+    """Verify mid-term word prefixes match, ranked by weight."""
+    assert index.search("review") == ["code review"]
+    assert index.search("test") == ["test-driven development", "integration test", "unit test"]
+    assert index.search("TE", limit=2) == ["test-driven development", "integration test"]
+    assert index.search("cd") == ["CI/CD"]
+    assert index.search("test uni") == ["unit test"]
+    assert index.search("nothing") == []
+
+def test_infix_mode(index):
+    """Verify substring matches, including queries shorter than an n-gram."""
+    for query in ["eview", "tion te", "i/c", "o", "go", "ode", "test", "xyz", ""]:
+        expected = sorted(
+            (term for term, _ in WEIGHTED if query.casefold() in term.casefold()),
+            key=lambda term: (-dict(WEIGHTED)[term], term),
+        )
+        assert index.search(query, mode="infix") == expected
+    assert index.search("test", limit=1, mode="infix") == ["test-driven development"]
+
+def test_reweight_and_populate():
+    """Verify populate_trie fills the token index alongside the trie."""
+    trie = Trie()
+    index = TokenIndex()
+    populate_trie(trie, WEIGHTED + [("unit test", 9)], token_index=index)
+    assert len(index) == len(trie)
+    assert index.search("test")[0] == "unit test"
+    with pytest.raises(ValueError):
+        index.search("test", mode="fuzzy")
@@ -1,5 +1,5 @@
 import unittest
-from src.trie import Trie
+from src.trie import Trie, CharTrie, TrieBuilder
 
 class TestTrie(unittest.TestCase):
     def setUp(self):
@@ -16,5 +16,74 @@ class TestTrie(unittest.TestCase):
         # Test returning empty list for unmatched prefix.
         self.assertEqual(self.trie.search("xyz"), [])
 
+    def test_search_inside_compressed_edge(self):
+        # A prefix ending mid-label still finds the words below that edge.
+        self.assertEqual(sorted(self.trie.search("appl")), ["apple", "application"])
+        self.assertEqual(self.trie.search("applx"), [])
+
+    def test_matches_char_trie(self):
+        # The radix trie returns the same completions as the per-character trie.
+        words = ["code review", "commit", "container", "co", "debug", "deploy", "deployment"]
+        radix, chars = Trie(), CharTrie()
+        for word in words + ["commit"]:
+            radix.insert(word)
+            chars.insert(word)
+        self.assertEqual(len(radix), len(words))
+        for prefix in ["", "c", "co", "com", "de", "deploy", "z"]:
+            self.assertEqual(sorted(radix.search(prefix)), sorted(chars.search(prefix)))
+        self.assertLess(radix.bytes_per_term(), chars.bytes_per_term())
+
+class TestRankedTrie(unittest.TestCase):
+    def setUp(self):
+        self.trie = Trie(top_k=2)
+        for word, weight in [("code", 1), ("commit", 5), ("container", 3), ("cobol", 0)]:
+            self.trie.insert(word, weight)
+
+    def test_limit_uses_cached_top(self):
+        # Limited searches return the best-weighted completions first.
+        self.assertEqual(self.trie.search("co", limit=2), ["commit", "container"])
+        self.assertEqual(self.trie.search("co", limit=1), ["commit"])
+
+    def test_limit_beyond_cache(self):
+        # Limits larger than top_k fall back to ranking the whole subtree.
+        self.assertEqual(self.trie.search("co", limit=3), ["commit", "container", "code"])
+        self.assertEqual(self.trie.search("co"), ["commit", "container", "code", "cobol"])
+
+    def test_reweight(self):
+        # Raising or lowering a weight updates the cached completions.
+        self.trie.insert("cobol", 10)
+        self.assertEqual(self.trie.search("co", limit=2), ["cobol", "commit"])
+        self.trie.insert("cobol", 0)
+        self.trie.insert("commit", 2)
+        self.assertEqual(self.trie.search("co", limit=2), ["container", "commit"])
+        self.assertEqual(len(self.trie), 4)
+
+class TestTrieBuilder(unittest.TestCase):
+    def test_bulk_build_matches_insert(self):
+        # Building from sorted words gives the same trie as repeated insert.
+        words = [("", 1), ("co", 2), ("code", 1), ("code review", 4), ("commit", 5), ("deploy", 3)]
+        built = Trie(top_k=2)
+        builder = TrieBuilder(built)
+        for word, weight in words:
+            self.assertTrue(builder.add(word, weight))
+        builder.finish()
+        inserted = Trie(top_k=2)
+        for word, weight in words:
+            inserted.insert(word, weight)
+        self.assertEqual(list(built), [word for word, _ in words])
+        for prefix in ["", "c", "co", "code", "d"]:
+            for limit in [None, 1, 2]:
+                self.assertEqual(built.search(prefix, limit), inserted.search(prefix, limit))
+
+    def test_rejects_unsorted_input(self):
+        # Out-of-order words are refused so the caller can fall back to insert.
+        builder = TrieBuilder(Trie())
+        self.assertTrue(builder.add("commit"))
+        self.assertTrue(builder.add("commit", 2))
+        self.assertFalse(builder.add("code"))
+        trie = builder.finish()
+        self.assertEqual(len(trie), 1)
+        self.assertEqual(trie.root.children["c"].weight, 2)
+
 if __name__ == "__main__":
     unittest.main()